@@ -0,0 +1,200 @@
+import json
+import time
+import traceback
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from classes.ResultCache import ResultCache
+from classes.formats import create_io
+from classes.xml_io import EXTENSIONS
+from main import add_budget_arguments, add_trace_arguments, create_budget, solve
+from utils.common import (DISTINGUISHED, SIMPLE, PYTHON_BACKEND, NUMPY_BACKEND, FACTORIZED_BACKEND, MINIMAL_COVER,
+                          CANDIDATE_KEYS, BCNF_DECOMPOSITION, THIRD_NF_SYNTHESIS)
+
+SUMMARY_FILENAME = "summary.json"
+
+# the label in the summary of an answer that is not yes, no or unknown, by task
+ANSWER_LABELS = {MINIMAL_COVER: "cover", CANDIDATE_KEYS: "keys", BCNF_DECOMPOSITION: "schemas",
+                 THIRD_NF_SYNTHESIS: "schemas"}
+
+# the caches of a worker process, by their arguments, kept across tasks so
+# that each one counts its entries instead of scanning the directory
+workerCaches = {}
+
+
+def batchMain(argv):
+    """Chases every problem statement given on the command line and
+    returns the exit status: 0 if all of them succeeded, 1 otherwise."""
+
+    args = parse_batch_arguments(argv)
+    problems = findProblems(args.source)
+    trace = (args.trace_level, args.trace_every, args.trace_format, args.gzip)
+    cache = None if args.cache_dir is None else (args.cache_dir, args.cache_size)
+    results = runBatch(args.chase_type, problems, args.output_dir, args.workers, args.backend,
+                       trace, cache, create_budget(args))
+    writeSummary(results, args.output_dir)
+    return 0 if all(result["status"] == "ok" for result in results) else 1
+
+
+def parse_batch_arguments(argv):
+    """Set up the command line arguments of the batch mode and parse it."""
+
+    parser = ArgumentParser(
+        prog="main.py batch",
+        description="Apply the Chase algorithm to many problem statements with a pool of\
+            worker processes."
+    )
+    parser.add_argument("chase_type", choices=[SIMPLE, DISTINGUISHED])
+    parser.add_argument("source",
+                        help="a directory of problem statements, or a manifest file listing one per line")
+    parser.add_argument("output_dir")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="the number of worker processes (default is the number of cpus)")
+    parser.add_argument("--backend", default=PYTHON_BACKEND, choices=[PYTHON_BACKEND, NUMPY_BACKEND, FACTORIZED_BACKEND])
+    add_trace_arguments(parser)
+    add_budget_arguments(parser)
+    parser.add_argument("--cache-dir", default=None,
+                        help="a directory to cache answers in, shared by all workers")
+    parser.add_argument("--cache-size", type=int, default=1000)
+
+    return parser.parse_args(argv)
+
+
+def findProblems(source):
+    """Returns the paths of the problem statements in `source`.
+
+    A directory gives all of its xml, json and binary files in name
+    order. Any other file is read as a manifest with one path per line,
+    relative to the manifest; blank lines and lines starting with `#`
+    are skipped.
+    """
+
+    source = Path(source)
+    if source.is_dir():
+        return sorted(path for path in source.iterdir() if path.suffix in EXTENSIONS)
+    problems = []
+    for line in source.read_text().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            problems.append(source.parent / line)
+    return problems
+
+
+def outputPaths(problems, outputDir):
+    """Returns an output path in `outputDir` for each problem, named
+    after the problem and numbered when two problems share a name."""
+
+    outputDir = Path(outputDir)
+    paths = []
+    used = set()
+    for problem in problems:
+        name = Path(problem).name
+        count = 1
+        while name in used:
+            count += 1
+            name = f"{Path(problem).stem}_{count}{Path(problem).suffix}"
+        used.add(name)
+        paths.append(outputDir / name)
+    return paths
+
+
+def chaseFile(task):
+    """Chases one problem statement in a worker process and returns its
+    status. An exception only fails this problem."""
+
+    chase_type, input, output, backend, trace, cache, budget = task
+    result = {"input": str(input), "output": str(output)}
+    start = time.perf_counter()
+    try:
+        if cache is not None:
+            if cache not in workerCaches:
+                workerCaches[cache] = ResultCache(*cache)
+            cache = workerCaches[cache]
+        xml_io = create_io(str(input), str(output), *trace)
+        answer = solve(chase_type, xml_io, backend, cache=cache, budget=budget)
+        result["status"] = "ok"
+        tasks = [query.task for query in xml_io.queries]
+        if isinstance(answer, bool):
+            result["answer"] = answerLabel(answer, tasks[0])
+        elif xml_io.limit is not None:
+            result["answer"] = "unknown"
+            result["limit"] = xml_io.limit
+        elif isinstance(answer, tuple):
+            # the answers of a problem with several queries, None if a
+            # chase stopped at a limit
+            result["answer"] = ",".join(answerLabel(value, task) for value, task in zip(answer, tasks))
+        elif answer is not None:
+            result["answer"] = answerLabel(answer, tasks[0])
+    except Exception as error:
+        result["status"] = "error"
+        result["error"] = "".join(traceback.format_exception_only(error)).strip()
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def answerLabel(answer, task):
+    """Returns the label of the answer to a query of `task` in the
+    summary: `yes`, `no`, `unknown` for a chase stopped at a limit, or
+    what the task finds, such as `cover` or `keys`."""
+
+    if isinstance(answer, bool):
+        return "yes" if answer else "no"
+    if answer is None:
+        return "unknown"
+    return ANSWER_LABELS.get(task, "cover")
+
+
+def runBatch(chase_type, problems, outputDir, workers=None, backend=PYTHON_BACKEND, trace=(), cache=None,
+             budget=None):
+    """Chases every problem in `problems` with a pool of `workers`
+    processes and returns their statuses in the same order.
+
+    `trace` holds the trace arguments of `XMLIO` after the filenames,
+    `cache` the arguments of a `ResultCache`, if one is used, and
+    `budget` the `Budget` of every chase, if there is one.
+
+    The result and traces of each problem are written to `outputDir`.
+    If a worker process dies, the unfinished problems are run again in
+    a single worker pool, where the first one that does not finish is
+    the one that killed it. It is reported as failed and the rest go
+    back to a full pool.
+    """
+
+    Path(outputDir).mkdir(parents=True, exist_ok=True)
+    tasks = [(chase_type, problem, output, backend, trace, cache, budget)
+             for problem, output in zip(problems, outputPaths(problems, outputDir))]
+    results = [None] * len(tasks)
+    remaining = list(range(len(tasks)))
+    isolate = False
+    while remaining:
+        with ProcessPoolExecutor(1 if isolate else workers) as pool:
+            futures = [(i, pool.submit(chaseFile, tasks[i])) for i in remaining]
+            remaining = []
+            for i, future in futures:
+                try:
+                    results[i] = future.result()
+                except BrokenProcessPool:
+                    if isolate and not remaining:
+                        results[i] = {"input": str(tasks[i][1]), "output": str(tasks[i][2]),
+                                      "status": "error", "error": "worker process died",
+                                      "seconds": 0.0}
+                    else:
+                        remaining.append(i)
+        isolate = not isolate
+    return results
+
+
+def writeSummary(results, outputDir):
+    """Prints a status line for each problem and writes all statuses to
+    `summary.json` in `outputDir`."""
+
+    for result in results:
+        detail = result.get("answer", "") if result["status"] == "ok" else result["error"]
+        print(f'{result["status"]:5} {result["seconds"]:8.3f}s  {result["input"]}  {detail}')
+    failed = sum(1 for result in results if result["status"] != "ok")
+    total = sum(result["seconds"] for result in results)
+    print(f"{len(results) - failed} ok, {failed} failed, {total:.3f}s chasing")
+    with open(Path(outputDir) / SUMMARY_FILENAME, "w") as summary:
+        json.dump(results, summary, indent=2)
@@ -0,0 +1,110 @@
+import random
+import xml.etree.ElementTree as ET
+
+from classes.Query import Query
+from classes.Relation import Relation
+from classes.xml_io import problem_element
+from utils.common import (DEPENDENCY_PRESERVATION, FUNCTIONAL_DEPENDENCY, LOSSLESS_JOIN, MINIMAL_COVER,
+                          MULTIVALUED_DEPENDENCY)
+
+
+def attributeNames(n):
+    """Returns `n` attribute names: A0, A1, ..."""
+
+    return [f"A{i}" for i in range(n)]
+
+
+def randomDependencies(rnd, attributes, count, maxLhs=3, maxRhs=2):
+    """Returns `count` random dependencies over `attributes`, each with
+    1 to `maxLhs` lhs attributes and 1 to `maxRhs` rhs attributes."""
+
+    dependencies = []
+    for _ in range(count):
+        lhs = rnd.sample(attributes, rnd.randint(1, min(maxLhs, len(attributes))))
+        rhs = rnd.sample(attributes, rnd.randint(1, min(maxRhs, len(attributes))))
+        dependencies.append([lhs, rhs])
+    return dependencies
+
+
+def randomRelation(seed, n, fds, mvds=0):
+    """Returns a relation over `n` attributes with `fds` random
+    functional and `mvds` random multivalued dependencies. Multivalued
+    dependencies have a single lhs attribute and up to a third of the
+    attributes on the rhs, so that they fire often enough to grow the
+    table."""
+
+    rnd = random.Random(seed)
+    attributes = attributeNames(n)
+    relation = Relation("R", list(attributes))
+    for lhs, rhs in randomDependencies(rnd, attributes, fds):
+        relation.add_functional_dependency(lhs, rhs)
+    for lhs, rhs in randomDependencies(rnd, attributes, mvds, maxLhs=1, maxRhs=max(1, n // 3)):
+        relation.add_multivalued_dependency(lhs, rhs)
+    return relation
+
+
+def randomDecomposition(rnd, attributes, k, overlap=1):
+    """Returns `k` subschemas that cover `attributes`. Each subschema is
+    a consecutive slice of a shuffled attribute order, extended by
+    `overlap` attributes into the next slice."""
+
+    order = list(attributes)
+    rnd.shuffle(order)
+    size = max(1, len(order) // k)
+    subschemas = []
+    for i in range(k):
+        start = i * size
+        end = len(order) if i == k - 1 else start + size
+        subschemas.append(order[start:min(len(order), end + overlap)])
+    return subschemas
+
+
+def generateProblem(task, seed, n, fds, mvds=0, k=2, overlap=1):
+    """Returns a random (relation, query) problem of the given task over
+    `n` attributes. Lossless join and dependency preservation problems
+    decompose the relation into `k` subschemas that share `overlap` attributes with the next one,
+    minimal cover problems ask for a cover of the relation's
+    functional dependencies, and schema design problems ask nothing
+    more than their task."""
+
+    relation = randomRelation(seed, n, fds, mvds)
+    rnd = random.Random(seed + 1)
+    return relation, randomQuery(rnd, task, relation, k, overlap)
+
+
+def generateQueries(task, seed, n, fds, count, mvds=0, k=2, overlap=1):
+    """Returns a random relation and `count` random queries of the given
+    task about it, the first being the query of `generateProblem`."""
+
+    relation = randomRelation(seed, n, fds, mvds)
+    rnd = random.Random(seed + 1)
+    return relation, [randomQuery(rnd, task, relation, k, overlap) for _ in range(count)]
+
+
+def randomQuery(rnd, task, relation, k=2, overlap=1):
+    """Returns a random query of the given task about `relation`."""
+
+    attributes = relation.attributes
+    n = len(attributes)
+    query = Query(task)
+    if task == FUNCTIONAL_DEPENDENCY:
+        lhs, rhs = randomDependencies(rnd, attributes, 1)[0]
+        query.add_functional_dependency(lhs, rhs)
+    elif task == MULTIVALUED_DEPENDENCY:
+        lhs, rhs = randomDependencies(rnd, attributes, 1, maxLhs=max(1, n // 3))[0]
+        query.add_multivalued_dependency(lhs, rhs)
+    elif task in (LOSSLESS_JOIN, DEPENDENCY_PRESERVATION):
+        for i, subschema in enumerate(randomDecomposition(rnd, attributes, k, overlap)):
+            query.add_relation(Relation(f"R{i + 1}", subschema))
+    elif task == MINIMAL_COVER:
+        for lhs, rhs in relation.functional_dependencies:
+            query.add_functional_dependency(list(lhs), list(rhs))
+    return query
+
+
+def writeProblem(relation, query, filename):
+    """Writes a problem in the xml format read by `XMLIO.read_xml`. The
+    query may also be a list of queries."""
+
+    queries = query if isinstance(query, list) else [query]
+    ET.ElementTree(problem_element(relation, *queries)).write(filename)
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import sys
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+from server import DEFAULT_PORT
+
+
+async def request(reader, writer, path, body, contentType):
+    """Sends one request on an open connection and returns the status
+    and the decoded response."""
+
+    head = (f"POST {path} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Type: {contentType}\r\nContent-Length: {len(body)}\r\n\r\n")
+    writer.write(head.encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(args, problems, counter, latencies, failures):
+    """Sends requests on one connection until `args.requests` have been
+    sent by all clients together."""
+
+    if args.unix is not None:
+        reader, writer = await asyncio.open_unix_connection(args.unix)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    path = f"/chase?type={args.type}&trace={args.trace}&cache={0 if args.no_cache else 1}"
+    try:
+        while counter[0] < args.requests:
+            body, contentType = problems[counter[0] % len(problems)]
+            counter[0] += 1
+            start = time.perf_counter()
+            status, response = await request(reader, writer, path, body, contentType)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                failures.append(response.get("error", status))
+    finally:
+        writer.close()
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def loadTest(args):
+    problems = []
+    for filename in args.problems:
+        contentType = "application/json" if filename.endswith(".json") else "application/xml"
+        problems.append((Path(filename).read_bytes(), contentType))
+    counter = [0]
+    latencies = []
+    failures = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(args, problems, counter, latencies, failures)
+                           for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    report = {
+        "requests": len(latencies),
+        "failures": len(failures),
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+        "latency_ms": {name: percentile(latencies, fraction) * 1000
+                       for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))},
+    }
+    print(json.dumps(report, indent=2))
+    for failure in failures[:5]:
+        print(f"failed: {failure}")
+    return 1 if failures else 0
+
+
+def parse_arguments(argv):
+    """Set up the command line arguments and parse it."""
+
+    parser = ArgumentParser(description="Send many concurrent requests to a running chase server.")
+    parser.add_argument("problems", nargs="+", help="xml or json problem statements, sent in turn")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None, help="the unix socket of the server")
+    parser.add_argument("--type", default="distinguished", choices=["simple", "distinguished"])
+    parser.add_argument("--trace", default="none")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="chase every request instead of answering repeats from memory")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    return asyncio.run(loadTest(parse_arguments(argv)))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,290 @@
+import copy
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+
+from benchmarks.generate import generateProblem, generateQueries, writeProblem
+from classes.memory_io import MemoryIO
+from classes.xml_io import XMLIO
+from main import (checkDependencyPreservation, checkEntailment, checkMinimalCover, designSchema,
+                  simpleEntailment, simpleMinimalCover, solve)
+from utils.common import (BCNF_DECOMPOSITION, CANDIDATE_KEYS, DEPENDENCY_PRESERVATION, DISTINGUISHED,
+                          FACTORIZED_BACKEND, FUNCTIONAL_DEPENDENCY, LOSSLESS_JOIN, MINIMAL_COVER,
+                          MULTIVALUED_DEPENDENCY, PYTHON_BACKEND, SIMPLE, THIRD_NF_SYNTHESIS, TRACE_FULL,
+                          TRACE_NONE)
+
+XML_READ = "xml_read"
+# the tasks that take closures and no table, so the chase type makes no difference
+CLOSURE_TASKS = (DEPENDENCY_PRESERVATION, CANDIDATE_KEYS, BCNF_DECOMPOSITION, THIRD_NF_SYNTHESIS)
+
+SUITES = {
+    "quick": [
+        {"name": "fd_n50_f100", "task": FUNCTIONAL_DEPENDENCY, "n": 50, "fds": 100},
+        {"name": "mvd_n14_m8", "task": MULTIVALUED_DEPENDENCY, "n": 14, "fds": 0, "mvds": 8},
+        {"name": "lj_n12_m6_k6", "task": LOSSLESS_JOIN, "n": 12, "fds": 0, "mvds": 6, "k": 6,
+         "overlap": 4},
+        {"name": "lj_n40_f40_k2", "task": LOSSLESS_JOIN, "n": 40, "fds": 40, "k": 2},
+        {"name": "lj_n100_f150_k10", "task": LOSSLESS_JOIN, "n": 100, "fds": 150, "k": 10},
+        {"name": "mc_n60_f300", "task": MINIMAL_COVER, "n": 60, "fds": 300},
+        {"name": "dp_n200_f1000_k100", "task": DEPENDENCY_PRESERVATION, "n": 200, "fds": 1000, "k": 100,
+         "overlap": 3},
+        {"name": "ck_n40_f60", "task": CANDIDATE_KEYS, "n": 40, "fds": 60},
+        {"name": "bcnf_n100_f150", "task": BCNF_DECOMPOSITION, "n": 100, "fds": 150},
+        {"name": "3nf_n100_f150", "task": THIRD_NF_SYNTHESIS, "n": 100, "fds": 150},
+        {"name": "fd_n50_f100_q200", "task": FUNCTIONAL_DEPENDENCY, "n": 50, "fds": 100, "queries": 200},
+        {"name": "xml_n200_f20000", "task": XML_READ, "n": 200, "fds": 20000},
+    ],
+    "full": [
+        {"name": "fd_n100_f200", "task": FUNCTIONAL_DEPENDENCY, "n": 100, "fds": 200},
+        {"name": "fd_n300_f600", "task": FUNCTIONAL_DEPENDENCY, "n": 300, "fds": 600},
+        {"name": "mvd_n14_m8", "task": MULTIVALUED_DEPENDENCY, "n": 14, "fds": 0, "mvds": 8},
+        {"name": "mvd_n16_f4_m8", "task": MULTIVALUED_DEPENDENCY, "n": 16, "fds": 4, "mvds": 8},
+        {"name": "lj_n14_m6_k6", "task": LOSSLESS_JOIN, "n": 14, "fds": 0, "mvds": 6, "k": 6,
+         "overlap": 4},
+        {"name": "lj_n14_f2_m6_k8", "task": LOSSLESS_JOIN, "n": 14, "fds": 2, "mvds": 6, "k": 8,
+         "overlap": 5},
+        {"name": "lj_n100_f150_k2", "task": LOSSLESS_JOIN, "n": 100, "fds": 150, "k": 2},
+        {"name": "lj_n200_f300_k50", "task": LOSSLESS_JOIN, "n": 200, "fds": 300, "k": 50},
+        {"name": "lj_n400_f600_k100", "task": LOSSLESS_JOIN, "n": 400, "fds": 600, "k": 100},
+        {"name": "lj_n400_f600_k300", "task": LOSSLESS_JOIN, "n": 400, "fds": 600, "k": 300, "overlap": 2},
+        {"name": "mc_n120_f500", "task": MINIMAL_COVER, "n": 120, "fds": 500},
+        {"name": "mc_n120_f1000", "task": MINIMAL_COVER, "n": 120, "fds": 1000},
+        {"name": "dp_n400_f2000_k200", "task": DEPENDENCY_PRESERVATION, "n": 400, "fds": 2000, "k": 200,
+         "overlap": 3},
+        {"name": "ck_n100_f200", "task": CANDIDATE_KEYS, "n": 100, "fds": 200},
+        {"name": "bcnf_n200_f300", "task": BCNF_DECOMPOSITION, "n": 200, "fds": 300},
+        {"name": "3nf_n200_f300", "task": THIRD_NF_SYNTHESIS, "n": 200, "fds": 300},
+        {"name": "fd_n100_f200_q1000", "task": FUNCTIONAL_DEPENDENCY, "n": 100, "fds": 200, "queries": 1000},
+        {"name": "mvd_n14_m8_q50", "task": MULTIVALUED_DEPENDENCY, "n": 14, "fds": 0, "mvds": 8,
+         "queries": 50},
+        {"name": "xml_n200_f100000", "task": XML_READ, "n": 200, "fds": 100000},
+    ],
+}
+
+
+class Recorder:
+    """
+    A stand-in for `XMLIO` that counts the steps of a chase and the size
+    of its table instead of writing them. It traces every step unless
+    `trace_level` says otherwise, so the chase runs step by step.
+    """
+
+    def __init__(self, trace_level=TRACE_FULL):
+        self.trace_level = trace_level
+        self.steps = 0
+        self.rows = 0
+        self.columns = 0
+
+    def write_intermediate_result(self, schema, table, step_number):
+        self.steps += 1
+        self.rows = max(self.rows, len(table))
+        self.columns = len(schema)
+
+    def write_min_cov(self, fds, step_number):
+        self.steps += 1
+
+    def write_schemas(self, schemas, step_number):
+        self.steps += 1
+
+    def write_cover(self, fds):
+        pass
+
+    def write_design(self, task, schemas):
+        pass
+
+    def write_result(self, schema, table, answer, lost=None, limit=None):
+        self.rows = max(self.rows, len(table))
+        self.columns = len(schema)
+
+    def close(self):
+        pass
+
+
+def solveOnce(scenario, chase_type, problem, trace_level=TRACE_FULL, backend=PYTHON_BACKEND):
+    """Solves a copy of `problem` with the table `backend` and returns
+    the answer and the `Recorder` of the run."""
+
+    relation, query = copy.deepcopy(problem)
+    recorder = Recorder(trace_level)
+    if scenario["task"] == MINIMAL_COVER:
+        solver = checkMinimalCover if chase_type == DISTINGUISHED else simpleMinimalCover
+        cover = solver(relation, query, recorder)
+        return len(cover or []), recorder
+    if scenario["task"] == DEPENDENCY_PRESERVATION:
+        return checkDependencyPreservation(relation, query, recorder), recorder
+    if scenario["task"] in CLOSURE_TASKS:
+        return len(designSchema(relation, query, recorder)), recorder
+    solver = checkEntailment if chase_type == DISTINGUISHED else simpleEntailment
+    return solver(relation, query, recorder, backend), recorder
+
+
+def solveQueriesOnce(chase_type, problem, separately=False):
+    """Solves a copy of every query of `problem`, together in a single
+    document or `separately` as one problem each, and returns the
+    number of queries that hold."""
+
+    relation, queries = copy.deepcopy(problem)
+    if separately:
+        answers = [solve(chase_type, MemoryIO(relation, query)) for query in queries]
+    else:
+        answers = solve(chase_type, MemoryIO(relation, queries[0], queries=queries))
+    return sum(answer is True for answer in answers), None
+
+
+def readOnce(filename):
+    """Reads the problem in `filename` and returns the number of
+    dependencies read."""
+
+    relation, _ = XMLIO(filename, None).read_xml()
+    return len(relation.functional_dependencies), None
+
+
+def measure(run, repeat):
+    """Returns the result of `run()`, the best wall time of `repeat`
+    runs and the peak traced memory of one more run."""
+
+    seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def runScenario(scenario, seed, repeat):
+    """Returns one measurement per chase type for a scenario."""
+
+    if "queries" in scenario:
+        problem = generateQueries(scenario["task"], scenario.get("seed", 0) + seed, scenario["n"],
+                                  scenario["fds"], scenario["queries"], scenario.get("mvds", 0),
+                                  scenario.get("k", 2), scenario.get("overlap", 1))
+        runs = [(DISTINGUISHED, lambda: solveQueriesOnce(DISTINGUISHED, problem)),
+                ("separately", lambda: solveQueriesOnce(DISTINGUISHED, problem, True)),
+                (SIMPLE, lambda: solveQueriesOnce(SIMPLE, problem))]
+        return [measurement(scenario, path, run, repeat) for path, run in runs]
+    problem = generateProblem(scenario["task"] if scenario["task"] != XML_READ else FUNCTIONAL_DEPENDENCY,
+                              scenario.get("seed", 0) + seed, scenario["n"], scenario["fds"],
+                              scenario.get("mvds", 0), scenario.get("k", 2), scenario.get("overlap", 1))
+    if scenario["task"] == XML_READ:
+        with tempfile.TemporaryDirectory() as directory:
+            filename = str(Path(directory) / "problem.xml")
+            writeProblem(*problem, filename)
+            runs = [("read", lambda: readOnce(filename))]
+            return [measurement(scenario, path, run, repeat) for path, run in runs]
+    if scenario["task"] in CLOSURE_TASKS:
+        # no table is chased, so the chase type makes no difference
+        runs = [("closure", lambda: solveOnce(scenario, DISTINGUISHED, problem))]
+        return [measurement(scenario, path, run, repeat) for path, run in runs]
+    runs = [(chase_type, lambda chase_type=chase_type: solveOnce(scenario, chase_type, problem))
+            for chase_type in (DISTINGUISHED, SIMPLE)]
+    if scenario["task"] in (FUNCTIONAL_DEPENDENCY, LOSSLESS_JOIN) and not scenario.get("mvds"):
+        # without a trace, fd-only problems skip the step by step chase
+        runs.append(("untraced", lambda: solveOnce(scenario, DISTINGUISHED, problem, TRACE_NONE)))
+    if scenario.get("mvds") and not scenario["fds"]:
+        # without functional dependencies the rows can be kept factorized
+        runs.append((FACTORIZED_BACKEND, lambda: solveOnce(scenario, DISTINGUISHED, problem,
+                                                           backend=FACTORIZED_BACKEND)))
+    return [measurement(scenario, path, run, repeat) for path, run in runs]
+
+
+def measurement(scenario, path, run, repeat):
+    """Measures `run` and returns the result record."""
+
+    record = {"name": scenario["name"], "path": path}
+    try:
+        (answer, recorder), seconds, peak = measure(run, repeat)
+    except Exception as error:
+        record["error"] = f"{type(error).__name__}: {error}"
+        return record
+    record.update({"seconds": seconds, "peak_bytes": peak, "answer": answer})
+    if recorder is not None:
+        record.update({"steps": recorder.steps, "rows": recorder.rows, "columns": recorder.columns})
+    return record
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Returns a list of regressions of `results` against `baseline`:
+    runs that got slower by more than `threshold` times (and more than
+    `min_delta` seconds), and runs whose answer, steps or table size
+    changed or that started failing."""
+
+    previous = {(record["name"], record["path"]): record for record in baseline["results"]}
+    regressions = []
+    for record in results:
+        old = previous.get((record["name"], record["path"]))
+        if old is None:
+            continue
+        label = f'{record["name"]} ({record["path"]})'
+        if "error" in record and "error" not in old:
+            regressions.append(f'{label}: now fails with {record["error"]}')
+            continue
+        if "error" in record or "error" in old:
+            continue
+        if record["seconds"] > old["seconds"] * threshold and record["seconds"] - old["seconds"] > min_delta:
+            regressions.append(f'{label}: {old["seconds"]:.4f}s -> {record["seconds"]:.4f}s')
+        for key in ("answer", "steps", "rows"):
+            if key in old and record.get(key) != old[key]:
+                regressions.append(f'{label}: {key} changed from {old[key]} to {record.get(key)}')
+    return regressions
+
+
+def parse_arguments(argv):
+    """Set up the command line arguments and parse it."""
+
+    parser = ArgumentParser(description="Measure how the chase scales on generated problems.")
+    parser.add_argument("--suite", default="quick", choices=sorted(SUITES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="the number of timed runs per scenario")
+    parser.add_argument("--output", default=None, help="a json file to write the results to")
+    parser.add_argument("--baseline", default=None, help="a json file of earlier results to compare with")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="how many times slower than the baseline counts as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.01,
+                        help="slowdowns of fewer seconds than this are ignored")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    results = []
+    for scenario in SUITES[args.suite]:
+        for record in runScenario(scenario, args.seed, args.repeat):
+            results.append(record)
+            if "error" in record:
+                print(f'{record["name"]:24} {record["path"]:14} error: {record["error"]}')
+            else:
+                print(f'{record["name"]:24} {record["path"]:14} {record["seconds"]:9.4f}s '
+                      f'{record["peak_bytes"] / 1e6:9.2f}MB  steps={record.get("steps", "-")} '
+                      f'rows={record.get("rows", "-")}')
+    report = {
+        "suite": args.suite,
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
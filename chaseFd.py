@@ -1,84 +1,108 @@
+from collections import deque
 from typing import Dict
 
+from classes.UnionFind import UnionFind
 from utils.common import ALPHA
+from utils.profiler import PROFILER
 
 # assume that ALL FDs are sorted in the order of schema
 
 
 def chaseFds(table: list[list[str]], fds: list[list[list[str]]], schema: Dict[str, int]):
-    for fd in fds:
-        hasUpdated = False
-        leftPos = list(map(lambda x: schema[x], fd[0]))
-        rightPos = list(map(lambda x: schema[x], fd[1]))
-        leftToRight, counts = getLeftToRight(
-            leftPos, rightPos, table)
-        for i, row in enumerate(table):
-            left = combineList(list(map(lambda x: row[x], leftPos)))
-            right = list(map(lambda x: row[x], rightPos))
-            mostCommonRight = getMostCommonRight(leftToRight[left], counts)
-            if mostCommonRight != right:
-                hasUpdated = True
-                table[i] = updateRow(row, rightPos, mostCommonRight)
-        if hasUpdated:
-            return table, True
-    return table, False
-
-
-def getMostCommonRight(rights: Dict[str, int], counts: Dict[str, int]):
-    maxCount = 0
-    maxRight = ''
-    for count in counts:
-        if counts[count] > maxCount and count in rights:
-            maxCount = counts[count]
-            maxRight = count
-    return breakUpCombine(maxRight)
-
-
-def getLeftToRight(leftPos: list[int], rightPos: list[int], table: list[list[str]]):
-    result: Dict[str, Dict[str, int]] = {}
-    counts: Dict[str, int] = {}
-    for row in table:
-        left = combineList(list(map(lambda x: row[x], leftPos)))
-        right = list(map(lambda x: row[x], rightPos))
-        combine_right = combineList(right)
-
-        if isDistinguished(right):
-            result[left] = {combine_right: 9999}
-            counts[combine_right] = 9999
-        else:
-            if combine_right in counts:
-                counts[combine_right] += 1
-            else:
-                counts[combine_right] = 1
-            if left in result:
-                if combine_right in result[left]:
-                    result[left][combine_right] += 1
-                else:
-                    result[left][combine_right] = 1
-            else:
-                result[left] = {combine_right: 1}
-    return result, counts
-
-
-def combineList(lst: list[str]):
-    return ','.join(lst)
-
-
-def breakUpCombine(combine: str):
-    return combine.split(',')
-
-
-def isDistinguished(right: list[str]):
-    for r in right:
-        if r != ALPHA:
-            return False
-    return True
-
-
-def updateRow(row: list[str], rightPos: list[int], rightValues: list[str]):
-    for i, pos in enumerate(rightPos):
-        row[pos] = rightValues[i]
-    return row
+    """Equates the symbols of `table` until every functional dependency
+    in `fds` holds.
+
+    Returns
+    -------
+    tuple[list[list[str]], bool]
+        The updated table and whether any cell has changed.
+    """
+
+    fdsPos = [(list(map(lambda x: schema[x], fd[0])),
+               list(map(lambda x: schema[x], fd[1]))) for fd in fds]
+    changedColumns = equateFds(table, fdsPos, range(len(fdsPos)), indexByLhs(fdsPos))
+    return table, len(changedColumns) > 0
+
+
+def indexByLhs(depsPos: list[tuple[list[int], list[int]]]):
+    """Returns a mapping of each column to the indexes of the
+    dependencies whose lhs contains it."""
+
+    index: Dict[int, list[int]] = {}
+    for i, (leftPos, _) in enumerate(depsPos):
+        for pos in leftPos:
+            index.setdefault(pos, []).append(i)
+    return index
+
+
+def equateFds(table: list[list[str]], fdsPos: list[tuple[list[int], list[int]]], pending, fdsByColumn: Dict[int, list[int]], goal=None):
+    """Applies the functional dependencies at the indexes in `pending`,
+    and any dependency they re-trigger, until every one of them holds.
+
+    Each column keeps a `UnionFind` of its symbols, and applying a
+    dependency hashes the rows on the representatives of its lhs
+    columns, so the rows of a bucket only need to be unioned with the
+    first row of the bucket. Merging symbols in a column re-queues the
+    dependencies whose lhs contains that column. Once the worklist is
+    empty, the cells of the changed columns are rewritten to their
+    representatives. The distinguished symbol always wins a merge.
+
+    With a `Goal`, every merge is reported to it, and the worklist stops
+    as soon as the goal is reached.
+
+    Returns
+    -------
+    set[int]
+        The columns in which at least one cell has changed.
+    """
+
+    profiling = PROFILER.enabled
+    forests: Dict[int, UnionFind] = {}
+    queue = deque(pending)
+    queued = set(queue)
+    changedColumns: set[int] = set()
+    while queue and not (goal is not None and goal.reached):
+        i = queue.popleft()
+        queued.discard(i)
+        leftPos, rightPos = fdsPos[i]
+        leftFinds = [(pos, forests[pos].find if pos in forests else None) for pos in leftPos]
+        buckets: Dict[tuple, list[str]] = {}
+        merged = set()
+        merges = 0
+        for row in table:
+            left = tuple(row[pos] if find is None else find(row[pos]) for pos, find in leftFinds)
+            first = buckets.setdefault(left, row)
+            if first is row:
+                continue
+            for pos in rightPos:
+                forest = forests.get(pos)
+                if forest is None:
+                    forest = forests[pos] = UnionFind(ALPHA, goal and goal.listener(pos))
+                if forest.union(first[pos], row[pos]):
+                    merged.add(pos)
+                    merges += 1
+            if goal is not None and goal.reached:
+                break
+        if profiling:
+            PROFILER.count("fd", i, fired=1, rows_scanned=len(table), merges=merges)
+        for pos in merged:
+            for j in fdsByColumn.get(pos, []):
+                if j not in queued:
+                    queue.append(j)
+                    queued.add(j)
+        changedColumns |= merged
+
+    cellsChanged = 0
+    for pos in changedColumns:
+        find = forests[pos].find
+        for row in table:
+            symbol = find(row[pos])
+            if profiling and symbol != row[pos]:
+                cellsChanged += 1
+            row[pos] = symbol
+    if profiling and PROFILER.current is not None:
+        PROFILER.current["cells_changed"] += cellsChanged
+    return changedColumns
 
 
 def main():
@@ -1,13 +1,20 @@
 from typing import Dict
 
+from classes.RowStore import RowStore
+from utils.profiler import PROFILER
+
+# the number of pairs joined between two checks of a budget
+BUDGET_INTERVAL = 4096
+
 def chaseMvds(table: list[list[str]], mvds: list[list[list[str]]], schema: Dict[str, int]):
     isUpdated = False
     mvds = mapToIndex(mvds, schema)
-    for mvd in mvds:
+    for i, mvd in enumerate(mvds):
         lhs_col = mvd[0] 
         rhs_col = mvd[1]
         lhs_to_rhs = {}
         generated = [] # list of rows generated
+        rows = RowStore(table) # rows of table and generated, for lookups
 
         for row in table:
             lhs = tuple(row[i] for i in lhs_col)
@@ -29,9 +36,11 @@ def chaseMvds(table: list[list[str]], mvds: list[list[list[str]]], schema: Dict[
                         new_row[rhs_col[idx]] = attr
                         idx += 1
 
-                    if (new_row not in generated) and (new_row not in table) :
+                    if rows.add(new_row):
                         generated.append(new_row)
         
+        if PROFILER.enabled:
+            PROFILER.count("mvd", i, fired=1, rows_scanned=2 * len(table), rows_generated=len(generated))
         if generated: 
             isUpdated = True
             table += generated
@@ -39,6 +48,62 @@ def chaseMvds(table: list[list[str]], mvds: list[list[list[str]]], schema: Dict[
 
     return (table, isUpdated)
 
+def groupRows(groups: dict, rows: list[list[str]], lhs_col: list[int], rhs_col: list[int], rest_col: list[int]):
+    """Adds the rhs and rest projections of `rows` to `groups`, a mapping
+    of each lhs projection to the sets of rhs and rest projections of
+    the rows that have it."""
+
+    for row in rows:
+        lhs = tuple(row[i] for i in lhs_col)
+        if lhs not in groups:
+            groups[lhs] = (set(), set())
+        group = groups[lhs]
+        group[0].add(tuple(row[i] for i in rhs_col))
+        group[1].add(tuple(row[i] for i in rest_col))
+    return groups
+
+
+def joinDelta(groups: dict, delta: dict, mvd: list[list[int]], rest_col: list[int], width: int, rows: RowStore,
+              budget=None):
+    """Returns the rows required by a multivalued dependency from the
+    pairs of rows in which at least one row is new.
+
+    `groups` holds the projections of every row of the table and
+    `delta` those of the new rows only, both as built by `groupRows`.
+    Within a group, every new rhs projection is combined with every rest
+    projection and every rhs projection with every new rest projection.
+    Rows that are already in `rows` are skipped, the others are added
+    to it.
+
+    With a `Budget`, it is checked before a group once `BUDGET_INTERVAL`
+    pairs have been joined since the last check, and the rows generated
+    so far are returned as soon as a limit is hit.
+    """
+
+    lhs_col, rhs_col = mvd
+    generated = []
+    unchecked = 0
+    for lhs, (delta_rhs, delta_rest) in delta.items():
+        if budget is not None and unchecked >= BUDGET_INTERVAL:
+            unchecked = 0
+            if budget.exceeded(rows=len(rows)) is not None:
+                break
+        all_rhs, all_rest = groups[lhs]
+        pairs = [(rhs, rest) for rhs in delta_rhs for rest in all_rest]
+        pairs += [(rhs, rest) for rhs in all_rhs for rest in delta_rest]
+        unchecked += len(pairs)
+        for rhs, rest in pairs:
+            new_row = [None] * width
+            for i, attr in zip(lhs_col, lhs):
+                new_row[i] = attr
+            for i, attr in zip(rhs_col, rhs):
+                new_row[i] = attr
+            for i, attr in zip(rest_col, rest):
+                new_row[i] = attr
+            if rows.add(new_row):
+                generated.append(new_row)
+    return generated
+
 def mapToIndex(mvds: list[list[list[str]]], attr_col: dict):
     mvds_idx = []
     for mvd in mvds: 
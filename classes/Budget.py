@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # resource is only there on unix
+    resource = None
+
+from utils.common import LIMIT_STEPS, LIMIT_ROWS, LIMIT_TIME, LIMIT_MEMORY
+
+
+def residentMemory():
+    """Returns the memory the process holds, in bytes, or its peak if the
+    current one cannot be read, or 0 if neither can."""
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # the peak is in bytes on macos and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Budget():
+    """
+    Limits on the steps, rows, time and memory a chase may use, so that
+    a chase that blows up stops with a partial result instead of running
+    until it is killed.
+
+    A chase checks its budget between steps, and a multivalued
+    dependency that generates many rows in one step checks it as it
+    joins them. Once a limit is hit it stays hit, so every later check
+    stops too. The clock starts again with every chase.
+
+    Attributes
+    ----------
+    max_steps : int | None
+        The number of steps a chase may take.
+    max_rows : int | None
+        The number of rows the table may have.
+    max_seconds : float | None
+        The wall-clock time a chase may take.
+    max_memory : int | None
+        The memory, in bytes, the process may hold.
+    started : float
+        When the current chase started, by `time.monotonic`.
+    hit : str | None
+        The limit that was hit, or None.
+
+    Methods
+    -------
+    start()
+        Starts the clock of a new chase.
+    exceeded(steps, rows)
+        Returns the limit that is hit, if any.
+    """
+
+    def __init__(self, max_steps=None, max_rows=None, max_seconds=None, max_memory=None):
+        """
+        Parameters
+        ----------
+        max_steps, max_rows, max_seconds, max_memory : optional
+            The limits, or None for no limit (default is None).
+        """
+
+        self.max_steps = max_steps
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.max_memory = max_memory
+        self.start()
+
+    def start(self):
+        """Starts the clock of a new chase, with no limit hit."""
+
+        self.started = time.monotonic()
+        self.hit = None
+
+    def exceeded(self, steps=0, rows=0):
+        """Returns the limit that a chase which has taken `steps` steps
+        and has `rows` rows has hit: `steps`, `rows`, `time` or
+        `memory`, or None if it has hit none."""
+
+        if self.hit is None:
+            if self.max_steps is not None and steps >= self.max_steps:
+                self.hit = LIMIT_STEPS
+            elif self.max_rows is not None and rows > self.max_rows:
+                self.hit = LIMIT_ROWS
+            elif self.max_seconds is not None and time.monotonic() - self.started > self.max_seconds:
+                self.hit = LIMIT_TIME
+            elif self.max_memory is not None and residentMemory() > self.max_memory:
+                self.hit = LIMIT_MEMORY
+        return self.hit
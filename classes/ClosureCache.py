@@ -0,0 +1,100 @@
+from classes.CompiledSchema import CompiledSchema, bitPositions
+from closure import maskClosure
+
+
+class ClosureCache():
+    """
+    A memo of attribute closures under subsets of a growing list of
+    functional dependencies.
+
+    A dependency is never changed once it is in the list, so a closure
+    is identified by the bitmask of its attributes and a bitmask of the
+    active dependencies, and stays valid for as long as the cache lives.
+    Closures are taken on the bitmasks of a `CompiledSchema`.
+
+    Attributes
+    ----------
+    compiled : CompiledSchema
+        The bit positions of the attributes.
+    fds : list[list[list[str]]]
+        The functional dependencies, indexed by bit position.
+    masks : list[tuple[int, int]]
+        The functional dependencies as (lhs, rhs) bitmasks.
+    index : dict[int, list[int]]
+        A mapping of each attribute bit to the dependencies whose lhs
+        contains it.
+    sizes : list[int]
+        The number of attributes in the lhs of every dependency.
+    closures : dict[tuple[int | None, int], int]
+        The closures computed so far.
+    hits : int
+        The number of closures answered from the memo.
+
+    Methods
+    -------
+    add(lhs, rhs)
+        Adds a functional dependency and returns its bit position.
+    closure(attributes, active)
+        Returns the closure of the attributes under the active
+        dependencies.
+    maskClosure(mask, active)
+        Returns the closure of a bitmask of attributes under the active
+        dependencies, as a bitmask.
+    """
+
+    def __init__(self, fds=None, compiled=None):
+        """
+        Parameters
+        ----------
+        fds : list[list[list[str]]], optional
+            The functional dependencies to start with.
+        compiled : CompiledSchema, optional
+            The bit positions of the attributes, compiled from the
+            attributes of `fds` if not given. Every dependency added
+            later has to be over these attributes.
+        """
+
+        fds = fds or []
+        if compiled is None:
+            compiled = CompiledSchema(attr for lhs, rhs in fds for attr in lhs + rhs)
+        self.compiled = compiled
+        self.fds = []
+        self.masks = []
+        self.index = {}
+        self.sizes = []
+        self.closures = {}
+        self.hits = 0
+        for lhs, rhs in fds:
+            self.add(lhs, rhs)
+
+    def add(self, lhs, rhs):
+        """Adds the functional dependency lhs -> rhs and returns its bit
+        position."""
+
+        position = len(self.fds)
+        self.fds.append([lhs, rhs])
+        left = self.compiled.mask(lhs)
+        self.masks.append((left, self.compiled.mask(rhs)))
+        self.sizes.append(left.bit_count())
+        for pos in bitPositions(left):
+            self.index.setdefault(pos, []).append(position)
+        return position
+
+    def maskClosure(self, mask, active=None):
+        """Returns the closure of the bitmask `mask` under the
+        dependencies in the bitmask `active`, or under all of them if it
+        is None, as a bitmask."""
+
+        key = (active, mask)
+        closure = self.closures.get(key)
+        if closure is None:
+            closure = self.closures[key] = maskClosure(mask, self.masks, self.index, active=active, sizes=self.sizes)
+        else:
+            self.hits += 1
+        return closure
+
+    def closure(self, attributes, active=None):
+        """Returns the closure of `attributes` under the dependencies in
+        the bitmask `active`, or under all of them if it is None."""
+
+        return frozenset(self.compiled.names(self.maskClosure(self.compiled.mask(attributes), active)))
@@ -0,0 +1,89 @@
+def bitPositions(mask: int):
+    """Yields the positions of the bits set in `mask`, lowest first."""
+
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class CompiledSchema():
+    """
+    The attributes of a relation as bit positions, so that a set of
+    attributes is an int bitmask.
+
+    Attribute i in sorted order is bit i, which is also column i of the
+    chase table, so a bitmask tells the columns of its attributes too.
+    Subset tests, unions, differences and hashing of sets of attributes
+    are then single integer operations, whatever the width of the
+    relation.
+
+    Attributes
+    ----------
+    attributes : list[str]
+        The attributes in sorted order, the name of every bit.
+    positions : dict[str, int]
+        A mapping of every attribute to its bit position, the same as
+        the schema of the chase table.
+    full : int
+        The bitmask of all the attributes.
+
+    Methods
+    -------
+    mask(attributes)
+        Returns the bitmask of the attributes.
+    names(mask)
+        Returns the attributes of a bitmask in sorted order.
+    columns(mask)
+        Returns the positions of the bits of a bitmask in order.
+    compile(dependencies)
+        Returns the dependencies as (lhs, rhs) bitmasks.
+    decompile(dependencies)
+        Returns dependencies given as bitmasks as lists of attributes.
+    """
+
+    def __init__(self, attributes):
+        """
+        Parameters
+        ----------
+        attributes : Iterable[str]
+            The attributes of the relation, in any order.
+        """
+
+        self.attributes = sorted(set(attributes))
+        self.positions = {attr: pos for pos, attr in enumerate(self.attributes)}
+        self.full = (1 << len(self.attributes)) - 1
+
+    def mask(self, attributes):
+        """Returns the bitmask of `attributes`."""
+
+        positions = self.positions
+        mask = 0
+        for attr in attributes:
+            mask |= 1 << positions[attr]
+        return mask
+
+    def names(self, mask: int):
+        """Returns the attributes in `mask` in sorted order."""
+
+        attributes = self.attributes
+        return [attributes[pos] for pos in bitPositions(mask)]
+
+    def columns(self, mask: int):
+        """Returns the positions of the bits of `mask` in increasing
+        order, the columns of its attributes in the chase table."""
+
+        return list(bitPositions(mask))
+
+    def compile(self, dependencies: list[list[list[str]]]):
+        """Returns `dependencies` as a list of (lhs, rhs) bitmasks."""
+
+        mask = self.mask
+        return [(mask(lhs), mask(rhs)) for lhs, rhs in dependencies]
+
+    def decompile(self, dependencies: list[tuple[int, int]]):
+        """Returns dependencies given as (lhs, rhs) bitmasks as lists of
+        sorted attributes."""
+
+        names = self.names
+        return [[names(lhs), names(rhs)] for lhs, rhs in dependencies]
@@ -0,0 +1,283 @@
+from operator import itemgetter
+
+from chaseMvd import mapToIndex
+from utils.common import ALPHA, FUNCTIONAL_DEPENDENCY, LOSSLESS_JOIN, MULTIVALUED_DEPENDENCY
+from utils.profiler import PROFILER
+
+
+def getter(indexes):
+    """Returns a function that projects a tuple on `indexes`."""
+
+    if len(indexes) == 0:
+        return lambda row: ()
+    if len(indexes) == 1:
+        index = indexes[0]
+        return lambda row: (row[index],)
+    return itemgetter(*indexes)
+
+
+def assembler(order, sizes):
+    """Returns a function that builds a tuple from 3 pieces of the sizes
+    in `sizes`, where `order` lists the piece and the index within it
+    of every value of the tuple."""
+
+    offsets = [0, sizes[0], sizes[0] + sizes[1]]
+    indexes = [offsets[piece] + index for piece, index in order]
+    if indexes == list(range(sum(sizes))):
+        return lambda first, second, third: first + second + third
+    project = getter(indexes)
+    return lambda first, second, third: project(first + second + third)
+
+
+def projections(rows, keyIndexes, firstIndexes, secondIndexes):
+    """Returns a mapping of the projection of each of `rows` on
+    `keyIndexes` to the sets, as dicts, of their projections on
+    `firstIndexes` and on `secondIndexes`."""
+
+    key = getter(keyIndexes)
+    first = getter(firstIndexes)
+    second = getter(secondIndexes)
+    groups = {}
+    for row in rows:
+        group = groups.get(key(row))
+        if group is None:
+            group = groups[key(row)] = ({}, {})
+        group[0][first(row)] = None
+        group[1][second(row)] = None
+    return groups
+
+
+class FactorizedTableau():
+    """
+    A chase table of a relation with multivalued dependencies only,
+    kept as the product that the last multivalued dependency applied
+    made of it instead of as a list of rows.
+
+    Without functional dependencies no symbol is ever renamed, and
+    applying a multivalued dependency lhs ->> rhs to a table as a whole
+    gives, for every lhs projection, every rhs projection of its group
+    combined with every projection of the group on the other columns.
+    So the table is a set of groups, each an lhs projection with the
+    sets of rhs and rest projections that make up its rows, and takes
+    the sum of the sizes of the sets where the rows take their product.
+
+    Applying the next dependency regroups the table by its lhs: the
+    rows of a group whose parts of the new lhs agree are still a
+    product, so their projections on the new rhs and rest are products
+    of the projections of the parts, and rows are never expanded. Rows
+    are only added, so a dependency adds rows exactly when it makes the
+    table bigger, and the number of rows is the sum of the products of
+    the sizes of the sets.
+
+    A step applies the first dependency, in order, that adds rows, like
+    a step of the `Scheduler`, so the table has the same rows after
+    every step, though in another order when it is expanded. The goals
+    are checked on the groups, and the rows are only expanded when the
+    table is written. Like every row generated, a row of the initial
+    table is only kept once.
+
+    Attributes
+    ----------
+    width : int
+        The number of columns of the table.
+    lhs, rhs, rest : list[int]
+        The columns of the lhs, rhs and rest projections of the groups.
+    groups : dict[tuple[str, ...], tuple[dict, dict]]
+        A mapping of every lhs projection to the sets, as dicts, of rhs
+        and rest projections of its rows.
+    size : int
+        The number of rows of the table.
+    held : dict[int, int]
+        For each multivalued dependency, the number of rows of the table
+        when it last added none.
+    initial : list[list[str]]
+        The rows the table started with.
+
+    Methods
+    -------
+    to_table()
+        Returns the table as a list of rows of symbols.
+    regroup(lhs, rhs)
+        Returns the groups of the table by the lhs, and its size.
+    step(relation, schema)
+        Applies one step of the chase to the table.
+    satisfies(query, schema)
+        Returns whether the distinguished chase has reached its goal.
+    satisfies_simple(query, schema)
+        Returns whether the simple chase has reached its goal.
+    """
+
+    def __init__(self, table):
+        """
+        Parameters
+        ----------
+        table : list[list[str]]
+            A 2d array representing the chase table.
+        """
+
+        self.width = len(table[0]) if table else 0
+        self.initial = [list(row) for row in table]
+        # the table starts as a single group with an empty lhs
+        self.lhs = []
+        self.rhs = list(range(self.width))
+        self.rest = []
+        self.groups = {(): ({tuple(row): None for row in table}, {(): None})} if table else {}
+        self.size = len(self.groups[()][0]) if table else 0
+        self.held = {}
+
+    def to_table(self):
+        """Returns the table as a list of rows of symbols."""
+
+        return list(self)
+
+    def __iter__(self):
+        build = assembler(self.order(range(self.width)), [len(self.lhs), len(self.rhs), len(self.rest)])
+        for key, (rhs, rest) in self.groups.items():
+            for first in rhs:
+                for second in rest:
+                    yield list(build(key, first, second))
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, row):
+        group = self.groups.get(tuple(row[pos] for pos in self.lhs))
+        return (group is not None and tuple(row[pos] for pos in self.rhs) in group[0]
+                and tuple(row[pos] for pos in self.rest) in group[1])
+
+    def order(self, columns):
+        """Returns, for every column of `columns`, the part of a group it
+        is in (0 for the lhs, 1 for the rhs and 2 for the rest) and its
+        index in the projections of that part, in order."""
+
+        where = {}
+        for part, partColumns in enumerate((self.lhs, self.rhs, self.rest)):
+            for index, pos in enumerate(partColumns):
+                where[pos] = (part, index)
+        return [where[pos] for pos in columns]
+
+    def regroup(self, lhs, rhs):
+        """Returns the groups of the table by the columns `lhs`, with
+        the projections of their rows on the columns `rhs`, which have
+        none of `lhs`, and on the other columns, and the number of rows
+        that taking their products would give.
+
+        Every group is split by the values of its lhs and rest
+        projections on the new lhs columns, and the rows of every pair
+        of parts are the product of their projections.
+        """
+
+        rest = [pos for pos in range(self.width) if pos not in lhs and pos not in rhs]
+        orders = [self.order(columns) for columns in (lhs, rhs, rest)]
+        # the indexes of the new lhs, rhs and rest columns in each part
+        indexes = [[[index for part, index in order if part == wanted] for order in orders]
+                   for wanted in range(3)]
+        # a new projection is built from the pieces of its columns in
+        # each part, which hold them in the order of the new columns
+        builders = []
+        for order in orders:
+            taken = [0, 0, 0]
+            pieceOrder = []
+            for part, _ in order:
+                pieceOrder.append((part, taken[part]))
+                taken[part] += 1
+            builders.append(assembler(pieceOrder, taken))
+        buildRhs, buildRest = builders[1], builders[2]
+        keyGetters = [getter(partIndexes) for partIndexes in indexes[0]]
+        groups = {}
+        for key, (oldRhs, oldRest) in self.groups.items():
+            keyParts = [get(key) for get in keyGetters]
+            rhsParts = projections(oldRhs, *indexes[1])
+            restParts = projections(oldRest, *indexes[2])
+            for rhsKey, (rhsOfRhs, restOfRhs) in rhsParts.items():
+                for restKey, (rhsOfRest, restOfRest) in restParts.items():
+                    newKey = builders[0](keyParts[0], rhsKey, restKey)
+                    if newKey not in groups:
+                        groups[newKey] = ({}, {})
+                    newRhs, newRest = groups[newKey]
+                    for first in rhsOfRhs:
+                        for second in rhsOfRest:
+                            newRhs[buildRhs(keyParts[1], first, second)] = None
+                    for first in restOfRhs:
+                        for second in restOfRest:
+                            newRest[buildRest(keyParts[2], first, second)] = None
+        size = sum(len(newRhs) * len(newRest) for newRhs, newRest in groups.values())
+        return (lhs, rhs, rest, groups), size
+
+    def step(self, relation, schema):
+        """Applies one step of the chase: the first multivalued
+        dependency, in order, that adds rows to the table. The relation
+        must have no functional dependencies.
+
+        Returns
+        -------
+        tuple[FactorizedTableau, bool]
+            This table and whether it has changed.
+        """
+
+        for i, (lhs, rhs) in enumerate(mapToIndex(relation.multivalued_dependencies, schema)):
+            if self.held.get(i) == self.size:
+                continue
+            lhs = sorted(set(lhs))
+            rhs = sorted(set(rhs).difference(lhs))
+            regrouped, size = self.regroup(lhs, rhs)
+            if PROFILER.enabled:
+                PROFILER.count("mvd", i, fired=1, rows_scanned=self.size, rows_generated=size - self.size)
+            if size == self.size:
+                self.held[i] = size
+                continue
+            self.lhs, self.rhs, self.rest, self.groups = regrouped
+            self.size = size
+            self.held[i] = size
+            return (self, True)
+        return (self, False)
+
+    def satisfies(self, query, schema):
+        """Returns whether the distinguished chase has reached the goal
+        of `query`: every row distinguished on the rhs of a functional
+        dependency, or else a row distinguished everywhere."""
+
+        if query.task == FUNCTIONAL_DEPENDENCY:
+            columns = {schema[attr] for attr in query.functional_dependencies[0][1]}
+            parts = [[index for index, pos in enumerate(partColumns) if pos in columns]
+                     for partColumns in (self.lhs, self.rhs, self.rest)]
+            for key, (rhs, rest) in self.groups.items():
+                for part, projected in zip(parts, ([key], rhs, rest)):
+                    if any(value[i] != ALPHA for value in projected for i in part):
+                        return False
+            return True
+        distinguished = (tuple(ALPHA for _ in self.rhs), tuple(ALPHA for _ in self.rest))
+        group = self.groups.get(tuple(ALPHA for _ in self.lhs))
+        return group is not None and distinguished[0] in group[0] and distinguished[1] in group[1]
+
+    def satisfies_simple(self, query, schema):
+        """Returns whether the simple chase has reached the goal of
+        `query` at its fixpoint: the functional or multivalued
+        dependency holds, or the tuple joined from the rows of the
+        subschemas is a row.
+
+        A dependency is tested by regrouping the table by its lhs. A
+        functional dependency holds if every group has a single rhs
+        projection, and a multivalued one if the groups give no new
+        rows.
+        """
+
+        task = query.task
+        if task in (FUNCTIONAL_DEPENDENCY, MULTIVALUED_DEPENDENCY):
+            dependency = (query.functional_dependencies if task == FUNCTIONAL_DEPENDENCY
+                          else query.multivalued_dependencies)[0]
+            lhs = sorted({schema[attr] for attr in dependency[0]})
+            rhs = sorted({schema[attr] for attr in dependency[1]}.difference(lhs))
+            (_, _, _, groups), size = self.regroup(lhs, rhs)
+            if task == FUNCTIONAL_DEPENDENCY:
+                return all(len(rhsOfGroup) == 1 for rhsOfGroup, _ in groups.values())
+            return size == self.size
+        if task == LOSSLESS_JOIN:
+            # the symbols are never renamed, so the joined tuple takes the
+            # symbol of the first initial row whose subschema has each attribute
+            joined = [None] * self.width
+            for i, subschema in reversed(list(enumerate(query.relations))):
+                for attr in subschema.attributes:
+                    joined[schema[attr]] = self.initial[i][schema[attr]]
+            return None not in joined and joined in self
+        return False
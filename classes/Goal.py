@@ -0,0 +1,134 @@
+from utils.common import ALPHA, FUNCTIONAL_DEPENDENCY
+
+
+class Goal():
+    """
+    Tracks whether the distinguished chase has reached the goal of a
+    query while the cells of the table change, so checking the goal
+    takes constant time.
+
+    The goal of a functional dependency is reached once every cell of
+    its rhs columns is distinguished, so the number of other cells in
+    those columns is counted. Any other goal is reached once a row is
+    entirely distinguished, so the number of other cells in every row
+    is counted.
+
+    The symbols of a column are only renamed by merging them in a
+    `UnionFind` whose preferred symbol is `ALPHA`. Each tracked column
+    keeps the cells of every symbol under the representative of its
+    set, and the cells of a set only change the counts when the set is
+    merged into the one of `ALPHA`.
+
+    Attributes
+    ----------
+    rowGoal : bool
+        Whether the goal is an entirely distinguished row.
+    cells : dict[int, dict[str, list[int] | int]]
+        For each tracked column, a mapping of every non-distinguished
+        symbol to the rows it appears in, or to the number of rows it
+        appears in if `rowGoal` is False.
+    counts : list[int]
+        For each row, the number of non-distinguished cells in it.
+    remaining : int
+        The number of non-distinguished cells in the rhs columns.
+    reached : bool
+        Whether the goal has been reached.
+
+    Methods
+    -------
+    listener(pos)
+        Returns the function to call when two sets of the column merge.
+    add_rows(start, rows)
+        Counts the rows appended to the table at index `start`.
+    """
+
+    def __init__(self, query, schema, table):
+        """
+        Parameters
+        ----------
+        query : Query
+            The query whose goal is tracked.
+        schema : dict[str, int]
+            A mapping of the attributes to the index it appears in the
+            table.
+        table : list[list[str]]
+            The initial chase table.
+        """
+
+        self.rowGoal = query.task != FUNCTIONAL_DEPENDENCY
+        if self.rowGoal:
+            columns = range(len(schema))
+        else:
+            columns = sorted({schema[attr] for attr in query.functional_dependencies[0][1]})
+        self.cells = {pos: {} for pos in columns}
+        self.counts = []
+        self.remaining = 0
+        self.reached = False
+        self.add_rows(0, table)
+
+    def add_rows(self, start, rows):
+        """Counts the non-distinguished cells of `rows`, which are
+        appended to the table starting at index `start`."""
+
+        for index, row in enumerate(rows, start):
+            count = 0
+            for pos, symbols in self.cells.items():
+                symbol = row[pos]
+                if symbol == ALPHA:
+                    continue
+                count += 1
+                if self.rowGoal:
+                    symbols.setdefault(symbol, []).append(index)
+                else:
+                    symbols[symbol] = symbols.get(symbol, 0) + 1
+            if self.rowGoal:
+                self.counts.append(count)
+                if count == 0:
+                    self.reached = True
+            else:
+                self.remaining += count
+        if not self.rowGoal and self.remaining == 0:
+            self.reached = True
+
+    def listener(self, pos):
+        """Returns the function that a `UnionFind` of column `pos` calls
+        with the representative and the absorbed representative of two
+        merged sets, or None if the column is not tracked."""
+
+        symbols = self.cells.get(pos)
+        if symbols is None:
+            return None
+
+        def merge(root, absorbed):
+            cells = symbols.pop(absorbed, None)
+            if cells is None:
+                return
+            if root == ALPHA:
+                self.distinguish(cells)
+            elif not self.rowGoal:
+                symbols[root] = symbols.get(root, 0) + cells
+            else:
+                kept = symbols.get(root)
+                if kept is None:
+                    symbols[root] = cells
+                elif len(kept) < len(cells):
+                    cells.extend(kept)
+                    symbols[root] = cells
+                else:
+                    kept.extend(cells)
+        return merge
+
+    def distinguish(self, cells):
+        """Counts `cells`, the rows or the number of cells of a set of
+        symbols, as distinguished."""
+
+        if not self.rowGoal:
+            self.remaining -= cells
+            if self.remaining == 0:
+                self.reached = True
+            return
+        counts = self.counts
+        for row in cells:
+            counts[row] -= 1
+            if counts[row] == 0:
+                self.reached = True
@@ -0,0 +1,199 @@
+from utils.common import ALPHA
+
+
+class JoinTableau():
+    """
+    The tableau of a lossless join test under functional dependencies
+    only, kept as a partition of the rows of every column instead of a
+    table of symbols.
+
+    Row i starts out distinguished on the attributes of subschema i and
+    with its own symbol elsewhere, so every column starts with one class
+    of distinguished rows and every other row alone. Applying a
+    functional dependency merges the classes, in its rhs columns, of
+    rows whose lhs classes are all the same.
+
+    Every row knows the class it is in, and the smaller of two merged
+    classes is relabelled, so a row moves O(log k) times per column.
+    A row only needs to be looked at for a dependency when it moves in
+    one of its lhs columns, and only when it shares a class with another
+    row in every lhs column. Each dependency keeps its rows hashed on
+    their lhs classes: a label that is relabelled is never used again,
+    so a hash left behind by a moved row can never match.
+
+    Attributes
+    ----------
+    labels : list[list[int]]
+        For each column, the class of every row, labelled by one of its
+        rows.
+    members : list[dict[int, list[int]]]
+        For each column, the rows of every class with more than one row.
+    distinguished : list[int | None]
+        For each column, the label of the class of distinguished rows,
+        or None if no subschema has the attribute.
+    counts : list[int]
+        For each row, the number of columns it is not distinguished in.
+    buckets : list[dict[tuple[int, ...], int]]
+        For each functional dependency, a row for each tuple of lhs
+        labels seen.
+    reached : bool
+        Whether a row is distinguished in every column.
+
+    Methods
+    -------
+    chase()
+        Applies the dependencies until a row is entirely distinguished
+        or none of them merges anything, and returns whether the join
+        is lossless.
+    to_table(schema)
+        Returns the tableau as a chase table.
+    """
+
+    def __init__(self, schema, subschemas, fds, fdsByColumn):
+        """
+        Parameters
+        ----------
+        schema : dict[str, int]
+            A mapping of the attributes to the index it appears in the
+            table.
+        subschemas : list[list[str]]
+            The attributes of every relation of the decomposition.
+        fds : list[list[list[int]]]
+            The functional dependencies as lists of column indexes.
+        fdsByColumn : dict[int, list[int]]
+            A mapping of each column to the functional dependencies
+            whose lhs contains it.
+        """
+
+        rows = len(subschemas)
+        width = len(schema)
+        self.fds = fds
+        self.fdsByColumn = fdsByColumn
+        self.labels = [list(range(rows)) for _ in range(width)]
+        self.members = [{} for _ in range(width)]
+        self.distinguished = [None] * width
+        self.counts = [width] * rows
+        self.buckets = [{} for _ in fds]
+        self.reached = False
+
+        byColumn = [[] for _ in range(width)]
+        for row, attributes in enumerate(subschemas):
+            for pos in {schema[attr] for attr in attributes}:
+                byColumn[pos].append(row)
+                self.counts[row] -= 1
+        for pos, alphas in enumerate(byColumn):
+            if not alphas:
+                continue
+            label = self.distinguished[pos] = alphas[0]
+            for row in alphas:
+                self.labels[pos][row] = label
+            if len(alphas) > 1:
+                self.members[pos][label] = alphas
+        self.reached = 0 in self.counts
+
+    def chase(self):
+        """Applies the functional dependencies until a row is entirely
+        distinguished or none of them merges anything, and returns
+        whether a row is entirely distinguished."""
+
+        # at first, only rows distinguished on a whole lhs share a class
+        # with another row in every lhs column
+        merges = []
+        for i, (leftPos, _) in enumerate(self.fds):
+            for row in self.candidates(leftPos, self.rowsToCheck(leftPos)):
+                self.insert(i, row, merges)
+        while merges and not self.reached:
+            i, first, second = merges.pop()
+            for pos in self.fds[i][1]:
+                self.union(pos, first, second, merges)
+                if self.reached:
+                    break
+        return self.reached
+
+    def rowsToCheck(self, leftPos):
+        """Returns the distinguished rows of the lhs column with the
+        fewest of them, or every row if the lhs is empty."""
+
+        if not leftPos:
+            return range(len(self.counts))
+        smallest = min(leftPos, key=lambda pos: len(self.members[pos].get(self.distinguished[pos], ())))
+        return self.members[smallest].get(self.distinguished[smallest], [])
+
+    def candidates(self, leftPos, rows):
+        """Returns the rows that share a class with another row in every
+        column of `leftPos`."""
+
+        members = self.members
+        labels = self.labels
+        return [row for row in rows
+                if all(labels[pos][row] in members[pos] for pos in leftPos)]
+
+    def insert(self, i, row, merges):
+        """Hashes `row` on its lhs labels for dependency `i`, and queues
+        the merge of its rhs with a row of the same hash."""
+
+        key = tuple(self.labels[pos][row] for pos in self.fds[i][0])
+        first = self.buckets[i].setdefault(key, row)
+        if first != row:
+            merges.append((i, first, row))
+
+    def union(self, pos, first, second, merges):
+        """Merges the classes of rows `first` and `second` in column
+        `pos`, and rehashes the rows whose labels changed."""
+
+        labels = self.labels[pos]
+        members = self.members[pos]
+        kept = labels[first]
+        absorbed = labels[second]
+        if kept == absorbed:
+            return
+        keptRows = members.get(kept, [kept])
+        absorbedRows = members.get(absorbed, [absorbed])
+        if len(absorbedRows) > len(keptRows):
+            kept, absorbed = absorbed, kept
+            keptRows, absorbedRows = absorbedRows, keptRows
+        # a row that was alone in its class now shares it, so it moves too
+        moved = absorbedRows if len(keptRows) > 1 else keptRows + absorbedRows
+
+        distinguished = self.distinguished[pos]
+        if distinguished == absorbed:
+            self.distinguished[pos] = kept
+            self.distinguish(keptRows)
+        elif distinguished == kept:
+            self.distinguish(absorbedRows)
+
+        for row in absorbedRows:
+            labels[row] = kept
+        members.pop(absorbed, None)
+        if kept in members:
+            keptRows.extend(absorbedRows)
+        else:
+            members[kept] = keptRows + absorbedRows
+
+        for i in self.fdsByColumn.get(pos, []):
+            for row in self.candidates(self.fds[i][0], moved):
+                self.insert(i, row, merges)
+
+    def distinguish(self, rows):
+        """Counts one more distinguished cell in each of `rows`."""
+
+        counts = self.counts
+        for row in rows:
+            counts[row] -= 1
+            if counts[row] == 0:
+                self.reached = True
+
+    def to_table(self, schema):
+        """Returns the tableau as a chase table, where the symbol of a
+        class that is not distinguished is the one of the row it is
+        labelled by."""
+
+        header = sorted(schema, key=schema.get)
+        table = [[] for _ in self.counts]
+        for pos, attr in enumerate(header):
+            labels = self.labels[pos]
+            distinguished = self.distinguished[pos]
+            for row, values in enumerate(table):
+                label = labels[row]
+                values.append(ALPHA if label == distinguished else attr + str(label + 1))
+        return table
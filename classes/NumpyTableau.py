@@ -0,0 +1,226 @@
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the numpy backend
+    np = None
+
+from utils.common import ALPHA, FUNCTIONAL_DEPENDENCY
+
+
+class NumpyTableau():
+    """
+    A chase table whose symbols are interned to integers and whose rows
+    are stored in a 2d NumPy array.
+
+    The distinguished symbol is always interned as 0, so taking the
+    minimum of a set of symbol ids prefers it. Every other symbol gets
+    the next free id in the order it is first seen.
+
+    Attributes
+    ----------
+    symbols : list[str]
+        A mapping of each symbol id to its symbol.
+    ids : dict[str, int]
+        A mapping of each symbol to its symbol id.
+    rows : numpy.ndarray
+        A 2d array of symbol ids with one row per tuple of the table.
+
+    Methods
+    -------
+    to_table()
+        Returns the table as a list of rows of symbols.
+    chase_fds(fds, schema)
+        Equates symbols until every functional dependency holds.
+    chase_mvds(mvds, schema)
+        Adds the rows required by the first violated multivalued
+        dependency.
+    step(relation, schema)
+        Applies one step of the chase to the table.
+    satisfies(query, schema)
+        Returns whether the distinguished chase has reached its goal.
+    """
+
+    def __init__(self, table):
+        """
+        Parameters
+        ----------
+        table : list[list[str]]
+            A 2d array representing the chase table.
+        """
+
+        if np is None:
+            raise ImportError("the numpy backend requires numpy to be installed")
+        self.symbols = [ALPHA]
+        self.ids = {ALPHA: 0}
+        width = len(table[0]) if table else 0
+        self.rows = np.array([[self.intern(value) for value in row] for row in table],
+                             dtype=np.int64).reshape(len(table), width)
+
+    def intern(self, symbol):
+        """Returns the symbol id of `symbol`, allocating one if needed."""
+
+        if symbol not in self.ids:
+            self.ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return self.ids[symbol]
+
+    def to_table(self):
+        """Returns the table as a list of rows of symbols."""
+
+        symbols = self.symbols
+        return [[symbols[value] for value in row] for row in self.rows.tolist()]
+
+    def __iter__(self):
+        return iter(self.to_table())
+
+    def __len__(self):
+        return len(self.rows)
+
+    def group(self, columns):
+        """Returns the group index of every row when grouped by the
+        values in `columns`, and the number of groups."""
+
+        if len(columns) == 0:
+            return np.zeros(len(self.rows), dtype=np.int64), 1
+        _, inverse = np.unique(self.rows[:, columns], axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        return inverse, int(inverse.max()) + 1
+
+    def chase_fds(self, fds, schema):
+        """Equates symbols until every functional dependency in `fds`
+        holds.
+
+        For every rhs column the minimum symbol id of each lhs group is
+        propagated to every occurrence of the symbols in that group, so
+        a symbol is renamed across the whole column. This is repeated
+        until no symbol changes.
+
+        Returns
+        -------
+        bool
+            True if any cell has changed, False otherwise.
+        """
+
+        if len(self.rows) == 0:
+            return False
+        fdsPos = [([schema[attr] for attr in fd[0]], [schema[attr] for attr in fd[1]])
+                  for fd in fds]
+        hasUpdated = False
+        changed = True
+        while changed:
+            changed = False
+            for leftPos, rightPos in fdsPos:
+                inverse, groups = self.group(leftPos)
+                for pos in rightPos:
+                    column = self.rows[:, pos]
+                    minimum = np.full(groups, len(self.symbols), dtype=np.int64)
+                    np.minimum.at(minimum, inverse, column)
+                    mapping = np.arange(len(self.symbols), dtype=np.int64)
+                    np.minimum.at(mapping, column, minimum[inverse])
+                    while True:
+                        jumped = mapping[mapping]
+                        if np.array_equal(jumped, mapping):
+                            break
+                        mapping = jumped
+                    renamed = mapping[column]
+                    if not np.array_equal(renamed, column):
+                        self.rows[:, pos] = renamed
+                        changed = True
+            hasUpdated = hasUpdated or changed
+        return hasUpdated
+
+    def chase_mvds(self, mvds, schema):
+        """Adds the rows required by the first multivalued dependency in
+        `mvds` that is violated.
+
+        The rows are grouped by the lhs columns, and every combination of
+        an lhs+rhs projection and an lhs+rest projection within a group
+        that is not already a row is added.
+
+        Returns
+        -------
+        bool
+            True if any row was added, False otherwise.
+        """
+
+        width = self.rows.shape[1]
+        for mvd in mvds:
+            if len(self.rows) == 0:
+                break
+            lhsPos = [schema[attr] for attr in mvd[0]]
+            rhsPos = [pos for pos in (schema[attr] for attr in mvd[1]) if pos not in lhsPos]
+            restPos = [pos for pos in range(width) if pos not in lhsPos and pos not in rhsPos]
+            newRows = self.mvd_rows(lhsPos, rhsPos, restPos)
+            if len(newRows) > 0:
+                self.rows = np.concatenate([self.rows, newRows])
+                return True
+        return False
+
+    def mvd_rows(self, lhsPos, rhsPos, restPos):
+        """Returns the rows that a multivalued dependency lhs ->> rhs
+        requires and that are not yet in the table."""
+
+        groups, _ = self.group(lhsPos)
+        rhsIds = self.projection_ids(lhsPos + rhsPos)
+        restIds = self.projection_ids(lhsPos + restPos)
+
+        # unique (group, projection) pairs, sorted by group
+        rhsPairs = np.unique(np.stack([groups, rhsIds], axis=1), axis=0)
+        restPairs = np.unique(np.stack([groups, restIds], axis=1), axis=0)
+        numGroups = int(groups.max()) + 1
+        restCounts = np.bincount(restPairs[:, 0], minlength=numGroups)
+        restStarts = np.concatenate([[0], np.cumsum(restCounts)[:-1]])
+
+        # pair every rhs projection with every rest projection of its group
+        repeats = restCounts[rhsPairs[:, 0]]
+        combRhs = np.repeat(rhsPairs[:, 1], repeats)
+        combGroup = np.repeat(rhsPairs[:, 0], repeats)
+        offsets = np.arange(len(combRhs)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        combRest = restPairs[restStarts[combGroup] + offsets, 1]
+
+        existing = rhsIds * (int(restIds.max()) + 1) + restIds
+        combined = combRhs * (int(restIds.max()) + 1) + combRest
+        missing = ~np.isin(combined, existing)
+        if not missing.any():
+            return self.rows[:0]
+
+        rhsRow = self.first_occurrence(rhsIds)
+        restRow = self.first_occurrence(restIds)
+        newRows = self.rows[rhsRow[combRhs[missing]]].copy()
+        newRows[:, restPos] = self.rows[restRow[combRest[missing]]][:, restPos]
+        return newRows
+
+    def projection_ids(self, columns):
+        """Returns an id for every row that identifies its projection on
+        `columns`."""
+
+        inverse, _ = self.group(columns)
+        return inverse
+
+    def first_occurrence(self, ids):
+        """Returns, for every id, the index of the first row with it."""
+
+        _, index = np.unique(ids, return_index=True)
+        return index
+
+    def step(self, relation, schema):
+        """Applies one step of the chase: the functional dependencies to
+        a fixpoint, or else the multivalued dependencies.
+
+        Returns
+        -------
+        tuple[NumpyTableau, bool]
+            This table and whether it has changed.
+        """
+
+        if self.chase_fds(relation.functional_dependencies, schema):
+            return (self, True)
+        return (self, self.chase_mvds(relation.multivalued_dependencies, schema))
+
+    def satisfies(self, query, schema):
+        """Returns whether the distinguished chase has reached the goal
+        of `query`."""
+
+        if query.task == FUNCTIONAL_DEPENDENCY:
+            rhsPos = [schema[attr] for attr in query.functional_dependencies[0][1]]
+            return bool((self.rows[:, rhsPos] == 0).all())
+        return bool((self.rows == 0).all(axis=1).any())
@@ -0,0 +1,73 @@
+from chaseFd import indexByLhs
+from chaseMvd import mapToIndex
+from classes.ClosureCache import ClosureCache
+from classes.CompiledSchema import CompiledSchema
+
+
+class PreparedRelation():
+    """
+    The structures built from a relation before it is chased, built once
+    and shared by every query asked about the relation.
+
+    Every chase table of the relation has the same columns, so the
+    schema mapping and the dependency indexes of `Scheduler` do not
+    depend on the query. The closures of the functional dependencies do
+    not depend on it either, and are kept for the queries to come.
+
+    Attributes
+    ----------
+    relation : Relation
+        The relation the queries are about.
+    compiled : CompiledSchema
+        The bit positions of the attributes, which are also their
+        columns in the table.
+    fdMasks : list[tuple[int, int]]
+        The functional dependencies as (lhs, rhs) bitmasks.
+    schema : dict[str, int]
+        A mapping of the attributes to the index it appears in the
+        table.
+    fds : list[list[list[int]]]
+        The functional dependencies as lists of column indexes.
+    mvds : list[list[list[int]]]
+        The multivalued dependencies as lists of column indexes.
+    fdsByColumn : dict[int, list[int]]
+        A mapping of each column to the functional dependencies whose
+        lhs contains it.
+    mvdsByColumn : dict[int, list[int]]
+        A mapping of each column to the multivalued dependencies whose
+        lhs contains it.
+    closures : ClosureCache
+        The attribute closures under the functional dependencies.
+
+    Methods
+    -------
+    closure(attributes)
+        Returns the closure of the attributes under every functional
+        dependency of the relation.
+    maskClosure(mask)
+        Returns the closure of a bitmask of attributes under every
+        functional dependency of the relation, as a bitmask.
+    """
+
+    def __init__(self, relation):
+        self.relation = relation
+        self.compiled = CompiledSchema(relation.attributes)
+        self.schema = self.compiled.positions
+        self.fds = mapToIndex(relation.functional_dependencies, self.schema)
+        self.mvds = mapToIndex(relation.multivalued_dependencies, self.schema)
+        self.fdsByColumn = indexByLhs(self.fds)
+        self.mvdsByColumn = indexByLhs(self.mvds)
+        self.closures = ClosureCache(relation.functional_dependencies, self.compiled)
+        self.fdMasks = self.closures.masks
+
+    def closure(self, attributes):
+        """Returns the closure of `attributes` under every functional
+        dependency of the relation."""
+
+        return self.closures.closure(attributes)
+
+    def maskClosure(self, mask):
+        """Returns the closure of the bitmask `mask` under every
+        functional dependency of the relation, as a bitmask."""
+
+        return self.closures.maskClosure(mask)
@@ -1,3 +1,9 @@
+import hashlib
+import json
+
+from classes.Relation import canonical_dependencies
+
+
 class Query():
     """
     A class to represent the task the chase algorithm is chasing.
@@ -13,7 +19,12 @@ class Query():
         A list of multivalued dependencies for entailment and minimal
         cover queries.
     relations : list
-        A list of relations for lossless join queries.
+        A list of relations for lossless join and dependency
+        preservation queries.
+    fd_keys : set
+        The functional dependencies as tuples, to find duplicates.
+    mvd_keys : set
+        The multivalued dependencies as tuples, to find duplicates.
 
     Methods
     -------
@@ -27,6 +38,10 @@ class Query():
         multivalued dependencies needed for the query.
     add_relation(relation)
         Adds a relation to the list of relations needed for the query.
+    canonical()
+        Returns the task, dependencies and relations in a canonical form.
+    fingerprint()
+        Returns a hash of the canonical form.
     """
 
     def __init__(self, task=None, functional_dependencies=None, multivalued_dependencies=None, relations=None):
@@ -39,6 +54,8 @@ class Query():
         self.task = task
         self.functional_dependencies = functional_dependencies
         self.multivalued_dependencies = multivalued_dependencies
+        self.fd_keys = {(tuple(lhs), tuple(rhs)) for lhs, rhs in functional_dependencies}
+        self.mvd_keys = {(tuple(lhs), tuple(rhs)) for lhs, rhs in multivalued_dependencies}
         self.relations = relations
 
     def set_task(self, task):
@@ -65,10 +82,11 @@ class Query():
 
         lhs.sort()
         rhs.sort()
-        fd = [lhs, rhs]
-        if fd in self.functional_dependencies:
+        key = (tuple(lhs), tuple(rhs))
+        if key in self.fd_keys:
             return
-        self.functional_dependencies.append(fd)
+        self.fd_keys.add(key)
+        self.functional_dependencies.append([lhs, rhs])
 
     def add_multivalued_dependency(self, lhs, rhs):
         """Adds a multivalued dependency, lhs ->> rhs, to the list of
@@ -89,10 +107,11 @@ class Query():
 
         lhs.sort()
         rhs.sort()
-        mvd = [lhs, rhs]
-        if mvd in self.multivalued_dependencies:
+        key = (tuple(lhs), tuple(rhs))
+        if key in self.mvd_keys:
             return
-        self.multivalued_dependencies.append(mvd)
+        self.mvd_keys.add(key)
+        self.multivalued_dependencies.append([lhs, rhs])
 
     def add_relation(self, relation):
         """Adds a relation to the list of relations.
@@ -109,6 +128,29 @@ class Query():
             return
         self.relations.append(relation)
 
+    def canonical(self):
+        """Returns the task, dependencies and relations of the query,
+        each sorted, so that the order they were given in does not
+        matter.
+
+        Relations are reduced to their sorted attributes, since their
+        names do not change any answer.
+        """
+
+        return {
+            "task": self.task,
+            "functional_dependencies": canonical_dependencies(self.functional_dependencies),
+            "multivalued_dependencies": canonical_dependencies(self.multivalued_dependencies),
+            "relations": sorted(sorted(set(relation.attributes)) for relation in self.relations),
+        }
+
+    def fingerprint(self):
+        """Returns a hex digest of `canonical()`, the same for any two
+        queries that only differ in the order of their parts."""
+
+        data = json.dumps(self.canonical(), separators=(",", ":"))
+        return hashlib.sha256(data.encode()).hexdigest()
+
     def __str__(self):
         """String representation of `Query` for debugging."""
 
@@ -1,3 +1,14 @@
+import hashlib
+import json
+
+
+def canonical_dependencies(dependencies):
+    """Returns the dependencies with every side sorted, in sorted order
+    and without duplicates."""
+
+    return sorted({(tuple(sorted(lhs)), tuple(sorted(rhs))) for lhs, rhs in dependencies})
+
+
 class Relation():
     """
     A class used to represent a relational schema and its associated
@@ -13,6 +24,10 @@ class Relation():
         A list of functional dependencies on the relation.
     multivalued_dependencies : list
         A list of multivalued dependencies on the relation.
+    fd_keys : set
+        The functional dependencies as tuples, to find duplicates.
+    mvd_keys : set
+        The multivalued dependencies as tuples, to find duplicates.
 
     Methods
     -------
@@ -24,6 +39,10 @@ class Relation():
     add_multivalued_dependency(lhs, rhs)
         Adds a multivalued dependency, lhs ->> rhs, to the list of
         multivalued dependencies on the relation.
+    canonical()
+        Returns the attributes and dependencies in a canonical form.
+    fingerprint()
+        Returns a hash of the canonical form.
     """
 
     def __init__(self, name, attributes=None, functional_dependencies=None, multivalued_dependencies=None):
@@ -50,6 +69,8 @@ class Relation():
         self.attributes = attributes
         self.functional_dependencies = functional_dependencies
         self.multivalued_dependencies = multivalued_dependencies
+        self.fd_keys = {(tuple(lhs), tuple(rhs)) for lhs, rhs in functional_dependencies}
+        self.mvd_keys = {(tuple(lhs), tuple(rhs)) for lhs, rhs in multivalued_dependencies}
 
     def add_attribute(self, attr):
         """Adds the given attribute to the relation.
@@ -81,10 +102,11 @@ class Relation():
 
         lhs.sort()
         rhs.sort()
-        fd = [lhs, rhs]
-        if fd in self.functional_dependencies:
+        key = (tuple(lhs), tuple(rhs))
+        if key in self.fd_keys:
             return
-        self.functional_dependencies.append(fd)
+        self.fd_keys.add(key)
+        self.functional_dependencies.append([lhs, rhs])
 
     def add_multivalued_dependency(self, lhs, rhs):
         """Adds a multivalued dependency, lhs ->> rhs, to the list of
@@ -103,10 +125,32 @@ class Relation():
 
         lhs.sort()
         rhs.sort()
-        mvd = [lhs, rhs]
-        if mvd in self.multivalued_dependencies:
+        key = (tuple(lhs), tuple(rhs))
+        if key in self.mvd_keys:
             return
-        self.multivalued_dependencies.append(mvd)
+        self.mvd_keys.add(key)
+        self.multivalued_dependencies.append([lhs, rhs])
+
+    def canonical(self):
+        """Returns the attributes and dependencies of the relation, each
+        sorted, so that the order they were given in does not matter.
+
+        The name is left out since it does not change any answer.
+        """
+
+        return {
+            "attributes": sorted(set(self.attributes)),
+            "functional_dependencies": canonical_dependencies(self.functional_dependencies),
+            "multivalued_dependencies": canonical_dependencies(self.multivalued_dependencies),
+        }
+
+    def fingerprint(self):
+        """Returns a hex digest of `canonical()`, the same for any two
+        relations that only differ in the order of their attributes and
+        dependencies."""
+
+        data = json.dumps(self.canonical(), separators=(",", ":"))
+        return hashlib.sha256(data.encode()).hexdigest()
 
     def __str__(self):
         """String representation of `Relation` for debugging."""
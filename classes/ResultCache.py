@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+
+class ResultCache:
+    """
+    A class used to represent an on-disk cache of chase results.
+
+    Every entry is a json file named after the key of the problem. It
+    holds the answer and, optionally, the final table. Reading an entry
+    touches its file, so the modification times give the least recently
+    used entries, which are evicted once there are more than
+    `max_entries` entries or they take more than `max_bytes` bytes.
+    The number and size of the entries are counted as they are put, so
+    the directory is only scanned once the counts exceed a limit. Other
+    processes may share the directory, so the counts are reset from a
+    scan whenever one is made.
+
+    Attributes
+    ----------
+    directory : Path
+        The directory of the entries.
+    max_entries : int
+        The maximum number of entries kept.
+    max_bytes : int | None
+        The maximum total size of the entries kept, if any.
+    store_tables : bool
+        Whether the final table is stored with the answer.
+    entries : int | None
+        The number of entries counted so far, or None before the first
+        scan.
+    total_bytes : int
+        The total size of the entries counted so far.
+    """
+
+    def __init__(self, directory, max_entries=1000, max_bytes=None, store_tables=True):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.store_tables = store_tables
+        self.entries = None
+        self.total_bytes = 0
+
+    @staticmethod
+    def key(chase_type, relation, query):
+        """Returns the key of a problem, which does not depend on the
+        order of its attributes, dependencies or relations."""
+
+        data = f"{chase_type}:{relation.fingerprint()}:{query.fingerprint()}"
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def get_path(self, key):
+        """Returns the path of the entry for `key`."""
+
+        return self.directory / f"{key}.json"
+
+    def get(self, key):
+        """Returns the entry for `key` as a dict with the `answer`, the
+        `header` and the `table`, or None if there is no such entry."""
+
+        path = self.get_path(key)
+        try:
+            with open(path) as file:
+                entry = json.load(file)
+            os.utime(path)
+        except (OSError, ValueError):
+            # an entry evicted by another process is a miss too
+            return None
+        return entry
+
+    def put(self, key, schema, table, answer):
+        """Stores the answer, and the table if `store_tables` is set, for
+        `key`, then evicts the least recently used entries."""
+
+        entry = {"answer": answer, "header": [], "table": []}
+        if self.store_tables:
+            entry["header"] = sorted(schema, key=schema.get)
+            entry["table"] = [[str(value) for value in row] for row in table]
+        path = self.get_path(key)
+        # every writer has its own temporary file, so that processes
+        # putting the same key do not replace each other's
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w") as file:
+                json.dump(entry, file, separators=(",", ":"))
+                size = file.tell()
+            try:
+                # an entry that is replaced no longer counts
+                replaced = path.stat().st_size
+            except OSError:
+                replaced = None
+            os.replace(temporary, path)
+        except BaseException:
+            Path(temporary).unlink(missing_ok=True)
+            raise
+        if self.entries is None:
+            self.evict()
+            return
+        if replaced is None:
+            self.entries += 1
+            replaced = 0
+        self.total_bytes += size - replaced
+        if self.over_limits():
+            self.evict()
+
+    def over_limits(self):
+        """Returns whether the entries counted exceed the limits."""
+
+        return self.entries > self.max_entries or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+
+    def evict(self):
+        """Removes the least recently used entries until the cache is
+        within its limits, and counts the entries that are left."""
+
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries
+                           or (self.max_bytes is not None and total > self.max_bytes)):
+            _, size, path = entries.pop(0)
+            total -= size
+            path.unlink(missing_ok=True)
+        self.entries = len(entries)
+        self.total_bytes = total
@@ -0,0 +1,58 @@
+class RowStore():
+    """
+    A list of chase table rows with a hashed set of the same rows kept
+    alongside it, so membership tests and insertions take constant time.
+
+    The rows must not be modified while they are in the store, since
+    the hashed set holds a tuple copy of each row.
+
+    Attributes
+    ----------
+    rows : list[list[str]]
+        The rows in the order they were added.
+    keys : set[tuple[str, ...]]
+        The rows as tuples.
+
+    Methods
+    -------
+    add(row)
+        Adds the row to the store if it is not already in it.
+    """
+
+    def __init__(self, rows=None):
+        """
+        Parameters
+        ----------
+        rows : list[list[str]], optional
+            The initial rows of the store (default is no rows).
+        """
+
+        self.rows = []
+        self.keys = set()
+        for row in rows or []:
+            self.add(row)
+
+    def add(self, row):
+        """Adds `row` to the store if it is not already in it.
+
+        Returns
+        -------
+        bool
+            True if the row was added, False if it was already stored.
+        """
+
+        key = tuple(row)
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        self.rows.append(row)
+        return True
+
+    def __contains__(self, row):
+        return tuple(row) in self.keys
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
@@ -0,0 +1,185 @@
+from chaseFd import equateFds, indexByLhs
+from chaseMvd import groupRows, joinDelta, mapToIndex
+from classes.RowStore import RowStore
+from parallelChase import PARALLEL_ROWS, ParallelJoin
+from utils.profiler import PROFILER, SETUP, profiled
+
+
+class Scheduler():
+    """
+    A semi-naive scheduler that applies the dependencies of a relation
+    to a chase table, one step at a time, re-firing only what the
+    previous steps may have violated.
+
+    Renaming a symbol throughout a column preserves every dependency
+    that already holds, so after functional dependencies change some
+    columns only the dependencies with one of those columns in their
+    lhs can be violated. New rows can violate any functional dependency,
+    but a multivalued dependency only needs to join the new rows with
+    the existing ones.
+
+    Attributes
+    ----------
+    fds : list[list[list[int]]]
+        The functional dependencies as lists of column indexes.
+    mvds : list[list[list[int]]]
+        The multivalued dependencies as lists of column indexes.
+    fdsByColumn : dict[int, list[int]]
+        A mapping of each column to the functional dependencies whose
+        lhs contains it.
+    mvdsByColumn : dict[int, list[int]]
+        A mapping of each column to the multivalued dependencies whose
+        lhs contains it.
+    pendingFds : set[int]
+        The functional dependencies that may be violated.
+    seen : list[int]
+        For each multivalued dependency, the number of rows at the top
+        of the table whose pairs are known to be joined.
+    groups : list[dict | None]
+        For each multivalued dependency, the projections of the first
+        `indexed` rows grouped by lhs, or None if they are stale.
+    indexed : list[int]
+        For each multivalued dependency, the number of rows in `groups`.
+    rows : RowStore | None
+        The rows of the table for lookups, or None if they are stale.
+    goal : Goal | None
+        The goal of the distinguished chase, told about every change to
+        the table, or None if the chase runs to a fixpoint.
+    budget : Budget | None
+        The limits checked while a multivalued dependency joins rows, or
+        None if there are none.
+    parallel : ParallelJoin | None
+        The process pool that joins the rows of multivalued dependencies
+        once the table has `PARALLEL_ROWS` rows, or None to join them
+        in this process.
+
+    Methods
+    -------
+    step(table)
+        Applies one step of the chase to the table.
+    close()
+        Stops the processes that join rows in parallel.
+    """
+
+    @profiled(SETUP)
+    def __init__(self, relation, schema, goal=None, prepared=None, budget=None, workers=1):
+        """
+        Parameters
+        ----------
+        relation : Relation
+            The relation whose dependencies are chased.
+        schema : dict[str, int]
+            A mapping of the attributes to the index it appears in the
+            table.
+        goal : Goal, optional
+            The goal to stop the chase at as soon as it is reached
+            (default is None).
+        prepared : PreparedRelation, optional
+            The dependency indexes of the relation, already built for
+            another query, which are shared instead of built again
+            (default is None).
+        budget : Budget, optional
+            The limits to stop joining rows at, part way through a step
+            (default is None).
+        workers : int, optional
+            The number of processes that join the rows of big tables
+            (default is 1, joining them in this process).
+        """
+
+        self.width = len(schema)
+        if prepared is not None:
+            self.fds = prepared.fds
+            self.mvds = prepared.mvds
+            self.fdsByColumn = prepared.fdsByColumn
+            self.mvdsByColumn = prepared.mvdsByColumn
+        else:
+            self.fds = mapToIndex(relation.functional_dependencies, schema)
+            self.mvds = mapToIndex(relation.multivalued_dependencies, schema)
+            self.fdsByColumn = indexByLhs(self.fds)
+            self.mvdsByColumn = indexByLhs(self.mvds)
+        self.pendingFds = set(range(len(self.fds)))
+        self.seen = [0] * len(self.mvds)
+        self.groups = [None] * len(self.mvds)
+        self.indexed = [0] * len(self.mvds)
+        self.rows = None
+        self.goal = goal
+        self.budget = budget
+        self.parallel = ParallelJoin(workers) if workers > 1 else None
+
+    def step(self, table):
+        """Applies one step of the chase to `table`.
+
+        A step applies the pending functional dependencies until they
+        hold. If no cell changes, it instead joins the new rows of each
+        multivalued dependency in turn, stopping at the first one that
+        adds rows. With a goal, a step may stop as soon as the goal is
+        reached, leaving some dependencies unapplied, and with a budget
+        as soon as a limit is hit, leaving the table partly joined.
+        A step stopped by the budget may not change the table, so
+        unchanged only means a fixpoint if no limit is hit.
+        The limits are only checked between the steps that join their
+        rows in parallel.
+
+        Returns
+        -------
+        tuple[list[list[str]], bool]
+            The updated table and whether it has changed.
+        """
+
+        if self.pendingFds:
+            pending = sorted(self.pendingFds)
+            self.pendingFds = set()
+            changedColumns = equateFds(table, self.fds, pending, self.fdsByColumn, self.goal)
+            if changedColumns:
+                self.rows = None
+                self.groups = [None] * len(self.mvds)
+                for pos in changedColumns:
+                    for i in self.mvdsByColumn.get(pos, []):
+                        self.seen[i] = 0
+                return (table, True)
+
+        for i, mvd in enumerate(self.mvds):
+            seen = self.seen[i]
+            if seen >= len(table):
+                continue
+            lhs_col, rhs_col = mvd
+            rest_col = [pos for pos in range(self.width) if pos not in lhs_col and pos not in rhs_col]
+            if self.parallel is not None and len(table) >= PARALLEL_ROWS:
+                # the workers group the rows themselves, so the ones kept here go stale
+                scanned = len(table) + len(table) - seen
+                generated = self.parallel.join(table, seen, mvd, rest_col, self.width)
+                self.groups[i] = None
+                self.rows = None
+            else:
+                if self.groups[i] is None:
+                    self.groups[i] = {}
+                    self.indexed[i] = 0
+                scanned = len(table) - self.indexed[i] + len(table) - seen
+                groups = groupRows(self.groups[i], table[self.indexed[i]:], lhs_col, rhs_col, rest_col)
+                self.indexed[i] = len(table)
+                delta = groupRows({}, table[seen:], lhs_col, rhs_col, rest_col)
+                if self.rows is None:
+                    self.rows = RowStore(table)
+                generated = joinDelta(groups, delta, mvd, rest_col, self.width, self.rows, self.budget)
+            # a join cut short by the budget is not done, so its rows stay unseen
+            stopped = self.budget is not None and self.budget.hit is not None
+            if not stopped:
+                self.seen[i] = len(table)
+            if PROFILER.enabled:
+                PROFILER.count("mvd", i, fired=1, rows_scanned=scanned, rows_generated=len(generated))
+            if generated:
+                if self.goal is not None:
+                    self.goal.add_rows(len(table), generated)
+                table += generated
+                self.pendingFds = set(range(len(self.fds)))
+                return (table, True)
+            if stopped:
+                return (table, False)
+
+        return (table, False)
+
+    def close(self):
+        """Stops the processes that join rows in parallel, if any."""
+
+        if self.parallel is not None:
+            self.parallel.close()
@@ -0,0 +1,80 @@
+class UnionFind():
+    """
+    A disjoint-set forest used to equate the symbols of a chase table.
+
+    Uses path compression and union by size, so a sequence of `find`
+    and `union` calls runs in near constant amortised time per call.
+
+    Attributes
+    ----------
+    preferred : str, optional
+        A symbol that always becomes the representative of any set it
+        is merged into, e.g. the distinguished symbol `ALPHA`.
+    parent : dict[str, str]
+        A mapping of each symbol seen so far to its parent symbol.
+    size : dict[str, int]
+        A mapping of each representative to the size of its set.
+    listener : callable, optional
+        A function called with the new representative and the absorbed
+        representative whenever two sets are merged.
+
+    Methods
+    -------
+    find(symbol)
+        Returns the representative of the set containing the symbol.
+    union(first, second)
+        Merges the sets containing the two symbols.
+    """
+
+    def __init__(self, preferred=None, listener=None):
+        self.preferred = preferred
+        self.listener = listener
+        self.parent = {}
+        self.size = {}
+
+    def find(self, symbol):
+        """Returns the representative of the set containing `symbol`.
+
+        Symbols that have not been seen before are their own
+        representative.
+        """
+
+        parent = self.parent
+        if symbol not in parent:
+            return symbol
+        root = symbol
+        while parent[root] != root:
+            root = parent[root]
+        while parent[symbol] != root:
+            parent[symbol], symbol = root, parent[symbol]
+        return root
+
+    def union(self, first, second):
+        """Merges the sets containing `first` and `second`.
+
+        The preferred symbol always ends up as the representative.
+        Otherwise the larger set absorbs the smaller one, and on a tie
+        the set of `first` is kept as the representative.
+
+        Returns
+        -------
+        bool
+            True if two different sets were merged, False otherwise.
+        """
+
+        first = self.find(first)
+        second = self.find(second)
+        if first == second:
+            return False
+        for root in (first, second):
+            if root not in self.parent:
+                self.parent[root] = root
+                self.size[root] = 1
+        if second == self.preferred or (
+                first != self.preferred and self.size[second] > self.size[first]):
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size.pop(second)
+        if self.listener is not None:
+            self.listener(first, second)
+        return True
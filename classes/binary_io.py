@@ -0,0 +1,611 @@
+import gzip
+import os
+import struct
+
+from classes.Query import Query
+from classes.Relation import Relation
+from classes.trace_io import partial_path, table_delta
+from classes.xml_io import XMLIO
+from utils.common import TRACE_STREAM
+
+MAGIC = b"CHSB"
+VERSION = 2
+NONE = 0xFFFFFFFF
+
+# the kind of a binary document, stored after the magic and version
+PROBLEM, RESULT, TABLE, COVER, TRACE, RESULTS, SCHEMAS = range(1, 8)
+KINDS = {PROBLEM: "problem", RESULT: "result", TABLE: "table", COVER: "cover", TRACE: "trace",
+         RESULTS: "results", SCHEMAS: "schemas"}
+
+# the answer of a result of several queries
+NO, YES, MIN_COVER_ANSWER, SCHEMAS_ANSWER = 0, 1, 2, 3
+# set in the answer of a result that is followed by its lost dependencies
+LOST = 4
+# set in the answer of a result whose chase stopped at a limit, which
+# follows it, with an unknown answer
+LIMIT = 8
+
+# the records of a binary trace stream
+STRING, HEADER, FULL, DELTA, MIN_COVER, SCHEMA_STEP = b"S", b"H", b"T", b"D", b"C", b"K"
+
+
+class Packer():
+    """
+    A buffer that packs integers, lists of strings and tables as little
+    endian unsigned 32 bit integers.
+
+    Every string is stored once, in a string table, and referred to by
+    its index in it. A table is stored as its header and number of rows,
+    followed by every row as a single packed buffer of string indexes.
+
+    Attributes
+    ----------
+    strings : dict[str, int]
+        A mapping of every string packed so far to its index.
+    parts : list[bytes]
+        The packed buffers in order.
+    """
+
+    def __init__(self):
+        self.strings = {}
+        self.parts = []
+
+    def intern(self, value):
+        """Returns the index of the string `value`, adding it to the
+        string table if needed. None is stored as `NONE`."""
+
+        if value is None:
+            return NONE
+        value = str(value)
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+            self.new_string(value)
+        return index
+
+    def new_string(self, value):
+        """Called when `value` is added to the string table."""
+
+    def int(self, value):
+        self.parts.append(struct.pack("<I", value))
+
+    def ids(self, values):
+        """Packs a list of strings as its length and their indexes."""
+
+        ids = [self.intern(value) for value in values]
+        self.parts.append(struct.pack(f"<I{len(ids)}I", len(ids), *ids))
+
+    def dependencies(self, dependencies):
+        self.int(len(dependencies))
+        for lhs, rhs in dependencies:
+            self.ids(lhs)
+            self.ids(rhs)
+
+    def schemas(self, schemas):
+        self.int(len(schemas))
+        for schema in schemas:
+            self.ids(schema)
+
+    def rows(self, table, width):
+        """Packs the rows of `table` as one buffer each."""
+
+        row = struct.Struct(f"<{width}I")
+        intern = self.intern
+        self.parts.extend(row.pack(*[intern(value) for value in values]) for values in table)
+
+    def table(self, header, table):
+        self.ids(header)
+        self.int(len(table))
+        self.rows(table, len(header))
+
+    def string_table(self):
+        """Returns the string table as its length followed by every
+        string as its length and utf-8 bytes."""
+
+        parts = [struct.pack("<I", len(self.strings))]
+        for value in self.strings:
+            data = value.encode()
+            parts.append(struct.pack("<I", len(data)) + data)
+        return b"".join(parts)
+
+
+class Unpacker():
+    """
+    A reader of the buffers written by `Packer`.
+
+    Attributes
+    ----------
+    data : bytes
+        The buffer being read.
+    offset : int
+        The position of the next value to read.
+    strings : list[str]
+        The string table.
+    """
+
+    def __init__(self, data, offset=0):
+        self.data = data
+        self.offset = offset
+        self.strings = []
+
+    def int(self):
+        (value,) = struct.unpack_from("<I", self.data, self.offset)
+        self.offset += 4
+        return value
+
+    def string(self, index):
+        return None if index == NONE else self.strings[index]
+
+    def string_table(self):
+        for _ in range(self.int()):
+            length = self.int()
+            self.strings.append(self.data[self.offset:self.offset + length].decode())
+            self.offset += length
+
+    def ids(self):
+        """Returns a list of strings packed by `Packer.ids`."""
+
+        count = self.int()
+        ids = struct.unpack_from(f"<{count}I", self.data, self.offset)
+        self.offset += 4 * count
+        return [self.strings[index] for index in ids]
+
+    def dependencies(self):
+        return [[self.ids(), self.ids()] for _ in range(self.int())]
+
+    def schemas(self):
+        return [self.ids() for _ in range(self.int())]
+
+    def rows(self, count, width):
+        """Returns `count` rows of `width` strings packed by
+        `Packer.rows`."""
+
+        row = struct.Struct(f"<{width}I")
+        strings = self.strings
+        table = []
+        for _ in range(count):
+            table.append([strings[index] for index in row.unpack_from(self.data, self.offset)])
+            self.offset += row.size
+        return table
+
+    def table(self):
+        header = self.ids()
+        return header, self.rows(self.int(), len(header))
+
+
+def pack_document(document):
+    """Returns a document in the form of `xml_io.read_document`, other
+    than a trace, as bytes."""
+
+    kind = document["kind"]
+    packer = Packer()
+    if kind == "problem":
+        relation = document["relation"]
+        queries = document.get("queries", [document["query"]])
+        packer.int(packer.intern(relation.name))
+        packer.ids(relation.attributes)
+        packer.dependencies(relation.functional_dependencies)
+        packer.dependencies(relation.multivalued_dependencies)
+        packer.int(len(queries))
+        for query in queries:
+            packer.int(packer.intern(query.task))
+            packer.dependencies(query.functional_dependencies)
+            packer.dependencies(query.multivalued_dependencies)
+            packer.int(len(query.relations))
+            for subschema in query.relations:
+                packer.int(packer.intern(subschema.name))
+                packer.ids(subschema.attributes)
+        code = PROBLEM
+    elif kind == "results":
+        packer.int(len(document["results"]))
+        for result in document["results"]:
+            pack_result(packer, result)
+        code = RESULTS
+    elif kind == "cover":
+        packer.int(document.get("step_number", NONE))
+        packer.dependencies(document["fds"])
+        code = COVER
+    elif kind == "schemas":
+        packer.int(packer.intern(document.get("task")))
+        packer.int(document.get("step_number", NONE))
+        packer.schemas(document["schemas"])
+        code = SCHEMAS
+    elif kind == "result":
+        pack_answer(packer, document)
+        packer.table(document["header"], document["table"])
+        if "lost" in document:
+            packer.dependencies(document["lost"])
+        code = RESULT
+    else:
+        packer.int(document["step_number"])
+        packer.table(document["header"], document["table"])
+        code = TABLE
+    return MAGIC + bytes([VERSION, code]) + packer.string_table() + b"".join(packer.parts)
+
+
+def pack_result(packer, result):
+    """Packs the result of one of several queries, in the form of
+    `MemoryIO.to_json`: its task, its answer, minimum cover or schemas, its table
+    if it has one and its trace if it was traced."""
+
+    packer.int(packer.intern(result["task"]))
+    if "answer" in result:
+        pack_answer(packer, result)
+        if "lost" in result:
+            packer.dependencies(result["lost"])
+    elif "minimum_cover" in result:
+        packer.int(MIN_COVER_ANSWER)
+        packer.dependencies(result["minimum_cover"])
+    elif "schemas" in result:
+        packer.int(SCHEMAS_ANSWER)
+        packer.schemas(result["schemas"])
+    else:
+        packer.int(NONE)
+    if "header" in result:
+        packer.int(1)
+        packer.table(result["header"], result["table"])
+    else:
+        packer.int(0)
+    if "trace" not in result:
+        packer.int(NONE)
+        return
+    packer.int(len(result["trace"]))
+    for step in result["trace"]:
+        packer.int(step["step"])
+        if "minimum_cover" in step:
+            packer.int(1)
+            packer.dependencies(step["minimum_cover"])
+        elif "schemas" in step:
+            packer.int(2)
+            packer.schemas(step["schemas"])
+        else:
+            packer.int(0)
+            packer.int(len(step["table"]))
+            packer.rows(step["table"], len(result["header"]))
+
+
+def pack_answer(packer, result):
+    """Packs the answer of a result with its flags, followed by the limit
+    its chase stopped at if there is one."""
+
+    flags = (LOST if "lost" in result else 0) | (LIMIT if "limit" in result else 0)
+    packer.int((YES if result["answer"] else NO) | flags)
+    if "limit" in result:
+        packer.int(packer.intern(result["limit"]))
+
+
+def unpack_answer(unpacker, answer, result):
+    """Sets the answer of `result` from the packed `answer`, and the limit
+    that follows it if there is one."""
+
+    if answer & LIMIT:
+        result["answer"] = None
+        result["limit"] = unpacker.string(unpacker.int())
+    else:
+        result["answer"] = answer & YES == YES
+
+
+def unpack_result(unpacker):
+    """Returns a result packed by `pack_result`."""
+
+    result = {"task": unpacker.string(unpacker.int())}
+    answer = unpacker.int()
+    if answer == MIN_COVER_ANSWER:
+        result["minimum_cover"] = unpacker.dependencies()
+    elif answer == SCHEMAS_ANSWER:
+        result["schemas"] = unpacker.schemas()
+    elif answer != NONE:
+        unpack_answer(unpacker, answer, result)
+        if answer & LOST:
+            result["lost"] = unpacker.dependencies()
+    if unpacker.int():
+        result["header"], result["table"] = unpacker.table()
+    count = unpacker.int()
+    if count == NONE:
+        return result
+    result["trace"] = []
+    for _ in range(count):
+        step = {"step": unpacker.int()}
+        kind = unpacker.int()
+        if kind == 1:
+            step["minimum_cover"] = unpacker.dependencies()
+        elif kind == 2:
+            step["schemas"] = unpacker.schemas()
+        else:
+            step["table"] = unpacker.rows(unpacker.int(), len(result["header"]))
+        result["trace"].append(step)
+    return result
+
+
+def unpack_document(data):
+    """Returns the document packed by `pack_document` or written by
+    `BinaryTraceWriter` in `data`."""
+
+    if data[:4] != MAGIC or data[4] != VERSION:
+        raise ValueError("not a binary chase document")
+    kind = data[5]
+    if kind == TRACE:
+        return unpack_trace(data)
+    unpacker = Unpacker(data, 6)
+    unpacker.string_table()
+    if kind == PROBLEM:
+        relation = Relation(unpacker.string(unpacker.int()), unpacker.ids())
+        for lhs, rhs in unpacker.dependencies():
+            relation.add_functional_dependency(lhs, rhs)
+        for lhs, rhs in unpacker.dependencies():
+            relation.add_multivalued_dependency(lhs, rhs)
+        queries = []
+        for _ in range(unpacker.int()):
+            query = Query(unpacker.string(unpacker.int()))
+            for lhs, rhs in unpacker.dependencies():
+                query.add_functional_dependency(lhs, rhs)
+            for lhs, rhs in unpacker.dependencies():
+                query.add_multivalued_dependency(lhs, rhs)
+            for _ in range(unpacker.int()):
+                name = unpacker.string(unpacker.int())
+                query.add_relation(Relation(name, unpacker.ids()))
+            queries.append(query)
+        return {"kind": "problem", "relation": relation, "query": queries[0], "queries": queries}
+    if kind == RESULTS:
+        return {"kind": "results", "results": [unpack_result(unpacker) for _ in range(unpacker.int())]}
+    if kind == COVER:
+        step_number = unpacker.int()
+        document = {"kind": "cover", "fds": unpacker.dependencies()}
+        if step_number != NONE:
+            document["step_number"] = step_number
+        return document
+    if kind == SCHEMAS:
+        task = unpacker.string(unpacker.int())
+        step_number = unpacker.int()
+        document = {"kind": "schemas", "schemas": unpacker.schemas()}
+        if task is not None:
+            document["task"] = task
+        if step_number != NONE:
+            document["step_number"] = step_number
+        return document
+    value = unpacker.int()
+    document = {"kind": KINDS[kind]}
+    if kind == RESULT:
+        unpack_answer(unpacker, value, document)
+    else:
+        document["step_number"] = value
+    document["header"], document["table"] = unpacker.table()
+    if kind == RESULT and value & LOST:
+        document["lost"] = unpacker.dependencies()
+    return document
+
+
+class BinaryTraceWriter(Packer):
+    """
+    A class used to write the trace of a chase as a binary stream, with
+    the same deltas as `TraceWriter`.
+
+    The stream starts like a binary document of kind `TRACE` and is
+    followed by records, each a one byte tag and its fields: a new
+    string of the string table, the header, a full table, a delta of
+    the changed (row, column, string) cells and the added rows, a
+    minimum cover, or the keys or subschemas of a schema design step. Strings are added to the stream before the first
+    record that uses them. Like a `TraceWriter`, it writes to a partial
+    file until it is closed.
+    """
+
+    def __init__(self, filename):
+        super().__init__()
+        self.filename = str(filename)
+        opener = gzip.open if self.filename.endswith(".gz") else open
+        self.file = opener(partial_path(self.filename), "wb")
+        self.file.write(MAGIC + bytes([VERSION, TRACE]))
+        self.header = None
+        self.previous = None
+
+    def new_string(self, value):
+        data = value.encode()
+        self.file.write(STRING + struct.pack("<I", len(data)) + data)
+
+    def flush(self, tag):
+        """Writes the record `tag` with the fields packed since the last
+        record."""
+
+        self.file.write(tag + b"".join(self.parts))
+        self.parts = []
+
+    def write_header(self, schema):
+        """Writes the attributes of the table once, in column order."""
+
+        if self.header is None:
+            self.header = sorted(schema, key=schema.get)
+            self.ids(self.header)
+            self.flush(HEADER)
+
+    def write_table(self, schema, table, step_number):
+        """Writes the table at `step_number`, as a delta of the previous
+        table written if there is one."""
+
+        self.write_header(schema)
+        rows = [tuple(str(value) for value in row) for row in table]
+        cells = table_delta(self.previous, rows)
+        self.int(step_number)
+        if cells is None:
+            self.int(len(rows))
+            self.rows(rows, len(self.header))
+            self.flush(FULL)
+        else:
+            self.int(len(cells))
+            self.parts.append(struct.pack(f"<{3 * len(cells)}I",
+                                          *[value for i, j, symbol in cells
+                                            for value in (i, j, self.intern(symbol))]))
+            self.int(len(rows) - len(self.previous))
+            self.rows(rows[len(self.previous):], len(self.header))
+            self.flush(DELTA)
+        self.previous = rows
+
+    def write_min_cov(self, fds, step_number):
+        """Writes the functional dependencies of a minimum cover step."""
+
+        self.int(step_number)
+        self.dependencies(fds)
+        self.flush(MIN_COVER)
+
+    def write_schemas(self, schemas, step_number):
+        """Writes the keys or subschemas of a schema design step."""
+
+        self.int(step_number)
+        self.schemas(schemas)
+        self.flush(SCHEMA_STEP)
+
+    def close(self):
+        self.file.close()
+        os.replace(partial_path(self.filename), self.filename)
+
+
+def unpack_trace(data):
+    """Returns the trace in the stream `data`, written by
+    `BinaryTraceWriter`, as a document with its `header` and `steps`."""
+
+    unpacker = Unpacker(data, 6)
+    header = None
+    steps = []
+    table = []
+    while unpacker.offset < len(data):
+        tag = data[unpacker.offset:unpacker.offset + 1]
+        unpacker.offset += 1
+        if tag == STRING:
+            length = unpacker.int()
+            unpacker.strings.append(data[unpacker.offset:unpacker.offset + length].decode())
+            unpacker.offset += length
+        elif tag == HEADER:
+            header = unpacker.ids()
+        elif tag == MIN_COVER:
+            step_number = unpacker.int()
+            steps.append({"step": step_number, "minimum_cover": unpacker.dependencies()})
+        elif tag == SCHEMA_STEP:
+            step_number = unpacker.int()
+            steps.append({"step": step_number, "schemas": unpacker.schemas()})
+        elif tag == FULL:
+            step_number = unpacker.int()
+            table = unpacker.rows(unpacker.int(), len(header))
+            steps.append({"step": step_number, "table": table})
+        elif tag == DELTA:
+            step_number = unpacker.int()
+            table = [list(row) for row in table]
+            count = unpacker.int()
+            cells = struct.unpack_from(f"<{3 * count}I", data, unpacker.offset)
+            unpacker.offset += 12 * count
+            for k in range(0, len(cells), 3):
+                table[cells[k]][cells[k + 1]] = unpacker.strings[cells[k + 2]]
+            table += unpacker.rows(unpacker.int(), len(header))
+            steps.append({"step": step_number, "table": table})
+        else:
+            raise ValueError(f"unknown record {tag!r} in binary trace")
+    return {"kind": "trace", "header": header, "steps": steps}
+
+
+def read_document(filename):
+    """Returns the document in the binary file `filename` in the form of
+    `xml_io.read_document`."""
+
+    opener = gzip.open if str(filename).endswith(".gz") else open
+    with opener(filename, "rb") as file:
+        return unpack_document(file.read())
+
+
+def write_document(document, filename):
+    """Writes a document in the form of `xml_io.read_document` to the
+    binary file `filename`."""
+
+    if document["kind"] == "trace":
+        writer = BinaryTraceWriter(filename)
+        schema = {attr: idx for idx, attr in enumerate(document["header"] or [])}
+        for step in document["steps"]:
+            if "minimum_cover" in step:
+                writer.write_min_cov(step["minimum_cover"], step["step"])
+            elif "schemas" in step:
+                writer.write_schemas(step["schemas"], step["step"])
+            else:
+                writer.write_table(schema, step["table"], step["step"])
+        writer.close()
+        return
+    opener = gzip.open if str(filename).endswith(".gz") else open
+    partial = partial_path(filename)
+    with opener(partial, "wb") as file:
+        file.write(pack_document(document))
+    os.replace(partial, filename)
+
+
+class BinaryIO(XMLIO):
+    """
+    A class used to write the result and trace of a chase as binary
+    documents, in the same files as `XMLIO` with a `.chase` extension.
+    """
+
+    def get_trace(self):
+        """Returns the trace stream, opening it on first use."""
+
+        if self.trace is None:
+            self.trace = BinaryTraceWriter(self.get_trace_filename())
+        return self.trace
+
+    def write_intermediate_result(self, schema, table, step_number):
+        """Writes an intermediate result of the chase algorithm."""
+
+        if not self.should_trace():
+            return
+        if self.trace_format == TRACE_STREAM:
+            self.get_trace().write_table(schema, table, step_number)
+            return
+        write_document({"kind": "table", "header": sorted(schema, key=schema.get),
+                        "table": table, "step_number": step_number},
+                       self.get_intermediate_filename(step_number))
+
+    def write_min_cov(self, fds, step_number):
+        """Writes the minimum cover of a relation."""
+
+        if not self.should_trace():
+            return
+        if self.trace_format == TRACE_STREAM:
+            self.get_trace().write_min_cov(fds, step_number)
+            return
+        write_document({"kind": "cover", "fds": fds, "step_number": step_number},
+                       self.get_intermediate_filename(step_number))
+
+    def write_schemas(self, schemas, step_number):
+        """Writes the keys or subschemas of a schema design step."""
+
+        if not self.should_trace():
+            return
+        if self.trace_format == TRACE_STREAM:
+            self.get_trace().write_schemas(schemas, step_number)
+            return
+        write_document({"kind": "schemas", "schemas": schemas, "step_number": step_number},
+                       self.get_intermediate_filename(step_number))
+
+    def write_cover(self, fds):
+        """Writes the minimum cover of a minimal cover task to `self.output`."""
+
+        self.close()
+        write_document({"kind": "cover", "fds": fds}, self.output)
+
+    def write_design(self, task, schemas):
+        """Writes the result of a schema design task to `self.output`."""
+
+        self.close()
+        write_document({"kind": "schemas", "task": task, "schemas": schemas}, self.output)
+
+    def write_result(self, schema, table, answer, lost=None, limit=None):
+        """Writes the result of the chase algorithm to `self.output`."""
+
+        self.close()
+        self.result = (schema, table, answer)
+        self.limit = limit
+        document = {"kind": "result", "header": sorted(schema, key=schema.get), "table": table, "answer": answer}
+        if lost is not None:
+            document["lost"] = lost
+        if limit is not None:
+            document["limit"] = limit
+        write_document(document, self.output)
+
+    def write_results(self, results):
+        """Writes the results of several queries to `self.output`."""
+
+        self.close()
+        write_document({"kind": "results", "results": results}, self.output)
@@ -0,0 +1,55 @@
+from classes import binary_io, json_io, xml_io
+from classes.binary_io import BinaryIO
+from classes.json_io import JSONIO
+from classes.xml_io import XMLIO, detect_format
+from utils.common import BINARY_FORMAT, JSON_FORMAT, XML_FORMAT
+
+# the io class, document reader and document writer of every format
+IO_CLASSES = {XML_FORMAT: XMLIO, JSON_FORMAT: JSONIO, BINARY_FORMAT: BinaryIO}
+READERS = {XML_FORMAT: xml_io.read_document, JSON_FORMAT: json_io.read_document,
+           BINARY_FORMAT: binary_io.read_document}
+WRITERS = {XML_FORMAT: xml_io.write_document, JSON_FORMAT: json_io.write_document,
+           BINARY_FORMAT: binary_io.write_document}
+
+
+def create_io(input, output, *args, **kwargs):
+    """Returns the reader and writer of a chase, which writes the result
+    and traces in the format of the extension of `output`. The input is
+    read in the format of its own extension. The other arguments are
+    those of `XMLIO`."""
+
+    return IO_CLASSES[detect_format(output)](input, output, *args, **kwargs)
+
+
+def read_problem_file(filename):
+    """Returns the `Relation` of the problem statement in `filename` and
+    the list of its queries, read in the format of its extension."""
+
+    document = read_document(filename)
+    if document["kind"] != "problem":
+        raise ValueError(f"{filename} is a {document['kind']}, not a problem statement")
+    return (document["relation"], document["queries"])
+
+
+def read_document(filename):
+    """Returns the problem, result, results, intermediate table, minimum
+    cover, keys or subschemas, or trace stream in `filename`, read in the
+    format of its extension, in the form of `xml_io.read_document`."""
+
+    return READERS[detect_format(filename)](filename)
+
+
+def write_document(document, filename):
+    """Writes a document in the form of `xml_io.read_document` in the
+    format of the extension of `filename`."""
+
+    WRITERS[detect_format(filename)](document, filename)
+
+
+def convert(input, output):
+    """Converts the document in `input` to the format of `output` and
+    returns its kind."""
+
+    document = read_document(input)
+    write_document(document, output)
+    return document["kind"]
@@ -0,0 +1,367 @@
+import gzip
+import json
+import os
+from pathlib import Path
+
+from classes.Query import Query
+from classes.Relation import Relation
+from classes.trace_io import partial_path, table_delta
+from classes.xml_io import XMLIO
+from utils.common import TRACE_STREAM
+
+
+def read_problem(data):
+    """Returns the `Relation` and `Query` of a problem statement in json,
+    given as a string or as the already parsed document.
+
+    The document has the same structure as the xml format:
+
+        {"relation": {"name": "R", "attributes": ["A", "B", "C"],
+                      "functional_dependencies": [[["A"], ["B"]]],
+                      "multivalued_dependencies": []},
+         "query": {"type": "lossless_join",
+                   "functional_dependencies": [],
+                   "multivalued_dependencies": [],
+                   "relations": [{"name": "R1", "attributes": ["A", "B"]},
+                                 {"name": "R2", "attributes": ["A", "C"]}]}}
+
+    Lists that are empty may be left out. Only the first query of a
+    document with several is returned.
+    """
+
+    relation, queries = read_problems(data)
+    return (relation, queries[0])
+
+
+def read_problems(data):
+    """Returns the `Relation` of a problem statement in json and the
+    list of its queries, given either as a single `query` or as a list
+    of `queries`, in the form of `read_problem`."""
+
+    if isinstance(data, (str, bytes)):
+        data = json.loads(data)
+    table = data["relation"]
+    relation = Relation(table.get("name"), list(table["attributes"]))
+    for lhs, rhs in table.get("functional_dependencies", []):
+        relation.add_functional_dependency(list(lhs), list(rhs))
+    for lhs, rhs in table.get("multivalued_dependencies", []):
+        relation.add_multivalued_dependency(list(lhs), list(rhs))
+
+    queries = []
+    for check in data["queries"] if "queries" in data else [data["query"]]:
+        query = Query(check["type"])
+        for lhs, rhs in check.get("functional_dependencies", []):
+            query.add_functional_dependency(list(lhs), list(rhs))
+        for lhs, rhs in check.get("multivalued_dependencies", []):
+            query.add_multivalued_dependency(list(lhs), list(rhs))
+        for subschema in check.get("relations", []):
+            query.add_relation(Relation(subschema.get("name"), list(subschema["attributes"])))
+        queries.append(query)
+    return (relation, queries)
+
+
+def problem_to_json(relation, *queries):
+    """Returns a problem statement as a json serialisable dict in the
+    format read by `read_problems`, with a single `query` or, if there
+    are several, a list of `queries`."""
+
+    checks = [{
+        "type": query.task,
+        "functional_dependencies": [[list(lhs), list(rhs)] for lhs, rhs in query.functional_dependencies],
+        "multivalued_dependencies": [[list(lhs), list(rhs)] for lhs, rhs in query.multivalued_dependencies],
+        "relations": [{"name": subschema.name, "attributes": list(subschema.attributes)}
+                      for subschema in query.relations],
+    } for query in queries]
+    data = {
+        "relation": {
+            "name": relation.name,
+            "attributes": list(relation.attributes),
+            "functional_dependencies": [[list(lhs), list(rhs)] for lhs, rhs in relation.functional_dependencies],
+            "multivalued_dependencies": [[list(lhs), list(rhs)] for lhs, rhs in relation.multivalued_dependencies],
+        },
+    }
+    if len(checks) == 1:
+        data["query"] = checks[0]
+    else:
+        data["queries"] = checks
+    return data
+
+
+class JSONIO(XMLIO):
+    """
+    A class used to write the result and trace of a chase as json, in
+    the same files as `XMLIO` with a `.json` extension.
+
+    An intermediate table is written as `{"header", "table",
+    "step_number"}`, a minimum cover as `{"minimum_cover",
+    "step_number"}`, the keys or subschemas of a schema design task as
+    `{"schemas", "step_number"}` and at the end as `{"task", "schemas"}`,
+    the result as `{"header", "table", "answer"}`, with the `"lost"`
+    dependencies of a dependency preservation problem, or a null answer
+    and the `"limit"` a chase stopped at, and the results
+    of several queries as `{"results"}`.
+    The trace stream is a `.jsonl` file written by `JSONTraceWriter`.
+    """
+
+    def get_trace_filename(self):
+        """Returns the filename of the trace stream."""
+
+        path = Path(self.output)
+        return path.parent / f"{path.stem}_trace.jsonl{'.gz' if self.compress else ''}"
+
+    def get_trace(self):
+        """Returns the trace stream, opening it on first use."""
+
+        if self.trace is None:
+            self.trace = JSONTraceWriter(self.get_trace_filename())
+        return self.trace
+
+    def write_intermediate_result(self, schema, table, step_number):
+        """Writes an intermediate result of the chase algorithm."""
+
+        if not self.should_trace():
+            return
+        if self.trace_format == TRACE_STREAM:
+            self.get_trace().write_table(schema, table, step_number)
+            return
+        write_document({"kind": "table", "header": sorted(schema, key=schema.get),
+                        "table": table, "step_number": step_number},
+                       self.get_intermediate_filename(step_number))
+
+    def write_min_cov(self, fds, step_number):
+        """Writes the minimum cover of a relation."""
+
+        if not self.should_trace():
+            return
+        if self.trace_format == TRACE_STREAM:
+            self.get_trace().write_min_cov(fds, step_number)
+            return
+        write_document({"kind": "cover", "fds": fds, "step_number": step_number},
+                       self.get_intermediate_filename(step_number))
+
+    def write_schemas(self, schemas, step_number):
+        """Writes the keys or subschemas of a schema design step."""
+
+        if not self.should_trace():
+            return
+        if self.trace_format == TRACE_STREAM:
+            self.get_trace().write_schemas(schemas, step_number)
+            return
+        write_document({"kind": "schemas", "schemas": schemas, "step_number": step_number},
+                       self.get_intermediate_filename(step_number))
+
+    def write_cover(self, fds):
+        """Writes the minimum cover of a minimal cover task to `self.output`."""
+
+        self.close()
+        write_document({"kind": "cover", "fds": fds}, self.output)
+
+    def write_design(self, task, schemas):
+        """Writes the result of a schema design task to `self.output`."""
+
+        self.close()
+        write_document({"kind": "schemas", "task": task, "schemas": schemas}, self.output)
+
+    def write_result(self, schema, table, answer, lost=None, limit=None):
+        """Writes the result of the chase algorithm to `self.output`."""
+
+        self.close()
+        self.result = (schema, table, answer)
+        self.limit = limit
+        document = {"kind": "result", "header": sorted(schema, key=schema.get), "table": table, "answer": answer}
+        if lost is not None:
+            document["lost"] = lost
+        if limit is not None:
+            document["limit"] = limit
+        write_document(document, self.output)
+
+    def write_results(self, results):
+        """Writes the results of several queries to `self.output`."""
+
+        self.close()
+        write_document({"kind": "results", "results": results}, self.output)
+
+
+class JSONTraceWriter():
+    """
+    A class used to write the trace of a chase as json lines, with the
+    same deltas as `TraceWriter`.
+
+    The first line is `{"header": [...]}`. A table is written in full as
+    `{"step", "table"}` and later as `{"step", "cells", "rows"}`, the
+    changed `[row, column, value]` cells and the added rows. A minimum
+    cover is written as `{"step", "minimum_cover"}` and the keys or
+    subschemas of a schema design step as `{"step", "schemas"}`. Like a
+    `TraceWriter`, it writes to a partial file until it is closed.
+    """
+
+    def __init__(self, filename):
+        self.filename = str(filename)
+        opener = gzip.open if self.filename.endswith(".gz") else open
+        self.file = opener(partial_path(self.filename), "wt", encoding="utf-8")
+        self.header = None
+        self.previous = None
+
+    def write_line(self, data):
+        self.file.write(json.dumps(data, separators=(",", ":")))
+        self.file.write("\n")
+
+    def write_header(self, schema):
+        """Writes the attributes of the table once, in column order."""
+
+        if self.header is None:
+            self.header = sorted(schema, key=schema.get)
+            self.write_line({"header": self.header})
+
+    def write_table(self, schema, table, step_number):
+        """Writes the table at `step_number`, as a delta of the previous
+        table written if there is one."""
+
+        self.write_header(schema)
+        rows = [tuple(str(value) for value in row) for row in table]
+        cells = table_delta(self.previous, rows)
+        if cells is None:
+            self.write_line({"step": step_number, "table": rows})
+        else:
+            self.write_line({"step": step_number, "cells": cells, "rows": rows[len(self.previous):]})
+        self.previous = rows
+
+    def write_min_cov(self, fds, step_number):
+        """Writes the functional dependencies of a minimum cover step."""
+
+        self.write_line({"step": step_number, "minimum_cover": [[list(lhs), list(rhs)] for lhs, rhs in fds]})
+
+    def write_schemas(self, schemas, step_number):
+        """Writes the keys or subschemas of a schema design step."""
+
+        self.write_line({"step": step_number, "schemas": [list(schema) for schema in schemas]})
+
+    def close(self):
+        self.file.close()
+        os.replace(partial_path(self.filename), self.filename)
+
+
+def read_json_trace(filename):
+    """Returns the header of a trace written by `JSONTraceWriter` and a
+    generator of its steps, as dicts with the `step` number and either
+    the `table`, with deltas applied, the `minimum_cover` or the
+    `schemas`."""
+
+    opener = gzip.open if str(filename).endswith(".gz") else open
+    with opener(filename, "rt", encoding="utf-8") as file:
+        lines = [json.loads(line) for line in file if line.strip()]
+    header = lines[0]["header"] if lines and "header" in lines[0] else None
+
+    def steps():
+        table = []
+        for line in lines:
+            if "minimum_cover" in line:
+                yield {"step": line["step"], "minimum_cover": line["minimum_cover"]}
+            elif "schemas" in line:
+                yield {"step": line["step"], "schemas": line["schemas"]}
+            elif "table" in line:
+                table = [list(row) for row in line["table"]]
+                yield {"step": line["step"], "table": table}
+            elif "cells" in line:
+                table = [list(row) for row in table]
+                for i, j, value in line["cells"]:
+                    table[i][j] = value
+                table += [list(row) for row in line["rows"]]
+                yield {"step": line["step"], "table": table}
+    return header, steps()
+
+
+def is_stream(filename):
+    """Returns whether `filename` is a json lines file, which holds a
+    trace stream and nothing else."""
+
+    return str(filename).lower().endswith((".jsonl", ".jsonl.gz"))
+
+
+def read_document(filename):
+    """Returns the document in the json file `filename` in the form of
+    `xml_io.read_document`. A `.jsonl` file is read as a trace stream and
+    any other as a single document."""
+
+    if is_stream(filename):
+        header, steps = read_json_trace(filename)
+        return {"kind": "trace", "header": header, "steps": list(steps)}
+    with open(filename, encoding="utf-8") as file:
+        data = json.load(file)
+    if "relation" in data:
+        relation, queries = read_problems(data)
+        return {"kind": "problem", "relation": relation, "query": queries[0], "queries": queries}
+    if "results" in data:
+        return {"kind": "results", "results": data["results"]}
+    if "minimum_cover" in data:
+        document = {"kind": "cover", "fds": data["minimum_cover"]}
+        if "step_number" in data:
+            document["step_number"] = data["step_number"]
+        return document
+    if "schemas" in data:
+        document = {"kind": "schemas", "schemas": data["schemas"]}
+        for key in ("task", "step_number"):
+            if key in data:
+                document[key] = data[key]
+        return document
+    document = {"header": data["header"], "table": data["table"]}
+    if "answer" in data:
+        document.update(kind="result", answer=data["answer"])
+        for key in ("lost", "limit"):
+            if key in data:
+                document[key] = data[key]
+    else:
+        document.update(kind="table", step_number=data["step_number"])
+    return document
+
+
+def write_document(document, filename):
+    """Writes a document in the form of `xml_io.read_document` to the
+    json file `filename`. A trace stream is only written to a `.jsonl`
+    file and any other document only to a `.json` file, so that
+    `read_document` reads it back in the same format."""
+
+    kind = document["kind"]
+    if (kind == "trace") != is_stream(filename):
+        expected = ".jsonl" if kind == "trace" else ".json"
+        raise ValueError(f"a {kind} is written to a {expected} file, not {filename}")
+    if kind == "trace":
+        writer = JSONTraceWriter(filename)
+        schema = {attr: idx for idx, attr in enumerate(document["header"] or [])}
+        for step in document["steps"]:
+            if "minimum_cover" in step:
+                writer.write_min_cov(step["minimum_cover"], step["step"])
+            elif "schemas" in step:
+                writer.write_schemas(step["schemas"], step["step"])
+            else:
+                writer.write_table(schema, step["table"], step["step"])
+        writer.close()
+        return
+    if kind == "problem":
+        data = problem_to_json(document["relation"], *document.get("queries", [document["query"]]))
+    elif kind == "results":
+        data = {"results": document["results"]}
+    elif kind == "cover":
+        data = {"minimum_cover": [[list(lhs), list(rhs)] for lhs, rhs in document["fds"]]}
+        if "step_number" in document:
+            data["step_number"] = document["step_number"]
+    elif kind == "schemas":
+        data = {"schemas": [list(schema) for schema in document["schemas"]]}
+        for key in ("task", "step_number"):
+            if key in document:
+                data[key] = document[key]
+    else:
+        data = {"header": list(document["header"]),
+                "table": [[str(value) for value in row] for row in document["table"]]}
+        if kind == "result":
+            data["answer"] = document["answer"]
+            if "lost" in document:
+                data["lost"] = [[list(lhs), list(rhs)] for lhs, rhs in document["lost"]]
+            if "limit" in document:
+                data["limit"] = document["limit"]
+        else:
+            data["step_number"] = document["step_number"]
+    partial = partial_path(filename)
+    with open(partial, "w", encoding="utf-8") as file:
+        json.dump(data, file, separators=(",", ":"))
+    os.replace(partial, filename)
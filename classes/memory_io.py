@@ -0,0 +1,125 @@
+from classes.xml_io import XMLIO
+from utils.common import TRACE_NONE
+
+
+class MemoryIO(XMLIO):
+    """
+    A class used to chase a problem that is already in memory and to
+    keep its result and trace in memory instead of writing files.
+
+    It reads and writes like `XMLIO`, so it can be passed to `solve`,
+    and applies the same trace levels.
+
+    Attributes
+    ----------
+    relation : Relation
+        The relation of the problem.
+    query : Query
+        The query of the problem.
+    queries : list[Query]
+        Every query of the problem, the query alone unless several are
+        asked about the relation.
+    steps : list[dict]
+        Every traced step, as its step number and either its table, its
+        minimum cover or its keys or subschemas.
+    lost : list | None
+        The functional dependencies a decomposition does not preserve,
+        for a dependency preservation problem.
+    schemas : list[list[str]] | None
+        The candidate keys or subschemas found by a schema design task.
+    results : list[dict] | None
+        The results of several queries, in the form of `to_json`, once
+        they are written.
+    """
+
+    def __init__(self, relation, query, trace_level=TRACE_NONE, trace_every=1, queries=None):
+        super().__init__(None, None, trace_level, trace_every)
+        self.relation = relation
+        self.query = query
+        self.queries = queries or [query]
+        self.task = query.task
+        self.steps = []
+        self.results = None
+        self.lost = None
+        self.schemas = None
+
+    def read_xml(self):
+        """Returns the `Relation` and `Query` of the problem."""
+
+        return (self.relation, self.query)
+
+    def read_problems(self):
+        """Returns the `Relation` and every `Query` of the problem."""
+
+        return (self.relation, self.queries)
+
+    def write_intermediate_result(self, schema, table, step_number):
+        """Keeps a copy of the table at `step_number` if it is traced."""
+
+        if self.should_trace():
+            self.steps.append({"step": step_number, "table": [[str(value) for value in row] for row in table]})
+
+    def write_min_cov(self, fds, step_number):
+        """Keeps the minimum cover at `step_number` if it is traced."""
+
+        if self.should_trace():
+            self.steps.append({"step": step_number,
+                               "minimum_cover": [[list(lhs), list(rhs)] for lhs, rhs in fds]})
+
+    def write_schemas(self, schemas, step_number):
+        """Keeps the keys or subschemas at `step_number` if it is traced."""
+
+        if self.should_trace():
+            self.steps.append({"step": step_number, "schemas": [list(schema) for schema in schemas]})
+
+    def write_cover(self, fds):
+        """Does nothing, as the cover is the answer of the task."""
+
+    def write_design(self, task, schemas):
+        """Keeps the result of a schema design task."""
+
+        self.schemas = [list(schema) for schema in schemas]
+
+    def write_result(self, schema, table, answer, lost=None, limit=None):
+        """Keeps the result of the chase."""
+
+        self.result = (schema, [[str(value) for value in row] for row in table], answer)
+        self.lost = lost
+        self.limit = limit
+
+    def write_results(self, results):
+        """Keeps the results of several queries."""
+
+        self.results = results
+
+    def close(self):
+        pass
+
+    def to_json(self, answer):
+        """Returns `answer`, the final table and the trace as a json
+        serialisable dict, or the `results` of several queries. The
+        answer of a chase that stopped at a limit is None, with the
+        `limit`."""
+
+        if self.results is not None:
+            return {"results": self.results}
+        response = {"task": self.task}
+        if self.limit is not None:
+            # the chase stopped at a limit, so the answer is unknown
+            response["answer"] = None
+            response["limit"] = self.limit
+        elif isinstance(answer, bool):
+            response["answer"] = answer
+            if self.lost is not None:
+                response["lost"] = [[list(lhs), list(rhs)] for lhs, rhs in self.lost]
+        elif self.schemas is not None:
+            response["schemas"] = self.schemas
+        elif answer is not None:
+            response["minimum_cover"] = [[list(lhs), list(rhs)] for lhs, rhs in answer]
+        if self.result is not None:
+            schema, table, _ = self.result
+            response["header"] = sorted(schema, key=schema.get)
+            response["table"] = table
+        if self.steps:
+            response["trace"] = self.steps
+        return response
@@ -0,0 +1,212 @@
+import gzip
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+
+def partial_path(filename):
+    """Returns the path `filename` is written to until it is complete: a
+    hidden file next to it, which is then moved over it in one step."""
+
+    path = Path(str(filename))
+    return path.with_name(f".{path.name}.partial")
+
+
+class TraceWriter:
+    """
+    A class used to write the trace of a chase as one stream of steps.
+
+    The first table written is stored in full. Every later table is
+    stored as the cells that changed since the previous table written,
+    followed by the rows that were added, so the stream stays small
+    when a step only touches a few cells. Minimum cover and schema
+    design steps are always stored in full.
+
+    The stream is written to a partial file that only replaces the
+    trace file once it is closed, so a chase that stops or is killed
+    part way never leaves a half-written trace.
+
+    Attributes
+    ----------
+    filename : str
+        The path of the trace file, gzip-compressed if it ends with `.gz`.
+    previous : list[tuple[str, ...]] | None
+        The last table written, to compute the next delta against.
+    """
+
+    def __init__(self, filename):
+        self.filename = str(filename)
+        opener = gzip.open if self.filename.endswith(".gz") else open
+        self.file = opener(partial_path(self.filename), "wt", encoding="utf-8")
+        self.file.write("<trace>")
+        self.header = None
+        self.previous = None
+
+    def write_header(self, schema):
+        """Writes the attributes of the table once, in column order."""
+
+        if self.header is not None:
+            return
+        self.header = sorted(schema, key=schema.get)
+        self.file.write("<header>")
+        for attr in self.header:
+            self.file.write(f"<attribute>{escape(attr)}</attribute>")
+        self.file.write("</header>")
+
+    def write_table(self, schema, table, step_number):
+        """Writes the table at `step_number`, as a delta of the previous
+        table written if there is one."""
+
+        self.write_header(schema)
+        rows = [tuple(str(value) for value in row) for row in table]
+        write = self.file.write
+        cells = table_delta(self.previous, rows)
+        full = cells is None
+        if full:
+            write(f'<step number="{step_number}"><table>')
+            start = 0
+        else:
+            write(f'<step number="{step_number}">')
+            for i, j, value in cells:
+                write(f'<cell row="{i}" column="{j}">{escape(value)}</cell>')
+            start = len(self.previous)
+        for row in rows[start:]:
+            write("<row>")
+            for value in row:
+                write(f"<value>{escape(value)}</value>")
+            write("</row>")
+        write("</table></step>" if full else "</step>")
+        self.previous = rows
+
+    def write_min_cov(self, fds, step_number):
+        """Writes the functional dependencies of a minimum cover step."""
+
+        write = self.file.write
+        write(f'<step number="{step_number}"><minimum_cover>')
+        for lhs, rhs in fds:
+            write("<functional_dependency><lhs>")
+            for attr in lhs:
+                write(f"<attribute>{escape(attr)}</attribute>")
+            write("</lhs><rhs>")
+            for attr in rhs:
+                write(f"<attribute>{escape(attr)}</attribute>")
+            write("</rhs></functional_dependency>")
+        write("</minimum_cover></step>")
+
+    def write_schemas(self, schemas, step_number):
+        """Writes the keys or subschemas of a schema design step."""
+
+        write = self.file.write
+        write(f'<step number="{step_number}"><schemas>')
+        for schema in schemas:
+            write("<schema>")
+            for attr in schema:
+                write(f"<attribute>{escape(attr)}</attribute>")
+            write("</schema>")
+        write("</schemas></step>")
+
+    def close(self):
+        """Ends the stream and closes the file."""
+
+        self.file.write("</trace>")
+        self.file.close()
+        os.replace(partial_path(self.filename), self.filename)
+
+
+def table_delta(previous, rows):
+    """Returns the cells of `rows` that differ from `previous`, as
+    (row, column, value) triples, or None if `rows` has to be stored in
+    full because there is no previous table or it had more rows.
+
+    The rows of `rows` past the end of `previous` are new and are not
+    part of the delta.
+    """
+
+    if previous is None or len(rows) < len(previous):
+        return None
+    cells = []
+    for i, (old, new) in enumerate(zip(previous, rows)):
+        if old == new:
+            continue
+        for j, (before, after) in enumerate(zip(old, new)):
+            if before != after:
+                cells.append((i, j, after))
+    return cells
+
+
+def read_trace(filename):
+    """Yields the step number and the table, as a list of rows, of every
+    step in a trace written by `TraceWriter`, with deltas applied.
+
+    Minimum cover steps yield their functional dependencies and schema
+    design steps their keys or subschemas instead of a table.
+    """
+
+    for step in read_trace_steps(filename):
+        for kind in ("table", "minimum_cover", "schemas"):
+            if kind in step:
+                yield (step["step"], step[kind])
+
+
+def read_trace_steps(filename):
+    """Yields every step in a trace written by `TraceWriter` as a dict
+    with its `step` number and either its `table`, with deltas applied,
+    its `minimum_cover` or its `schemas`."""
+
+    opener = gzip.open if str(filename).endswith(".gz") else open
+    table = []
+    with opener(filename, "rb") as file:
+        for _, elem in ET.iterparse(file, events=("end",)):
+            if elem.tag != "step":
+                continue
+            step_number = int(elem.get("number"))
+            cover = elem.find("minimum_cover")
+            if cover is not None:
+                fds = [[[attr.text for attr in fd.find("lhs")],
+                        [attr.text for attr in fd.find("rhs")]]
+                       for fd in cover.findall("functional_dependency")]
+                yield {"step": step_number, "minimum_cover": fds}
+                elem.clear()
+                continue
+            schemas = elem.find("schemas")
+            if schemas is not None:
+                yield {"step": step_number,
+                       "schemas": [[attr.text for attr in schema] for schema in schemas.findall("schema")]}
+                elem.clear()
+                continue
+            if elem.find("table") is not None:
+                table = []
+                rows = elem.find("table").findall("row")
+            else:
+                table = [list(row) for row in table]
+                for cell in elem.findall("cell"):
+                    table[int(cell.get("row"))][int(cell.get("column"))] = cell.text or ""
+                rows = elem.findall("row")
+            for row in rows:
+                table.append([value.text or "" for value in row])
+            yield {"step": step_number, "table": table}
+            elem.clear()
+
+
+def read_trace_step(filename, step_number):
+    """Returns the table (or minimum cover, or schemas) at `step_number`
+    in a trace written by `TraceWriter`, or None if that step was not
+    written."""
+
+    for number, data in read_trace(filename):
+        if number == step_number:
+            return data
+    return None
+
+
+def read_trace_header(filename):
+    """Returns the attributes of the header of a trace written by
+    `TraceWriter`, or None if it has no header."""
+
+    opener = gzip.open if str(filename).endswith(".gz") else open
+    with opener(filename, "rb") as file:
+        for _, elem in ET.iterparse(file, events=("end",)):
+            if elem.tag == "header":
+                return [attr.text for attr in elem]
+    return None
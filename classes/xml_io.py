@@ -1,7 +1,29 @@
+import gzip
+import os
 import xml.etree.ElementTree as ET
 from pathlib import Path
 from classes.Relation import Relation
 from classes.Query import Query
+from classes.trace_io import TraceWriter, partial_path, read_trace_header, read_trace_steps
+from utils.common import TRACE_EVERY, TRACE_FULL, TRACE_FILES, TRACE_STREAM, XML_FORMAT, JSON_FORMAT, BINARY_FORMAT
+from utils.profiler import IO, profiled
+
+
+# the format of a file, by its extension once any `.gz` is removed
+EXTENSIONS = {".xml": XML_FORMAT, ".json": JSON_FORMAT, ".jsonl": JSON_FORMAT, ".chase": BINARY_FORMAT}
+
+# the text of the answer of a result, None for a chase stopped at a limit
+ANSWERS = {True: 'yes', False: 'no', None: 'unknown'}
+
+
+def detect_format(filename):
+    """Returns the format of `filename` from its extension, xml if the
+    extension is not known."""
+
+    path = Path(str(filename))
+    if path.suffix == ".gz":
+        path = path.with_suffix("")
+    return EXTENSIONS.get(path.suffix.lower(), XML_FORMAT)
 
 
 class XMLIO:
@@ -14,11 +36,38 @@ class XMLIO:
         A string representing the input filename or path.
     output : str
         A string representing the outpu tfilename or path.
+    trace_level : str
+        Which steps are traced: `none`, `final` (only the result),
+        `every` (every `trace_every`-th step) or `full`.
+    trace_every : int
+        The interval between traced steps for the `every` level.
+    trace_format : str
+        `files` to write every traced step to its own file, or `stream`
+        to write them all, as deltas, to a single trace file.
+    compress : bool
+        Whether to gzip-compress the trace stream.
+    result : tuple | None
+        The schema, table and answer of the last result written.
+    limit : str | None
+        The limit the chase of the last result written stopped at, if
+        it stopped at one.
+    queries : list[Query] | None
+        Every query of the problem, once it has been read.
     """
 
-    def __init__(self, input, output):
+    def __init__(self, input, output, trace_level=TRACE_FULL, trace_every=1,
+                 trace_format=TRACE_FILES, compress=False):
         self.input = input
         self.output = output
+        self.trace_level = trace_level
+        self.trace_every = trace_every
+        self.trace_format = trace_format
+        self.compress = compress
+        self.trace_calls = 0
+        self.trace = None
+        self.result = None
+        self.limit = None
+        self.queries = None
 
     def get_relation(self, root):
         """Returns the `Relation` data structure."""
@@ -43,22 +92,32 @@ class XMLIO:
         return relation
 
     def get_query(self, root):
+        """Returns the first `Query` of the problem statement."""
+
+        return self.get_queries(root)[0]
+
+    def get_queries(self, root):
+        """Returns the `Query` of every `dependency_check` element."""
+
+        return [self.get_check(check) for check in root.findall('dependency_check')]
+
+    def get_check(self, check):
         # Extract the dependency check type and tables
-        check_type = root.find('dependency_check').get('type')
+        check_type = check.get('type')
 
         query = Query(check_type)
 
-        for fd in root.findall('dependency_check/functional_dependency'):
+        for fd in check.findall('functional_dependency'):
             lhs = [elem.text for elem in fd.find("lhs")]
             rhs = [elem.text for elem in fd.find("rhs")]
             query.add_functional_dependency(lhs, rhs)
 
-        for mvd in root.findall('dependency_check/multivalued_dependency'):
+        for mvd in check.findall('multivalued_dependency'):
             lhs = [elem.text for elem in mvd.find("lhs")]
             rhs = [elem.text for elem in mvd.find("rhs")]
             query.add_multivalued_dependency(lhs, rhs)
 
-        for table in root.findall('dependency_check/table'):
+        for table in check.findall('table'):
             table_name = table.get('name')
             table_attributes = [
                 elem.text for elem in table.findall('attribute')]
@@ -69,14 +128,128 @@ class XMLIO:
     def read_xml(self):
         """Reads an xml file and returns 2 objects: `Relation` and `Query`
         which represents the relational table and task that we are chasing
-        respectively."""
+        respectively. Only the first query of a file with several is
+        returned.
+        """
+
+        relation, queries = self.read_problems()
+        return (relation, queries[0] if queries else None)
+
+    @profiled(IO)
+    def read_problems(self):
+        """Reads an xml file and returns its `Relation` and the list of
+        every `Query` asked about it, one per `dependency_check`.
 
-        tree = ET.parse(self.input)
-        root = tree.getroot()
-        relation = self.get_relation(root)
-        query = self.get_query(root)
+        A json or binary problem statement, as told by the extension of
+        the input, is read in its own format.
+        """
+
+        if detect_format(self.input) != XML_FORMAT:
+            # formats imports this module, so it is only imported when needed
+            from classes.formats import read_problem_file
+            relation, self.queries = read_problem_file(self.input)
+        else:
+            relation, self.queries = self.read_stream_problems(self.input)
+        return (relation, self.queries)
+
+    def read_stream(self, source):
+        """Reads a problem statement from `source`, a filename or file
+        object, and returns its `Relation` and its first `Query`."""
+
+        relation, queries = self.read_stream_problems(source)
+        return (relation, queries[0] if queries else None)
+
+    def read_stream_problems(self, source):
+        """Reads a problem statement from `source`, a filename or file
+        object, and returns its `Relation` and the list of its queries.
+
+        The document is parsed with `iterparse` and every element is
+        dropped from the tree as soon as it has been read, so memory
+        does not grow with the number of dependencies or queries.
+        """
+
+        relation = None
+        query = None
+        queries = []
+        parents = []
+        attributes = []  # of the table being read
+        side = []  # of the lhs or rhs being read
+        sides = {}
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if elem.tag == "table" and query is None:
+                    relation = Relation(elem.get("name"), [])
+                elif elem.tag == "dependency_check":
+                    query = Query(elem.get("type"))
+                    queries.append(query)
+                parents.append(elem)
+                continue
+
+            parents.pop()
+            owner = relation if query is None else query
+            if elem.tag == "attribute":
+                if parents[-1].tag == "table":
+                    attributes.append(elem.text)
+                else:
+                    side.append(elem.text)
+            elif elem.tag in ("lhs", "rhs"):
+                sides[elem.tag] = side
+                side = []
+            elif elem.tag == "functional_dependency":
+                owner.add_functional_dependency(sides.pop("lhs"), sides.pop("rhs"))
+            elif elem.tag == "multivalued_dependency":
+                owner.add_multivalued_dependency(sides.pop("lhs"), sides.pop("rhs"))
+            elif elem.tag == "table":
+                if query is None:
+                    relation.attributes = attributes
+                else:
+                    query.add_relation(Relation(elem.get("name"), attributes))
+                attributes = []
+            elif elem.tag != "dependency_check":
+                continue
+
+            # the element has been read, so drop it from the tree
+            elem.clear()
+            if parents and elem.tag != "attribute":
+                parents[-1].remove(elem)
+
+        return (relation, queries)
+
+    def should_trace(self):
+        """Returns whether the current step is traced at the trace level.
+
+        At the `every` level the first step is traced, then every
+        `trace_every`-th step after it.
+        """
+
+        calls = self.trace_calls
+        self.trace_calls += 1
+        if self.trace_level == TRACE_FULL:
+            return True
+        if self.trace_level == TRACE_EVERY:
+            return calls % self.trace_every == 0
+        return False
+
+    def get_trace_filename(self):
+        """Returns the filename of the trace stream."""
+
+        path = Path(self.output)
+        suffix = f"{path.suffix}.gz" if self.compress else path.suffix
+        return path.parent / f"{path.stem}_trace{suffix}"
 
-        return (relation, query)
+    def get_trace(self):
+        """Returns the trace stream, opening it on first use."""
+
+        if self.trace is None:
+            self.trace = TraceWriter(self.get_trace_filename())
+        return self.trace
+
+    def close(self):
+        """Closes the trace stream if one is open."""
+
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
 
     def get_intermediate_filename(self, step_number):
         """Returns a string for an intermediate filename with step number."""
@@ -86,6 +259,7 @@ class XMLIO:
         new_path = path.parent / filename
         return new_path
 
+    @profiled(IO)
     def write_intermediate_result(self, schema, table, step_number):
         """Writes an intermediate result of the chase algorithm to
         `self.output`.
@@ -101,29 +275,20 @@ class XMLIO:
             An integer representing the number of steps taken.
         """
 
-        # Create the root element
-        root = ET.Element('intermediate_result')
-
-        # Create the table and header element and add attribute elements
-        table_element = ET.SubElement(root, 'table')
-        header = ET.SubElement(table_element, 'header')
-        for attr, _ in sorted(schema.items(), key=lambda x: x[1]):
-            ET.SubElement(header, 'attribute').text = attr
+        if not self.should_trace():
+            return
+        if self.trace_format == TRACE_STREAM:
+            self.get_trace().write_table(schema, table, step_number)
+            return
 
-        # Create row elements and add value elements
-        for row_data in table:
-            row = ET.SubElement(table_element, 'row')
-            for value in row_data:
-                ET.SubElement(row, 'value').text = str(value)
-
-        # Add the step number element
-        _ = ET.SubElement(root, 'step_number').text = str(step_number)
+        tree = ET.ElementTree(table_element('intermediate_result', schema, table))
+        _ = ET.SubElement(tree.getroot(), 'step_number').text = str(step_number)
 
         # Write the XML file
-        tree = ET.ElementTree(root)
         filename = self.get_intermediate_filename(step_number)
-        tree.write(filename)
+        write_tree(tree, filename)
 
+    @profiled(IO)
     def write_min_cov(self, fds, step_number):
         """Writes the minimum cover of a relation to `self.output`.
 
@@ -133,25 +298,75 @@ class XMLIO:
             A list of functional dependencies.
         """
 
-        # Create the root element
-        root = ET.Element('minimum_cover')
+        if not self.should_trace():
+            return
+        if self.trace_format == TRACE_STREAM:
+            self.get_trace().write_min_cov(fds, step_number)
+            return
 
-        # Create the functional dependency elements
-        for fd in fds:
-            fd_element = ET.SubElement(root, 'functional_dependency')
-            lhs = ET.SubElement(fd_element, 'lhs')
-            for attr in fd[0]:
-                ET.SubElement(lhs, 'attribute').text = attr
-            rhs = ET.SubElement(fd_element, 'rhs')
-            for attr in fd[1]:
-                ET.SubElement(rhs, 'attribute').text = attr
+        # Write the XML file
+        tree = ET.ElementTree(cover_element(fds))
+        filename = self.get_intermediate_filename(step_number)
+        write_tree(tree, filename)
+
+    @profiled(IO)
+    def write_schemas(self, schemas, step_number):
+        """Writes the keys or subschemas found so far by a schema design
+        task to `self.output`.
+
+        Parameters
+        ----------
+        schemas : list[list[str]]
+            The attributes of every key or subschema.
+        step_number : int
+            An integer representing the number of steps taken.
+        """
+
+        if not self.should_trace():
+            return
+        if self.trace_format == TRACE_STREAM:
+            self.get_trace().write_schemas(schemas, step_number)
+            return
 
         # Write the XML file
-        tree = ET.ElementTree(root)
+        tree = ET.ElementTree(schemas_element(schemas))
         filename = self.get_intermediate_filename(step_number)
-        tree.write(filename)
+        write_tree(tree, filename)
+
+    @profiled(IO)
+    def write_cover(self, fds):
+        """Writes the minimum cover found by a minimal cover task to
+        `self.output`, whether or not its steps are traced.
+
+        Parameters
+        ----------
+        fds : list[FunctionalDependency]
+            A list of functional dependencies.
+        """
+
+        self.close()
+        write_tree(ET.ElementTree(cover_element(fds)), self.output)
 
-    def write_result(self, schema, table, answer):
+    @profiled(IO)
+    def write_design(self, task, schemas):
+        """Writes the candidate keys or the decomposition found by a
+        schema design task to `self.output`.
+
+        Parameters
+        ----------
+        task : str
+            The task of the query.
+        schemas : list[list[str]]
+            The attributes of every key or subschema.
+        """
+
+        self.close()
+        root = schemas_element(schemas)
+        root.set('task', task)
+        write_tree(ET.ElementTree(root), self.output)
+
+    @profiled(IO)
+    def write_result(self, schema, table, answer, lost=None, limit=None):
         """Writes the result of the chase algorithm to `self.output`.
 
         Parameters
@@ -161,28 +376,338 @@ class XMLIO:
             table.
         table : list[list[str]]
             A 2d array representing the chase table.
-        answer : bool
-            The answer to the decision problem.
+        answer : bool | None
+            The answer to the decision problem, None if it is unknown.
+        lost : list[FunctionalDependency], optional
+            The functional dependencies a decomposition does not
+            preserve, for a dependency preservation problem.
+        limit : str, optional
+            The limit the chase stopped at, with the partial table and
+            an unknown answer.
         """
 
-        # Create the root element
-        root = ET.Element('result')
-
-        # Create the table and header element and add attribute elements
-        table_element = ET.SubElement(root, 'table')
-        header = ET.SubElement(table_element, 'header')
-        for attr, _ in sorted(schema.items(), key=lambda x: x[1]):
-            ET.SubElement(header, 'attribute').text = attr
+        self.close()
+        self.result = (schema, table, answer)
+        self.limit = limit
 
-        # Create row elements and add value elements
-        for row_data in table:
-            row = ET.SubElement(table_element, 'row')
-            for value in row_data:
-                ET.SubElement(row, 'value').text = str(value)
+        root = table_element('result', schema, table)
 
         # Add the answer element
-        _ = ET.SubElement(root, 'answer').text = 'yes' if answer else 'no'
+        add_answer(root, answer, limit)
+        if lost is not None:
+            root.append(lost_element(lost))
 
         # Write the XML file
         tree = ET.ElementTree(root)
-        tree.write(self.output)
+        write_tree(tree, self.output)
+
+    @profiled(IO)
+    def write_results(self, results):
+        """Writes the results of several queries about one relation to
+        `self.output`, as a single document.
+
+        Parameters
+        ----------
+        results : list[dict]
+            The result of every query, in the form of `MemoryIO.to_json`.
+        """
+
+        self.close()
+        write_tree(ET.ElementTree(results_element(results)), self.output)
+
+
+def write_tree(tree, filename):
+    """Writes the element tree `tree` to `filename` through a partial
+    file, so that `filename` is never left half-written."""
+
+    partial = partial_path(filename)
+    tree.write(partial)
+    os.replace(partial, filename)
+
+
+def add_answer(parent, answer, limit=None):
+    """Adds the `answer` element of `answer`, yes, no or unknown, to
+    `parent`, followed by the `limit` the chase stopped at if there is
+    one."""
+
+    ET.SubElement(parent, 'answer').text = ANSWERS[None if answer is None else bool(answer)]
+    if limit is not None:
+        ET.SubElement(parent, 'limit').text = limit
+
+
+def read_answer(parent):
+    """Returns the answer of the `answer` element of `parent`, None if it
+    is unknown, and the limit the chase stopped at, or None."""
+
+    answer = {'yes': True, 'no': False}.get(parent.findtext('answer'))
+    return answer, parent.findtext('limit')
+
+
+def table_element(tag, schema, rows):
+    """Returns a `tag` element holding the table, with its header in
+    column order and one `row` of `value` elements per row."""
+
+    # Create the root element
+    root = ET.Element(tag)
+
+    # Create the table and header element and add attribute elements
+    table = ET.SubElement(root, 'table')
+    header = ET.SubElement(table, 'header')
+    for attr, _ in sorted(schema.items(), key=lambda x: x[1]):
+        ET.SubElement(header, 'attribute').text = attr
+
+    # Create row elements and add value elements
+    for row_data in rows:
+        row = ET.SubElement(table, 'row')
+        for value in row_data:
+            ET.SubElement(row, 'value').text = str(value)
+    return root
+
+
+def cover_element(fds):
+    """Returns a `minimum_cover` element holding the dependencies."""
+
+    # Create the root element
+    root = ET.Element('minimum_cover')
+
+    # Create the functional dependency elements
+    for fd in fds:
+        add_dependency(root, 'functional_dependency', fd[0], fd[1])
+    return root
+
+
+def lost_element(fds):
+    """Returns a `lost_dependencies` element holding the dependencies."""
+
+    root = ET.Element('lost_dependencies')
+    for fd in fds:
+        add_dependency(root, 'functional_dependency', fd[0], fd[1])
+    return root
+
+
+def schemas_element(schemas):
+    """Returns a `schemas` element holding a `schema` of `attribute`
+    elements for every key or subschema."""
+
+    root = ET.Element('schemas')
+    for attributes in schemas:
+        schema = ET.SubElement(root, 'schema')
+        for attr in attributes:
+            ET.SubElement(schema, 'attribute').text = attr
+    return root
+
+
+def read_schemas(root):
+    """Returns the attributes of every `schema` of a `schemas` element."""
+
+    return [[attr.text for attr in schema.findall('attribute')] for schema in root.findall('schema')]
+
+
+def add_dependency(parent, tag, lhs, rhs):
+    """Adds a `tag` element with the `lhs` and `rhs` attributes to
+    `parent`."""
+
+    dependency = ET.SubElement(parent, tag)
+    for side, attrs in (('lhs', lhs), ('rhs', rhs)):
+        element = ET.SubElement(dependency, side)
+        for attr in attrs:
+            ET.SubElement(element, 'attribute').text = attr
+
+
+def problem_element(relation, *queries):
+    """Returns a `chase` element holding a problem statement, with a
+    `dependency_check` for every query, in the format read by
+    `XMLIO.read_problems`."""
+
+    root = ET.Element('chase')
+    table = ET.SubElement(root, 'table', name=relation.name)
+    for attr in relation.attributes:
+        ET.SubElement(table, 'attribute').text = attr
+    for lhs, rhs in relation.functional_dependencies:
+        add_dependency(table, 'functional_dependency', lhs, rhs)
+    for lhs, rhs in relation.multivalued_dependencies:
+        add_dependency(table, 'multivalued_dependency', lhs, rhs)
+    for query in queries:
+        check = ET.SubElement(root, 'dependency_check', type=query.task)
+        for lhs, rhs in query.functional_dependencies:
+            add_dependency(check, 'functional_dependency', lhs, rhs)
+        for lhs, rhs in query.multivalued_dependencies:
+            add_dependency(check, 'multivalued_dependency', lhs, rhs)
+        for subschema in query.relations:
+            element = ET.SubElement(check, 'table', name=subschema.name)
+            for attr in subschema.attributes:
+                ET.SubElement(element, 'attribute').text = attr
+    return root
+
+
+def results_element(results):
+    """Returns a `results` element holding the result of every query of
+    a problem statement, as dicts in the form of `MemoryIO.to_json`.
+
+    Every `result` has the `task` of its query, its final table, its
+    answer, minimum cover or keys or subschemas and, if it was traced,
+    a `trace` of `step` elements.
+    """
+
+    root = ET.Element('results')
+    for result in results:
+        if "header" in result:
+            schema = {attr: idx for idx, attr in enumerate(result["header"])}
+            element = table_element('result', schema, result["table"])
+        else:
+            element = ET.Element('result')
+        element.set('task', result["task"])
+        if "answer" in result:
+            add_answer(element, result["answer"], result.get("limit"))
+            if "lost" in result:
+                element.append(lost_element(result["lost"]))
+        elif "minimum_cover" in result:
+            element.append(cover_element(result["minimum_cover"]))
+        elif "schemas" in result:
+            element.append(schemas_element(result["schemas"]))
+        if "trace" in result:
+            trace = ET.SubElement(element, 'trace')
+            for step in result["trace"]:
+                if "minimum_cover" in step:
+                    child = ET.Element('step')
+                    child.append(cover_element(step["minimum_cover"]))
+                elif "schemas" in step:
+                    child = ET.Element('step')
+                    child.append(schemas_element(step["schemas"]))
+                else:
+                    child = table_element('step', schema, step["table"])
+                child.set('number', str(step["step"]))
+                trace.append(child)
+        root.append(element)
+    return root
+
+
+def read_results(root):
+    """Returns the results in a `results` element written by
+    `results_element`."""
+
+    results = []
+    for element in root.findall('result'):
+        result = {"task": element.get('task')}
+        if element.find('answer') is not None:
+            result["answer"], limit = read_answer(element)
+            if limit is not None:
+                result["limit"] = limit
+            if element.find('lost_dependencies') is not None:
+                result["lost"] = read_cover(element.find('lost_dependencies'))
+        elif element.find('minimum_cover') is not None:
+            result["minimum_cover"] = read_cover(element.find('minimum_cover'))
+        elif element.find('schemas') is not None:
+            result["schemas"] = read_schemas(element.find('schemas'))
+        if element.find('table') is not None:
+            result["header"], result["table"] = read_table(element.find('table'))
+        if element.find('trace') is not None:
+            result["trace"] = []
+            for step in element.find('trace').findall('step'):
+                if step.find('minimum_cover') is not None:
+                    result["trace"].append({"step": int(step.get('number')),
+                                            "minimum_cover": read_cover(step.find('minimum_cover'))})
+                elif step.find('schemas') is not None:
+                    result["trace"].append({"step": int(step.get('number')),
+                                            "schemas": read_schemas(step.find('schemas'))})
+                else:
+                    result["trace"].append({"step": int(step.get('number')),
+                                            "table": read_table(step.find('table'))[1]})
+        results.append(result)
+    return results
+
+
+def read_table(table):
+    """Returns the header and rows of a `table` element."""
+
+    return ([attr.text for attr in table.find('header')],
+            [[value.text or "" for value in row] for row in table.findall('row')])
+
+
+def read_cover(cover):
+    """Returns the functional dependencies of a `minimum_cover` or
+    `lost_dependencies` element."""
+
+    return [[[attr.text for attr in fd.find('lhs')], [attr.text for attr in fd.find('rhs')]]
+            for fd in cover.findall('functional_dependency')]
+
+
+def read_document(filename):
+    """Returns the document in the xml file `filename` as a dict with its
+    `kind`: a `problem` with its `relation`, its first `query` and all
+    its `queries`, a `result`, the `results` of several queries, a
+    `table` at a step, a minimum `cover`, the `schemas` of a schema
+    design task, with its `task` once it is done, or a `trace` stream
+    with its `header` and `steps`, as read by `read_trace_steps`."""
+
+    xml_io = XMLIO(filename, None)
+    opener = gzip.open if str(filename).endswith(".gz") else open
+    with opener(filename, "rb") as file:
+        root = ET.parse(file).getroot()
+    if root.tag == 'chase':
+        queries = xml_io.get_queries(root)
+        return {"kind": "problem", "relation": xml_io.get_relation(root), "query": queries[0],
+                "queries": queries}
+    if root.tag == 'results':
+        return {"kind": "results", "results": read_results(root)}
+    if root.tag == 'trace':
+        return {"kind": "trace", "header": read_trace_header(filename), "steps": list(read_trace_steps(filename))}
+    if root.tag == 'minimum_cover':
+        return {"kind": "cover", "fds": read_cover(root)}
+    if root.tag == 'schemas':
+        document = {"kind": "schemas", "schemas": read_schemas(root)}
+        if root.get('task') is not None:
+            document["task"] = root.get('task')
+        return document
+    header, table = read_table(root.find('table'))
+    document = {"header": header, "table": table}
+    if root.tag == 'result':
+        answer, limit = read_answer(root)
+        document.update(kind="result", answer=answer)
+        if limit is not None:
+            document["limit"] = limit
+        if root.find('lost_dependencies') is not None:
+            document["lost"] = read_cover(root.find('lost_dependencies'))
+    else:
+        document.update(kind="table", step_number=int(root.findtext('step_number')))
+    return document
+
+
+def write_document(document, filename):
+    """Writes a document, as returned by `read_document`, to the xml file
+    `filename`."""
+
+    kind = document["kind"]
+    if kind == "trace":
+        writer = TraceWriter(filename)
+        schema = {attr: idx for idx, attr in enumerate(document["header"] or [])}
+        for step in document["steps"]:
+            if "minimum_cover" in step:
+                writer.write_min_cov(step["minimum_cover"], step["step"])
+            elif "schemas" in step:
+                writer.write_schemas(step["schemas"], step["step"])
+            else:
+                writer.write_table(schema, step["table"], step["step"])
+        writer.close()
+        return
+    if kind == "problem":
+        root = problem_element(document["relation"], *document.get("queries", [document["query"]]))
+    elif kind == "results":
+        root = results_element(document["results"])
+    elif kind == "cover":
+        root = cover_element(document["fds"])
+    elif kind == "schemas":
+        root = schemas_element(document["schemas"])
+        if "task" in document:
+            root.set('task', document["task"])
+    else:
+        schema = {attr: idx for idx, attr in enumerate(document["header"])}
+        root = table_element('result' if kind == "result" else 'intermediate_result', schema,
+                             document["table"])
+        if kind == "result":
+            add_answer(root, document["answer"], document.get("limit"))
+            if "lost" in document:
+                root.append(lost_element(document["lost"]))
+        else:
+            ET.SubElement(root, 'step_number').text = str(document["step_number"])
+    write_tree(ET.ElementTree(root), filename)
@@ -0,0 +1,102 @@
+from typing import Dict
+
+from classes.CompiledSchema import CompiledSchema, bitPositions
+
+
+def indexByBit(fds: list[tuple[int, int]]):
+    """Returns a mapping of each bit position to the indexes of the
+    functional dependencies, given as bitmasks, whose lhs has it."""
+
+    index: Dict[int, list[int]] = {}
+    for i, (lhs, _) in enumerate(fds):
+        for pos in bitPositions(lhs):
+            index.setdefault(pos, []).append(i)
+    return index
+
+
+def maskClosure(mask: int, fds: list[tuple[int, int]], index: Dict[int, list[int]] | None = None, skip: int | None = None, active: int | None = None, target: int | None = None, sizes: list[int] | None = None):
+    """Returns the closure of the attributes in the bitmask `mask` under
+    `fds`, as a bitmask.
+
+    Runs in time linear in the size of `fds` (LinClosure): every
+    dependency keeps a count of its lhs attributes that are not yet in
+    the closure, and every attribute added to the closure decrements
+    the counts of the dependencies listed for it in `index`. A
+    dependency fires once its count reaches zero.
+
+    Parameters
+    ----------
+    mask : int
+        The attributes to take the closure of.
+    fds : list[tuple[int, int]]
+        The functional dependencies as (lhs, rhs) bitmasks.
+    index : dict[int, list[int]], optional
+        The result of `indexByBit(fds)`, built if not given.
+    skip : int, optional
+        The index of a dependency in `fds` to leave out.
+    active : int, optional
+        A bitmask of the indexes of the dependencies in `fds` to use
+        (default is all of them).
+    target : int, optional
+        Attributes to look for. The closure is only computed until it
+        contains all of them, so the result may be partial.
+    sizes : list[int], optional
+        The number of attributes in the lhs of every dependency of
+        `fds`, counted if not given.
+    """
+
+    if index is None:
+        index = indexByBit(fds)
+    counts = [lhs.bit_count() for lhs, _ in fds] if sizes is None else list(sizes)
+    # bit i of active as character i, so a lookup does not shift a big int
+    enabled = None if active is None else bin(active)[:1:-1].ljust(len(fds), "0")
+    if skip is not None:
+        counts[skip] = -1
+    closure = mask
+    if 0 in counts:
+        for i, count in enumerate(counts):
+            if count == 0 and (enabled is None or enabled[i] == "1"):
+                # a dependency with an empty lhs
+                closure |= fds[i][1]
+    missing = -1 if target is None else target & ~closure
+    queue = list(bitPositions(closure))
+    while queue and missing:
+        for i in index.get(queue.pop(), ()):
+            counts[i] -= 1
+            if counts[i] == 0 and (enabled is None or enabled[i] == "1"):
+                added = fds[i][1] & ~closure
+                if added:
+                    closure |= added
+                    missing &= ~added
+                    queue.extend(bitPositions(added))
+    return closure
+
+
+def attributeClosure(attributes, fds: list[list[list[str]]], target=None):
+    """Returns the closure of `attributes` under `fds` as a set of
+    attributes, with `maskClosure` on a schema compiled for this call.
+
+    Parameters
+    ----------
+    attributes : Iterable[str]
+        The attributes to take the closure of.
+    fds : list[list[list[str]]]
+        The functional dependencies.
+    target : Iterable[str], optional
+        Attributes to look for. The closure is only computed until it
+        contains all of them, so the result may be partial.
+    """
+
+    attributes = set(attributes)
+    known = attributes.union(target or [], *(set(lhs) | set(rhs) for lhs, rhs in fds))
+    compiled = CompiledSchema(known)
+    closure = maskClosure(compiled.mask(attributes), compiled.compile(fds),
+                          target=None if target is None else compiled.mask(target))
+    return set(compiled.names(closure))
+
+
+def isImplied(lhs: list[str], rhs: list[str], fds: list[list[list[str]]]):
+    """Returns whether `fds` entail the functional dependency
+    lhs -> rhs."""
+
+    return set(rhs).issubset(attributeClosure(lhs, fds, target=rhs))
@@ -0,0 +1,33 @@
+import sys
+from argparse import ArgumentParser
+
+from classes.formats import convert
+
+
+def convertMain(argv):
+    """Converts the documents given on the command line and returns the
+    exit status."""
+
+    args = parse_convert_arguments(argv)
+    try:
+        kind = convert(args.input, args.output)
+    except ValueError as error:
+        print(f"cannot convert {args.input}: {error}", file=sys.stderr)
+        return 1
+    print(f"converted {kind} {args.input} to {args.output}")
+    return 0
+
+
+def parse_convert_arguments(argv):
+    """Set up the command line arguments of the convert mode and parse it."""
+
+    parser = ArgumentParser(
+        prog="main.py convert",
+        description="Convert a problem statement, result or results, intermediate table, minimum cover,\
+            keys or subschemas, or trace stream between the xml, json (.json, .jsonl) and binary (.chase) formats,\
+            as told by the extensions."
+    )
+    parser.add_argument("input")
+    parser.add_argument("output")
+
+    return parser.parse_args(argv)
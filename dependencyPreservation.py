@@ -0,0 +1,98 @@
+from collections import deque
+from typing import Dict
+
+from classes.CompiledSchema import bitPositions
+
+
+def indexBySubschema(subschemas: list[int]):
+    """Returns a mapping of each attribute bit to the indexes of the
+    subschemas, given as bitmasks, that contain it."""
+
+    index: Dict[int, list[int]] = {}
+    for i, subschema in enumerate(subschemas):
+        for pos in bitPositions(subschema):
+            index.setdefault(pos, []).append(i)
+    return index
+
+
+def restrictedClosure(attributes: int, subschemas: list[int], containing: Dict[int, list[int]], closure, target: int | None = None):
+    """Returns the closure of the bitmask `attributes` under the
+    projections of the functional dependencies onto `subschemas`,
+    without projecting them.
+
+    The attributes of a subschema that are in the result so far are
+    closed under the dependencies, and the part of their closure inside
+    the subschema joins the result. A subschema is only closed again
+    once the result has gained one of its attributes.
+
+    Parameters
+    ----------
+    attributes : int
+        The bitmask of the attributes to take the closure of.
+    subschemas : list[int]
+        The bitmask of the attributes of every relation of the
+        decomposition.
+    containing : dict[int, list[int]]
+        The result of `indexBySubschema(subschemas)`.
+    closure : callable
+        Returns the closure of a bitmask of attributes under the
+        functional dependencies.
+    target : int, optional
+        Attributes to look for. The closure is only computed until it
+        contains all of them, so the result may be partial.
+    """
+
+    result = attributes
+    # the attributes of each subschema in the result when it was last closed
+    seen = [-1] * len(subschemas)
+    if closure(0):
+        # dependencies with an empty lhs hold in every subschema
+        queue = deque(range(len(subschemas)))
+    else:
+        queue = deque(sorted({i for pos in bitPositions(result) for i in containing.get(pos, [])}))
+    queued = set(queue)
+    while queue and (target is None or target & ~result):
+        i = queue.popleft()
+        queued.discard(i)
+        subschema = subschemas[i]
+        known = subschema & result
+        if known == seen[i]:
+            continue
+        seen[i] = known
+        if known == subschema:
+            # the whole subschema is already in the result
+            continue
+        added = closure(known) & subschema & ~result
+        result |= added
+        for pos in bitPositions(added):
+            for j in containing[pos]:
+                if j not in queued:
+                    queue.append(j)
+                    queued.add(j)
+    return result
+
+
+def lostDependencies(fds: list[tuple[int, int]], subschemas: list[int], closure):
+    """Returns the functional dependencies of `fds` that are not
+    preserved by the decomposition into `subschemas`, i.e. that do not
+    follow from the projections of the dependencies onto them. The
+    dependencies and subschemas are bitmasks.
+
+    A dependency is preserved if its rhs is in the restricted closure of
+    its lhs, which takes polynomial time where projecting the
+    dependencies takes exponential time. A dependency inside a single
+    subschema is preserved by its projection, so it is not closed.
+    """
+
+    containing = indexBySubschema(subschemas)
+    lost = []
+    for lhs, rhs in fds:
+        attributes = lhs | rhs
+        if not attributes:
+            continue
+        first = (attributes & -attributes).bit_length() - 1
+        if any(attributes & ~subschemas[i] == 0 for i in containing.get(first, [])):
+            continue
+        if rhs & ~restrictedClosure(lhs, subschemas, containing, closure, target=rhs):
+            lost.append((lhs, rhs))
+    return lost
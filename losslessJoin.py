@@ -0,0 +1,87 @@
+from chaseFd import indexByLhs
+from chaseMvd import mapToIndex
+from classes.CompiledSchema import CompiledSchema
+from classes.JoinTableau import JoinTableau
+from closure import indexByBit, maskClosure
+from utils.common import ALPHA
+
+
+def binaryLosslessJoin(compiled: CompiledSchema, first: int, second: int, closure):
+    """Returns whether the decomposition into `first` and `second` is
+    lossless under functional dependencies only, and the table the chase
+    reaches at its fixpoint.
+
+    The 2 rows of the tableau agree on the common attributes, so the
+    chase makes them agree on exactly the closure of those attributes.
+    The join is lossless if the subschemas cover the relation and the
+    closure contains one of them, which takes a single closure.
+
+    Parameters
+    ----------
+    compiled : CompiledSchema
+        The bit positions of the attributes, which are also their
+        columns in the table.
+    first, second : int
+        The bitmasks of the attributes of the 2 relations.
+    closure : callable
+        Returns the closure of a bitmask of attributes under the
+        functional dependencies.
+    """
+
+    covered = first | second
+    common = closure(first & second)
+    answer = covered == compiled.full and (first & ~common == 0 or second & ~common == 0)
+    table = []
+    for row, attributes in enumerate((first, second), 1):
+        # the rows agree on the closure, with the symbol of the first row
+        alphas = attributes | (common & covered)
+        table.append([ALPHA if alphas >> pos & 1 else attr + str(1 if common >> pos & 1 else row)
+                      for pos, attr in enumerate(compiled.attributes)])
+    return answer, table
+
+
+def naryLosslessJoin(schema: dict[str, int], subschemas: list[list[str]], fds: list[list[list[str]]],
+                     fdsPos=None, fdsByColumn=None):
+    """Returns whether the decomposition into `subschemas` is lossless
+    under the functional dependencies `fds` only, and the final table,
+    chased as a `JoinTableau` until a row is entirely distinguished.
+
+    `fdsPos` and `fdsByColumn` are the dependencies as column indexes and
+    their index by lhs column, built if not given.
+    """
+
+    if fdsPos is None:
+        fdsPos = mapToIndex(fds, schema)
+        fdsByColumn = indexByLhs(fdsPos)
+    tableau = JoinTableau(schema, subschemas, fdsPos, fdsByColumn)
+    answer = tableau.chase()
+    return answer, tableau.to_table(schema)
+
+
+def fdLosslessJoin(schema: dict[str, int], subschemas: list[list[str]], fds: list[list[list[str]]],
+                   prepared=None):
+    """Returns whether the decomposition into `subschemas` is lossless
+    under the functional dependencies `fds` only, and the final table.
+
+    A decomposition into 2 relations is settled by a closure on
+    bitmasks, and any other by a `JoinTableau`. A `PreparedRelation` of
+    the relation lends them its compiled schema, closures and dependency
+    indexes.
+    """
+
+    if len(subschemas) == 2:
+        if prepared is not None:
+            compiled = prepared.compiled
+            closure = prepared.maskClosure
+        else:
+            compiled = CompiledSchema(schema)
+            masks = compiled.compile(fds)
+            index = indexByBit(masks)
+
+            def closure(mask):
+                return maskClosure(mask, masks, index)
+        first, second = (compiled.mask(subschema) for subschema in subschemas)
+        return binaryLosslessJoin(compiled, first, second, closure)
+    if prepared is not None:
+        return naryLosslessJoin(schema, subschemas, fds, prepared.fds, prepared.fdsByColumn)
+    return naryLosslessJoin(schema, subschemas, fds)
@@ -1,28 +1,148 @@
-from argparse import ArgumentParser
+import sys
+from argparse import ArgumentParser, ArgumentTypeError
 from classes.Relation import Relation
 
 from classes.xml_io import XMLIO
+from classes.formats import create_io
+from classes.memory_io import MemoryIO
 from classes.Query import Query
+from classes.Goal import Goal
+from classes.NumpyTableau import NumpyTableau
+from classes.FactorizedTableau import FactorizedTableau
+from classes.RowStore import RowStore
+from classes.Scheduler import Scheduler
+from classes.PreparedRelation import PreparedRelation
+from classes.CompiledSchema import CompiledSchema
+from classes.ResultCache import ResultCache
+from classes.Budget import Budget
 from chaseFd import chaseFds
-from chaseMvd import chaseMvds
-from utils.common import ALPHA, FUNCTIONAL_DEPENDENCY, LOSSLESS_JOIN, MINIMAL_COVER, MULTIVALUED_DEPENDENCY, DISTINGUISHED, SIMPLE
+from chaseMvd import chaseMvds, groupRows
+from closure import isImplied
+from losslessJoin import fdLosslessJoin
+from dependencyPreservation import lostDependencies
+from normalForms import bcnfDecomposition, candidateKeys, thirdNormalForm
+from classes.ClosureCache import ClosureCache
+from minimalCover import canonicalCover
+from utils.profiler import PROFILER, CHASE, GOAL_CHECK, SETUP, profiled
+from utils.common import ALPHA, FUNCTIONAL_DEPENDENCY, LOSSLESS_JOIN, MINIMAL_COVER, DEPENDENCY_PRESERVATION, CANDIDATE_KEYS, BCNF_DECOMPOSITION, THIRD_NF_SYNTHESIS, MULTIVALUED_DEPENDENCY, DISTINGUISHED, SIMPLE, PYTHON_BACKEND, NUMPY_BACKEND, FACTORIZED_BACKEND, BATCH, SERVE, CONVERT, TRACE_NONE, TRACE_FINAL, TRACE_EVERY, TRACE_FULL, TRACE_FILES, TRACE_STREAM
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == BATCH:
+        # batch imports this module, so it is only imported when needed
+        from batch import batchMain
+        sys.exit(batchMain(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == SERVE:
+        from server import serveMain
+        sys.exit(serveMain(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == CONVERT:
+        from convert import convertMain
+        sys.exit(convertMain(sys.argv[2:]))
     args = parse_arguments()
-    xml_io = XMLIO(args.input, args.output)
-    relation, query = xml_io.read_xml()
-    chase_type = args.chase_type
+    xml_io = create_io(args.input, args.output, args.trace_level, args.trace_every,
+                       args.trace_format, args.gzip)
+    cache = None
+    if args.cache_dir is not None:
+        cache = ResultCache(args.cache_dir, args.cache_size)
+    budget = create_budget(args)
+    if args.profile is None:
+        solve(args.chase_type, xml_io, args.backend, args.workers, cache, budget)
+        return
+    PROFILER.enable()
+    try:
+        solve(args.chase_type, xml_io, args.backend, args.workers, cache, budget)
+    finally:
+        PROFILER.disable()
+        PROFILER.write(args.profile)
+
+
+def solve(chase_type, xml_io, backend=PYTHON_BACKEND, workers=1, cache=None, budget=None):
+    """Solves the problem statement read by `xml_io` with the given
+    chase type, writing the result and traces with it, and returns the
+    answer.
+
+    With a `ResultCache`, an entailment problem that was solved before
+    is answered from the cache without chasing, and a new answer is
+    stored in it.
+
+    A problem statement with several queries about its relation is
+    solved by `solveQueries`, and the tuple of answers is returned.
+
+    With a `Budget`, a chase that hits one of its limits stops and
+    answers None, and its partial table is written as the result.
+    """
+
+    relation, queries = xml_io.read_problems()
+    if PROFILER.enabled:
+        PROFILER.describe(relation)
+    if len(queries) > 1:
+        return solveQueries(chase_type, relation, queries, xml_io, backend, workers, cache, budget)
+    return solveQuery(chase_type, relation, queries[0], xml_io, backend, workers, cache, budget=budget)
+
+
+def solveQuery(chase_type, relation, query, xml_io, backend=PYTHON_BACKEND, workers=1, cache=None,
+               prepared=None, budget=None):
+    """Solves one query about `relation`, through the cache if there is
+    one, and returns the answer."""
+
+    key = None
+    if cache is not None and query.task in (FUNCTIONAL_DEPENDENCY, MULTIVALUED_DEPENDENCY, LOSSLESS_JOIN):
+        key = ResultCache.key(chase_type, relation, query)
+        entry = cache.get(key)
+        if entry is not None:
+            schema = {attr: idx for idx, attr in enumerate(entry["header"])}
+            xml_io.write_result(schema, entry["table"], entry["answer"])
+            return entry["answer"]
+    try:
+        answer = solveProblem(chase_type, relation, query, xml_io, backend, workers, prepared, budget)
+    finally:
+        xml_io.close()
+    if key is not None and isinstance(answer, bool) and xml_io.result is not None:
+        schema, table, _ = xml_io.result
+        cache.put(key, schema, table, answer)
+    return answer
+
+
+def solveQueries(chase_type, relation, queries, xml_io, backend=PYTHON_BACKEND, workers=1, cache=None,
+                 budget=None):
+    """Solves every query about `relation` and writes their results, in
+    order, as a single document with `xml_io`. Returns the answers as a
+    tuple, which tells them apart from the list of a minimum cover.
+
+    The schema mapping, the dependency indexes and the closures of the
+    relation are built once, in a `PreparedRelation`, and shared by all
+    the queries. Each query keeps its result and trace in a `MemoryIO`
+    at the trace level of `xml_io`, so they end up in the document.
+    """
+
+    prepared = PreparedRelation(relation)
+    answers = []
+    results = []
+    for query in queries:
+        memory_io = MemoryIO(relation, query, xml_io.trace_level, xml_io.trace_every)
+        answer = solveQuery(chase_type, relation, query, memory_io, backend, workers, cache, prepared, budget)
+        answers.append(answer)
+        results.append(memory_io.to_json(answer))
+    xml_io.write_results(results)
+    return tuple(answers)
+
+
+def solveProblem(chase_type, relation, query, xml_io, backend, workers, prepared=None, budget=None):
+    if query.task == DEPENDENCY_PRESERVATION:
+        # no table is chased, both chase types share it
+        return checkDependencyPreservation(relation, query, xml_io, prepared)
+    if query.task in (CANDIDATE_KEYS, BCNF_DECOMPOSITION, THIRD_NF_SYNTHESIS):
+        return designSchema(relation, query, xml_io, workers, prepared)
     if chase_type == DISTINGUISHED:  # distinguished chase
         if query.task != MINIMAL_COVER:
-            checkEntailment(relation, query, xml_io)
+            return checkEntailment(relation, query, xml_io, backend, prepared, budget, workers)
         else:
-            checkMinimalCover(relation, query, xml_io)
+            return checkMinimalCover(relation, query, xml_io, workers)
     else:  # simple chase
         if query.task != MINIMAL_COVER:
-            simpleEntailment(relation, query, xml_io)
+            return simpleEntailment(relation, query, xml_io, backend, prepared, budget, workers)
         else:
-            simpleMinimalCover(relation, query, xml_io)
+            return simpleMinimalCover(relation, query, xml_io, workers)
 
 
 def parse_arguments():
@@ -30,54 +150,125 @@ def parse_arguments():
 
     parser = ArgumentParser(
         description="Apply the Chase algorithm to a xml format of a problem statement\
-            and generate traces in xml format."
+            and generate traces in xml format.",
+        epilog="Run `main.py batch -h` to chase a directory of problem statements,\
+            `main.py serve -h` to serve chase requests, or `main.py convert -h` to convert\
+            between the xml, json and binary formats."
     )
     parser.add_argument("chase_type", default=DISTINGUISHED, choices=[SIMPLE, DISTINGUISHED])
     parser.add_argument("input")
     parser.add_argument("output", default="output.xml")
+    parser.add_argument("--backend", default=PYTHON_BACKEND,
+                        choices=[PYTHON_BACKEND, NUMPY_BACKEND, FACTORIZED_BACKEND],
+                        help="the table representation used to run the chase")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="the number of processes used to test for redundant dependencies and to join"
+                             " the rows of multivalued dependencies of big tables")
+    add_trace_arguments(parser)
+    add_budget_arguments(parser)
+    parser.add_argument("--cache-dir", default=None,
+                        help="a directory to cache answers in, so a problem seen before is not chased again")
+    parser.add_argument("--cache-size", type=int, default=1000,
+                        help="the number of answers kept in the cache")
+    parser.add_argument("--profile", default=None,
+                        help="a json file to write the time and counters of every phase, step and dependency to")
 
     return parser.parse_args()
 
-def setUpInitTable(relation, query):
+
+def add_trace_arguments(parser):
+    """Adds the command line arguments that control the trace."""
+
+    parser.add_argument("--trace-level", default=TRACE_FULL,
+                        choices=[TRACE_NONE, TRACE_FINAL, TRACE_EVERY, TRACE_FULL],
+                        help="which steps of the chase are traced")
+    parser.add_argument("--trace-every", type=positive_int, default=1,
+                        help="the interval between traced steps for the every trace level")
+    parser.add_argument("--trace-format", default=TRACE_FILES, choices=[TRACE_FILES, TRACE_STREAM],
+                        help="one file per traced step, or a single stream of deltas")
+    parser.add_argument("--gzip", action="store_true",
+                        help="gzip-compress the trace stream")
+
+
+def positive_int(value):
+    """Returns the command line argument `value` as an int, which must
+    be at least 1."""
+
+    number = int(value)
+    if number < 1:
+        raise ArgumentTypeError(f"must be at least 1: {value}")
+    return number
+
+
+def add_budget_arguments(parser):
+    """Adds the command line arguments that limit a chase."""
+
+    parser.add_argument("--max-steps", type=int, default=None,
+                        help="stop a chase with an unknown answer after this many steps")
+    parser.add_argument("--max-rows", type=int, default=None,
+                        help="stop a chase with an unknown answer once its table has more rows")
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="stop a chase with an unknown answer once it has run this long")
+    parser.add_argument("--max-memory", type=int, default=None,
+                        help="stop a chase with an unknown answer once the process holds more megabytes")
+
+
+def create_budget(args):
+    """Returns the `Budget` of the limits in the parsed arguments `args`,
+    or None if there are none."""
+
+    limits = (args.max_steps, args.max_rows, args.max_seconds, args.max_memory)
+    if all(limit is None for limit in limits):
+        return None
+    memory = None if args.max_memory is None else args.max_memory * 1024 * 1024
+    return Budget(args.max_steps, args.max_rows, args.max_seconds, memory)
+
+@profiled(SETUP)
+def setUpInitTable(relation, query, compiled=None):
     # convert the initTable to the tableData format
-    schema = {}
-    for idx, val in enumerate(sorted(relation.attributes)):
-        schema[val] = idx
-    schemaList = sorted(schema.items(), key=lambda x: x[1])
+    # a schema compiled for another query of the relation is reused
+    if compiled is None:
+        compiled = CompiledSchema(relation.attributes)
+    schema = compiled.positions
+    columns = list(enumerate(compiled.attributes))
     table = []
 
+    # the distinguished cells of every row are a bitmask of its columns
     task = query.task
     if task == FUNCTIONAL_DEPENDENCY:
         table = [[], []]
-        lhs = query.functional_dependencies[0][0]
+        lhs = compiled.mask(query.functional_dependencies[0][0])
         table[0] = [ALPHA for attr in schema]
-        table[1] = [ALPHA if attr in lhs else attr +
-                    str(2) for attr, idx in schemaList]
+        table[1] = [ALPHA if lhs >> pos & 1 else attr +
+                    str(2) for pos, attr in columns]
 
     elif task == MULTIVALUED_DEPENDENCY:
         table = [[], []]
-        lhs = query.multivalued_dependencies[0][0]
-        rhs = query.multivalued_dependencies[0][1]
-        table[0] = [ALPHA if (attr in lhs or attr in rhs)
-                    else attr + str(1) for attr, idx in schemaList]
-        table[1] = [ALPHA if (attr in lhs or attr in set(schema.keys()).difference(set(rhs)))
-                    else attr + str(2) for attr, idx in schemaList]
+        lhs = compiled.mask(query.multivalued_dependencies[0][0])
+        rhs = compiled.mask(query.multivalued_dependencies[0][1])
+        first = lhs | rhs
+        second = lhs | (compiled.full & ~rhs)
+        table[0] = [ALPHA if first >> pos & 1
+                    else attr + str(1) for pos, attr in columns]
+        table[1] = [ALPHA if second >> pos & 1
+                    else attr + str(2) for pos, attr in columns]
 
     elif task == LOSSLESS_JOIN:
         n = len(query.relations)  # number of subtables
         table = [[] for i in range(0, n)]
         for i in range(0, n):
-            subschema = query.relations[i].attributes
-            table[i] = [ALPHA if (attr in subschema) else attr + str(i+1)
-                        for attr, idx in schemaList]
+            subschema = compiled.mask(query.relations[i].attributes)
+            table[i] = [ALPHA if subschema >> pos & 1 else attr + str(i+1)
+                        for pos, attr in columns]
 
     return (schema, table)
 
 
-def setUpSimpleTable(relation, query):
-    schema = {}
-    for idx, val in enumerate(sorted(relation.attributes)):
-        schema[val] = idx
+@profiled(SETUP)
+def setUpSimpleTable(relation, query, compiled=None):
+    if compiled is None:
+        compiled = CompiledSchema(relation.attributes)
+    schema = compiled.positions
     schemaList = sorted(schema.items(), key=lambda x: x[1])
     table = [1, 2]
     table = list(map(lambda x: [attr[0] + str(x)
@@ -96,33 +287,46 @@ def setUpSimpleTable(relation, query):
             table[1][index] = table[0][index]
 
     elif task == LOSSLESS_JOIN:
-        # only 2 relation for simple chase
-        if len(query.relations) != 2:
-            print("Error: only 2 relations for simple chase")
-            return
-        subschema1 = query.relations[0].attributes
-        subschema2 = query.relations[1].attributes
-        uniqueTo1 = set(subschema1).difference(set(subschema2))
-        uniqueTo2 = set(subschema2).difference(set(subschema1))
-        if len(uniqueTo1) == 0:
-            print("Error: first relation is a proper subset of second relation")
-        if len(uniqueTo2) == 0:
-            print("Error: second relation is a proper subset of first relation")
-        mvdLhs = list(uniqueTo1)
-        mvdRhs = list(uniqueTo2)
-        lhs_index = list(map(lambda x: schema[x], mvdLhs))
-        for index in lhs_index:
-            table[1][index] = table[0][index]
-        query.task = MULTIVALUED_DEPENDENCY
-        query.multivalued_dependencies = [[mvdLhs, mvdRhs]]
+        # row i agrees with the joined tuple on subschema i
+        table = [[] for _ in query.relations]
+        first = joinRows(schema, query.relations)
+        for i, subschema in enumerate(query.relations):
+            attributes = compiled.mask(subschema.attributes)
+            table[i] = [attr + str((first[idx] if attributes >> idx & 1 else i) + 1)
+                        for attr, idx in schemaList]
 
     return (schema, table)
 
 
-def step(table, relation, schema):
+def joinRows(schema, relations):
+    """Returns a mapping of every column that a subschema has to the
+    first row of the simple chase table of a lossless join whose
+    subschema has it. The tuple joined from the rows takes the symbol of
+    that row in every column."""
+
+    first = {}
+    for i, subschema in reversed(list(enumerate(relations))):
+        for attr in subschema.attributes:
+            first[schema[attr]] = i
+    return first
+
+
+def step(table, relation, schema, scheduler=None):
     # loop thru all functional dependencies and multi-valued dependencies
     # if hasUpdate, return (updatedTableData, True)
     # else return (updatedTableDate, False)
+    # with a scheduler, only the dependencies that may be violated are applied
+    if PROFILER.enabled:
+        return PROFILER.run_step(applyStep, table, relation, schema, scheduler)
+    return applyStep(table, relation, schema, scheduler)
+
+
+def applyStep(table, relation, schema, scheduler=None):
+    if isinstance(table, (NumpyTableau, FactorizedTableau)):
+        return table.step(relation, schema)
+    if scheduler is not None:
+        return scheduler.step(table)
+
     table, hasFdUpdate = chaseFds(
         table, relation.functional_dependencies, schema)
 
@@ -136,8 +340,11 @@ def step(table, relation, schema):
 
 
 # unique to each chase type
+@profiled(GOAL_CHECK)
 def satisfyRequirement(table, query, schema):
     # if alr valid, return True
+    if isinstance(table, (NumpyTableau, FactorizedTableau)):
+        return table.satisfies(query, schema)
     task = query.task
     if task == FUNCTIONAL_DEPENDENCY:
         rhs = query.functional_dependencies[0][1]
@@ -162,129 +369,303 @@ def satisfyRequirement(table, query, schema):
     return False
 
 
+@profiled(GOAL_CHECK)
 def satisfySimpleRequirement(table, query, schema):
     # if alr valid, return True
+    if isinstance(table, FactorizedTableau):
+        return table.satisfies_simple(query, schema)
     task = query.task
     if task == FUNCTIONAL_DEPENDENCY:
         lhs = query.functional_dependencies[0][0]
         lshPos = list(map(lambda x: schema[x], lhs))
         rhs = query.functional_dependencies[0][1]
         rhsPos = list(map(lambda x: schema[x], rhs))
-        for i in range(0, len(table)):
-            currLhs = list(map(lambda x: table[i][x], lshPos))
-            currRhs = list(map(lambda x: table[i][x], rhsPos))
-            for j in range(i+1, len(table)):
-                checkLhs = list(map(lambda x: table[j][x], lshPos))
-                checkRhs = list(map(lambda x: table[j][x], rhsPos))
-                if checkLhs == currLhs and checkRhs != currRhs:
-                    return False
+        # every lhs projection must have a single rhs projection
+        rhsByLhs = {}
+        for row in table:
+            currLhs = tuple(row[pos] for pos in lshPos)
+            currRhs = tuple(row[pos] for pos in rhsPos)
+            if rhsByLhs.setdefault(currLhs, currRhs) != currRhs:
+                return False
         return True
 
     elif task == MULTIVALUED_DEPENDENCY:
         return satisfyMvd(table, query.multivalued_dependencies[0], schema)
 
     elif task == LOSSLESS_JOIN:
-        print('Error: This should not happen!')
-        return False
+        # the join dependency holds once the joined tuple, as renamed by
+        # the chase in the first row that has each attribute, is a row
+        first = joinRows(schema, query.relations)
+        if len(first) != len(schema):
+            return False
+        joined = [table[first[pos]][pos] for pos in range(len(schema))]
+        return any(row == joined for row in table)
 
     return False
 
 
-def checkEntailment(relation: Relation, query: Query, xml_io: XMLIO | None):
-    schema, table = setUpInitTable(relation, query)
+def checkEntailment(relation: Relation, query: Query, xml_io: XMLIO | None, backend=PYTHON_BACKEND,
+                    prepared: PreparedRelation | None = None, budget: Budget | None = None, workers=1):
+    if query.task == FUNCTIONAL_DEPENDENCY and not relation.multivalued_dependencies:
+        if xml_io is None:
+            # no trace is needed, so an fd-only problem is settled by its closure
+            lhs, rhs = query.functional_dependencies[0]
+            return isImplied(lhs, rhs, relation.functional_dependencies)
+        if xml_io.trace_level in (TRACE_NONE, TRACE_FINAL):
+            return closureEntailment(relation, query, xml_io, prepared)
+    if query.task == LOSSLESS_JOIN and not relation.multivalued_dependencies and (
+            xml_io is None or xml_io.trace_level in (TRACE_NONE, TRACE_FINAL)):
+        # no intermediate table is traced, so the join is checked without steps
+        return fdLosslessJoinEntailment(relation, query, xml_io, prepared)
+    schema, table = setUpInitTable(relation, query, prepared and prepared.compiled)
+    goal = None
+    if backend == NUMPY_BACKEND:
+        table = NumpyTableau(table)
+    elif backend == FACTORIZED_BACKEND and not relation.functional_dependencies:
+        table = FactorizedTableau(table)
+    else:
+        # the goal is updated as cells change, so checking it is O(1)
+        goal = Goal(query, schema, table)
+    if budget is not None:
+        budget.start()
+    scheduler = Scheduler(relation, schema, goal, prepared, budget, workers)
     stepNum = 1
     answer = True
-    while not satisfyRequirement(table, query, schema):
+    limit = None
+    while not (goal.reached if goal is not None else satisfyRequirement(table, query, schema)):
+        if budget is not None:
+            limit = budget.exceeded(stepNum - 1, len(table))
+            if limit is not None:
+                answer = None
+                break
         if xml_io is not None:
             xml_io.write_intermediate_result(schema, table, stepNum)
-        table, changed = step(table, relation, schema)
+        table, changed = step(table, relation, schema, scheduler)
+        if budget is not None and budget.hit is not None:
+            # a step cut short by the budget leaves the answer unknown,
+            # unless the rows it did add reach the goal
+            if goal.reached if goal is not None else satisfyRequirement(table, query, schema):
+                break
+            limit = budget.hit
+            answer = None
+            break
         if not changed:
             answer = False
             break
         stepNum += 1
+    scheduler.close()
     if xml_io is not None:
-        xml_io.write_result(schema, table, answer)
+        xml_io.write_result(schema, table, answer, limit=limit)
     return answer
 
 
-def simpleEntailment(relation: Relation, query: Query, xml_io: XMLIO | None):
-    schema, table = setUpSimpleTable(relation, query)
+def simpleEntailment(relation: Relation, query: Query, xml_io: XMLIO | None, backend=PYTHON_BACKEND,
+                     prepared: PreparedRelation | None = None, budget: Budget | None = None, workers=1):
+    schema, table = setUpSimpleTable(relation, query, prepared and prepared.compiled)
+    if backend == NUMPY_BACKEND:
+        table = NumpyTableau(table)
+    elif backend == FACTORIZED_BACKEND and not relation.functional_dependencies:
+        # the rows are only expanded when the table is written
+        table = FactorizedTableau(table)
+    if budget is not None:
+        budget.start()
+    scheduler = Scheduler(relation, schema, prepared=prepared, budget=budget, workers=workers)
     stepNum = 1
+    limit = None
     while True:
+        if budget is not None:
+            limit = budget.exceeded(stepNum - 1, len(table))
+            if limit is not None:
+                break
         if xml_io is not None:
             xml_io.write_intermediate_result(schema, table, stepNum)
-        table, changed = step(table, relation, schema)
+        table, changed = step(table, relation, schema, scheduler)
+        if budget is not None and budget.hit is not None:
+            limit = budget.hit
+            break
         if not changed:
             break
         stepNum += 1
-    answer = satisfySimpleRequirement(table, query, schema)
+    scheduler.close()
+    if isinstance(table, NumpyTableau):
+        table = table.to_table()
+    # the goal of the simple chase is only checked at the fixpoint
+    answer = satisfySimpleRequirement(table, query, schema) if limit is None else None
+    if xml_io is not None:
+        xml_io.write_result(schema, table, answer, limit=limit)
+    return answer
+
+
+@profiled(CHASE)
+def closureEntailment(relation: Relation, query: Query, xml_io: XMLIO,
+                      prepared: PreparedRelation | None = None):
+    """Answers a functional dependency query about a relation without
+    multivalued dependencies from the closure of its lhs, shared by
+    every query of the relation if it is `prepared`, when no
+    intermediate table is traced.
+
+    The table written is the fixpoint of the chase: the second row is
+    distinguished exactly on the closure of the lhs.
+    """
+
+    lhs, rhs = query.functional_dependencies[0]
+    if prepared is not None:
+        compiled = prepared.compiled
+        closure = prepared.maskClosure(compiled.mask(lhs))
+    else:
+        compiled = CompiledSchema(relation.attributes)
+        closure = ClosureCache(relation.functional_dependencies, compiled).maskClosure(compiled.mask(lhs))
+    schema, table = setUpInitTable(relation, query, compiled)
+    table[1] = [ALPHA if closure >> pos & 1 else value for pos, value in enumerate(table[1])]
+    answer = compiled.mask(rhs) & ~closure == 0
+    xml_io.write_result(schema, table, answer)
+    return answer
+
+
+@profiled(CHASE)
+def fdLosslessJoinEntailment(relation: Relation, query: Query, xml_io: XMLIO | None,
+                             prepared: PreparedRelation | None = None):
+    """Answers a lossless join query about a relation without
+    multivalued dependencies with `fdLosslessJoin`, which stops as soon
+    as a row is entirely distinguished, when no intermediate table is
+    traced."""
+
+    if prepared is not None:
+        schema = prepared.schema
+    else:
+        schema = {attr: idx for idx, attr in enumerate(sorted(relation.attributes))}
+    subschemas = [subschema.attributes for subschema in query.relations]
+    answer, table = fdLosslessJoin(schema, subschemas, relation.functional_dependencies, prepared)
     if xml_io is not None:
         xml_io.write_result(schema, table, answer)
     return answer
 
 
-def checkMinimalCover(relation: Relation, query: Query, xml_io: XMLIO | None):
-    fds = query.functional_dependencies
-    pos = 0
-    step_num = 1
-    if len(fds) == 0:
-        return
-    xml_io.write_min_cov(fds, 0)
-    while pos < len(fds):
-        newQuery = Query(FUNCTIONAL_DEPENDENCY)
-        newQuery.add_functional_dependency(fds[pos][0], fds[pos][1])
-        newRelation = Relation(relation.name, relation.attributes)
-        for i, fd in enumerate(fds):
-            if i != pos:
-                newRelation.add_functional_dependency(fd[0], fd[1])
-        if checkEntailment(newRelation, newQuery, None):
-            fds.pop(pos)
-            xml_io.write_min_cov(fds, step_num)
-            step_num += 1
-        else:
-            pos += 1
+@profiled(CHASE)
+def checkDependencyPreservation(relation: Relation, query: Query, xml_io: XMLIO | None,
+                                prepared: PreparedRelation | None = None):
+    """Returns whether the decomposition of `query` preserves the
+    functional dependencies of the query, or of the relation if the
+    query has none, and writes the ones it loses with the answer.
+
+    The closures are taken on bitmasks under the dependencies of the
+    relation, with the `ClosureCache` of the `PreparedRelation` if there
+    is one.
+    """
+
+    fds = query.functional_dependencies or relation.functional_dependencies
+    if prepared is not None:
+        compiled = prepared.compiled
+        closure = prepared.maskClosure
+    else:
+        compiled = CompiledSchema(relation.attributes)
+        closure = ClosureCache(relation.functional_dependencies, compiled).maskClosure
+    subschemas = [compiled.mask(subschema.attributes) for subschema in query.relations]
+    lost = compiled.decompile(lostDependencies(compiled.compile(fds), subschemas, closure))
+    answer = not lost
+    if xml_io is not None:
+        xml_io.write_result(compiled.positions, [], answer, lost)
+    return answer
 
 
-def simpleMinimalCover(relation: Relation, query: Query, xml_io: XMLIO | None):
+@profiled(CHASE)
+def designSchema(relation: Relation, query: Query, xml_io: XMLIO | None, workers=1,
+                 prepared: PreparedRelation | None = None):
+    """Returns the candidate keys of the relation, or its decomposition
+    into Boyce-Codd or third normal form, under its functional
+    dependencies, as sorted lists of attributes, and writes them with
+    `xml_io.write_design`.
+
+    The keys or subschemas found so far are written with
+    `xml_io.write_schemas` after every change. Third normal form starts
+    from a canonical cover of the dependencies, written at step 0.
+    Attributes are handled as the bitmasks of a `CompiledSchema`.
+    """
+
+    fds = relation.functional_dependencies
+    if prepared is not None:
+        compiled = prepared.compiled
+        closure = prepared.maskClosure
+        masks = prepared.fdMasks
+    else:
+        compiled = CompiledSchema(relation.attributes)
+        cache = ClosureCache(fds, compiled)
+        closure = cache.maskClosure
+        masks = cache.masks
+    stepNum = -1
+    # every step traces all the schemas so far, so each is named once
+    names = {}
+
+    def trace(schemas):
+        nonlocal stepNum
+        stepNum += 1
+        if xml_io is not None:
+            for schema in schemas:
+                if schema not in names:
+                    names[schema] = compiled.names(schema)
+            xml_io.write_schemas([names[schema] for schema in schemas], stepNum)
+
+    if query.task == CANDIDATE_KEYS:
+        schemas = candidateKeys(compiled, masks, closure, trace)
+    elif query.task == BCNF_DECOMPOSITION:
+        trace([compiled.full])
+        schemas = bcnfDecomposition(compiled.full, masks, closure, trace)
+    else:
+        cover = canonicalCover(fds, None, workers)
+        stepNum += 1
+        if xml_io is not None:
+            xml_io.write_min_cov(cover, stepNum)
+        schemas = thirdNormalForm(compiled.full, compiled.compile(cover), closure, trace)
+    schemas = [compiled.names(schema) for schema in schemas]
+    if xml_io is not None:
+        xml_io.write_design(query.task, schemas)
+    return schemas
+
+
+@profiled(CHASE)
+def checkMinimalCover(relation: Relation, query: Query, xml_io: XMLIO | None, workers=1):
     fds = query.functional_dependencies
-    pos = 0
-    step_num = 1
     if len(fds) == 0:
+        if xml_io is not None:
+            xml_io.write_cover([])
         return
-    xml_io.write_min_cov(fds, 0)
-    while pos < len(fds):
-        newQuery = Query(FUNCTIONAL_DEPENDENCY)
-        newQuery.add_functional_dependency(fds[pos][0], fds[pos][1])
-        newRelation = Relation(relation.name, relation.attributes)
-        for i, fd in enumerate(fds):
-            if i != pos:
-                newRelation.add_functional_dependency(fd[0], fd[1])
-        if checkEntailment(newRelation, newQuery, None):
-            fds.pop(pos)
-            xml_io.write_min_cov(fds, step_num)
-            step_num += 1
-        else:
-            pos += 1
+    # the query is left as it was read, since its fd keys and fingerprint
+    # describe its own dependencies, not the cover
+    cover = canonicalCover(fds, xml_io, workers)
+    # the cover is written whatever the trace level, like any other result
+    if xml_io is not None:
+        xml_io.write_cover(cover)
+    return cover
+
+
+def simpleMinimalCover(relation: Relation, query: Query, xml_io: XMLIO | None, workers=1):
+    # the cover does not depend on the chase, both chase types share it
+    return checkMinimalCover(relation, query, xml_io, workers)
 
 
 def satisfyMvd(table, mvd, schema):
+    """Returns whether `table` satisfies the multivalued dependency
+    `mvd`.
+
+    The rows are grouped by their lhs projection. The dependency holds
+    if, within every group, every rhs projection appears with every
+    projection on the remaining columns, i.e. the group has as many
+    distinct rows as the product of the two numbers of projections.
+    """
+
     lhs = mvd[0]
     lshPos = list(map(lambda x: schema[x], lhs))
     rhs = mvd[1]
     rhsPos = list(map(lambda x: schema[x], rhs))
-    for i in range(0, len(table)):
-        currLhs = list(map(lambda x: table[i][x], lshPos))
-        currRhs = list(map(lambda x: table[i][x], rhsPos))
-        for j in range(0, len(table)):
-            checkLhs = list(map(lambda x: table[j][x], lshPos))
-            checkRhs = list(map(lambda x: table[j][x], rhsPos))
-            if checkLhs == currLhs and checkRhs != currRhs:
-                currRowCopy = table[i].copy()
-                for k in range(0, len(currRowCopy)):
-                    if k not in lshPos and k not in rhsPos:
-                        currRowCopy[k] = table[j][k]
-                if currRowCopy not in table:
-                    return False
+    restPos = [pos for pos in range(len(schema)) if pos not in lshPos and pos not in rhsPos]
+    groups = groupRows({}, table, lshPos, rhsPos, restPos)
+    sizes = {}
+    for row in RowStore(table):
+        currLhs = tuple(row[pos] for pos in lshPos)
+        sizes[currLhs] = sizes.get(currLhs, 0) + 1
+    for currLhs, (allRhs, allRest) in groups.items():
+        if sizes[currLhs] != len(allRhs) * len(allRest):
+            return False
     return True
 
 
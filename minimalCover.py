@@ -0,0 +1,204 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from classes.ClosureCache import ClosureCache
+from classes.CompiledSchema import CompiledSchema, bitPositions
+from closure import indexByBit, maskClosure
+from utils.profiler import PROFILER
+
+# the dependencies, their index and lhs sizes in a worker process of the pool
+workerFds = []
+workerIndex = {}
+workerSizes = []
+
+
+def canonicalCover(fds: list[list[list[str]]], xml_io, workers: int = 1):
+    """Returns a canonical cover of `fds`.
+
+    The cover is built in four stages: splitting every rhs into single
+    attributes, removing extraneous lhs attributes, removing redundant
+    dependencies and merging the dependencies with the same lhs. All
+    stages share one `ClosureCache`, over the attributes of `fds` as
+    bitmasks. The cover after every change is
+    written with `xml_io.write_min_cov`, starting with `fds` at step 0.
+    With more than one worker, redundant dependencies are found with
+    `removeRedundantParallel`, which gives the same cover.
+    """
+
+    stepNum = 0
+    if xml_io is not None:
+        xml_io.write_min_cov(fds, stepNum)
+
+    def trace(cover):
+        nonlocal stepNum
+        stepNum += 1
+        if xml_io is not None:
+            xml_io.write_min_cov(cover, stepNum)
+
+    cache = ClosureCache(compiled=CompiledSchema(attr for lhs, rhs in fds for attr in lhs + rhs))
+    active = splitRhs(fds, cache)
+    # splitting can change the cover without changing its size
+    mask = cache.compiled.mask
+    if [cache.masks[i] for i in bitPositions(active)] != [(mask(lhs), mask(rhs)) for lhs, rhs in fds]:
+        trace(activeFds(cache, active))
+    active = reduceLhs(cache, active, trace)
+    if workers > 1:
+        active = removeRedundantParallel(cache, active, trace, workers)
+    else:
+        active = removeRedundant(cache, active, trace)
+    cover = mergeLhs(activeFds(cache, active))
+    if len(cover) != bin(active).count("1"):
+        trace(cover)
+    if PROFILER.enabled:
+        PROFILER.add("closures_computed", len(cache.closures))
+        PROFILER.add("closure_cache_hits", cache.hits)
+    return cover
+
+
+def activeFds(cache: ClosureCache, active: int):
+    """Returns the dependencies of `cache` in the bitmask `active`."""
+
+    enabled = bin(active)[:1:-1]
+    return [cache.fds[i] for i, bit in enumerate(enabled) if bit == "1"]
+
+
+def activeMasks(cache: ClosureCache, active: int):
+    """Returns the set of the (lhs, rhs) bitmasks of the dependencies
+    of `cache` in the bitmask `active`."""
+
+    enabled = bin(active)[:1:-1]
+    return {cache.masks[i] for i, bit in enumerate(enabled) if bit == "1"}
+
+
+def splitRhs(fds: list[list[list[str]]], cache: ClosureCache):
+    """Adds every non-trivial lhs -> a, for each attribute a in the rhs
+    of a dependency in `fds`, to `cache` once, and returns the bitmask
+    of the added dependencies."""
+
+    active = 0
+    seen = set()
+    mask = cache.compiled.mask
+    for lhs, rhs in fds:
+        left = mask(lhs)
+        for attr in rhs:
+            key = (left, mask([attr]))
+            if left & key[1] or key in seen:
+                continue
+            seen.add(key)
+            active |= 1 << cache.add(list(lhs), [attr])
+    return active
+
+
+def reduceLhs(cache: ClosureCache, active: int, trace):
+    """Removes the extraneous lhs attributes of the active dependencies
+    and returns the new bitmask of active dependencies.
+
+    An attribute b of X -> a is extraneous if a is in the closure of
+    X - {b}. A reduced dependency is added to `cache` in place of the
+    original one, unless it is already active.
+    """
+
+    for i in range(len(cache.fds)):
+        if not active >> i & 1:
+            continue
+        left, right = cache.masks[i]
+        reduced = left
+        for pos in bitPositions(left):
+            # a single attribute is never dropped
+            if reduced & (reduced - 1):
+                candidate = reduced & ~(1 << pos)
+                if right & cache.maskClosure(candidate, active):
+                    reduced = candidate
+        if reduced == left:
+            continue
+        active &= ~(1 << i)
+        if (reduced, right) not in activeMasks(cache, active):
+            active |= 1 << cache.add(cache.compiled.names(reduced), cache.fds[i][1])
+        trace(activeFds(cache, active))
+    return active
+
+
+def removeRedundant(cache: ClosureCache, active: int, trace):
+    """Removes, in order, every active dependency that is entailed by
+    the other active dependencies and returns the new bitmask of active
+    dependencies."""
+
+    for i in range(len(cache.fds)):
+        if active >> i & 1 and isRedundant(cache, active, i):
+            active &= ~(1 << i)
+            trace(activeFds(cache, active))
+    return active
+
+
+def removeRedundantParallel(cache: ClosureCache, active: int, trace, workers: int):
+    """Removes the same dependencies as `removeRedundant`, testing a
+    window of candidates at a time in a process pool.
+
+    Every candidate of a window is tested against the cover at the
+    start of the window, and the verdicts are committed in order.
+    Removing a dependency only shrinks closures, so a candidate found
+    not redundant stays not redundant, but a candidate found redundant
+    after a removal in the same window has to be tested again and
+    starts the next window.
+    """
+
+    candidates = [i for i in range(len(cache.fds)) if active >> i & 1]
+    window = workers * 4
+    pos = 0
+    with ProcessPoolExecutor(workers, initializer=initWorker, initargs=(cache.masks,)) as pool:
+        while pos < len(candidates):
+            tested = active
+            batch = candidates[pos:pos + window]
+            verdicts = pool.map(testRedundant, [(tested, i) for i in batch])
+            for i, redundant in zip(batch, verdicts):
+                if redundant:
+                    if active != tested:
+                        break
+                    active &= ~(1 << i)
+                    trace(activeFds(cache, active))
+                pos += 1
+    return active
+
+
+def initWorker(fds: list[tuple[int, int]]):
+    """Stores the dependencies, as bitmasks, their index and the sizes
+    of their lhs in a worker process."""
+
+    global workerFds, workerIndex, workerSizes
+    workerFds = fds
+    workerIndex = indexByBit(fds)
+    workerSizes = [lhs.bit_count() for lhs, _ in fds]
+
+
+def testRedundant(task: tuple[int, int]):
+    """Returns whether, in a worker process, the dependency at index
+    `task[1]` is entailed by the other dependencies in the bitmask
+    `task[0]`."""
+
+    active, i = task
+    lhs, rhs = workerFds[i]
+    closure = maskClosure(lhs, workerFds, workerIndex, active=active & ~(1 << i), target=rhs,
+                          sizes=workerSizes)
+    return rhs & ~closure == 0
+
+
+def isRedundant(cache: ClosureCache, active: int, i: int):
+    """Returns whether the dependency at `i` is entailed by the other
+    dependencies in the bitmask `active`."""
+
+    lhs, rhs = cache.masks[i]
+    return rhs & ~cache.maskClosure(lhs, active & ~(1 << i)) == 0
+
+
+def mergeLhs(fds: list[list[list[str]]]):
+    """Returns `fds` with the dependencies that share an lhs merged into
+    one, in order of first appearance."""
+
+    merged: dict[tuple[str, ...], list[list[str]]] = {}
+    for lhs, rhs in fds:
+        fd = merged.setdefault(tuple(lhs), [list(lhs), []])
+        for attr in rhs:
+            if attr not in fd[1]:
+                fd[1].append(attr)
+    for fd in merged.values():
+        fd[1].sort()
+    return list(merged.values())
@@ -0,0 +1,213 @@
+from classes.CompiledSchema import bitPositions
+
+
+def coreAndExterior(full: int, fds: list[tuple[int, int]]):
+    """Returns the core of the relation, the attributes in no rhs, which
+    are in every key, and its exterior, the attributes in some rhs but
+    in no lhs, which are in no key, as bitmasks.
+
+    `full` is the bitmask of all the attributes. A dependency only
+    counts an attribute of its rhs that is not in its own lhs.
+    """
+
+    inLhs = 0
+    inRhs = 0
+    for lhs, rhs in fds:
+        inLhs |= lhs
+        inRhs |= rhs & ~lhs
+    return full & ~inRhs, full & inRhs & ~inLhs
+
+
+def minimalKey(full: int, superkey: int, core: int, closure):
+    """Returns a key of the relation inside the superkey `superkey`,
+    found by dropping, in order, every attribute outside the `core` that
+    is not needed to determine all of `full`."""
+
+    key = superkey
+    for pos in bitPositions(superkey & ~core):
+        candidate = key & ~(1 << pos)
+        if full & ~closure(candidate) == 0:
+            key = candidate
+    return key
+
+
+def candidateKeys(compiled, fds: list[tuple[int, int]], closure, trace=None):
+    """Returns every candidate key of a relation under the functional
+    dependencies `fds`, as bitmasks in order of size.
+
+    The keys are enumerated as by Lucchesi and Osborn, in time
+    polynomial in the number of keys: for a key K and a dependency
+    X -> Y, X u (K - Y) is a superkey, and it holds a key that is not
+    known yet unless it contains a known key. Every attribute of the
+    core is in every key and no attribute of the exterior is in any, so
+    only the attributes in between are ever dropped, and a dependency
+    whose rhs is all in the exterior never gives a new superkey.
+
+    Sets of attributes are bitmasks, so testing a superkey against every
+    known key takes an integer operation per key.
+
+    Parameters
+    ----------
+    compiled : CompiledSchema
+        The bit positions of the attributes of the relation.
+    fds : list[tuple[int, int]]
+        The functional dependencies of the relation as bitmasks.
+    closure : callable
+        Returns the closure of a bitmask of attributes under `fds`.
+    trace : callable, optional
+        Called with the keys found so far every time one is found.
+    """
+
+    full = compiled.full
+    core, exterior = coreAndExterior(full, fds)
+    if full & ~closure(core) == 0:
+        keys = [core]
+    else:
+        keys = [minimalKey(full, full & ~exterior, core, closure)]
+    if trace is not None:
+        trace(keys)
+    useful = [(lhs, rhs) for lhs, rhs in fds if rhs & ~(exterior | lhs)]
+    i = 0
+    while i < len(keys):
+        key = keys[i]
+        i += 1
+        for lhs, rhs in useful:
+            superkey = lhs | (key & ~rhs)
+            # a known key is inside the superkey if it has no bit outside
+            if not all(map((~superkey).__and__, keys)):
+                continue
+            keys.append(minimalKey(full, superkey, core, closure))
+            if trace is not None:
+                trace(keys)
+    return sorted(keys, key=lambda key: (key.bit_count(), compiled.names(key)))
+
+
+def bcnfDecomposition(full: int, fds: list[tuple[int, int]], closure, trace=None):
+    """Returns a lossless decomposition of a relation with the
+    attributes in the bitmask `full` into subschemas in Boyce-Codd
+    normal form under the functional dependencies `fds`, as bitmasks.
+
+    A subschema is split on a violation found by `bcnfSplit` until none
+    of them has one, and the subschemas inside another are dropped.
+    `closure` and `trace` are those of `candidateKeys`, and `trace` is
+    called with the subschemas after every split.
+    """
+
+    done = []
+    pending = [full]
+    while pending:
+        schema = pending.pop()
+        split = bcnfSplit(schema, fds, closure)
+        if split is None:
+            done.append(schema)
+            continue
+        pending.extend(split)
+        if trace is not None:
+            trace(done + pending)
+    return removeSubsumed(done)
+
+
+def bcnfSplit(schema: int, fds: list[tuple[int, int]], closure):
+    """Returns 2 subschemas that `schema` can be split into losslessly
+    towards Boyce-Codd normal form, or None if no violation is found.
+
+    A set of attributes X of the schema whose closure holds another
+    attribute of the schema but not all of it is a violation, split
+    into the closure of X and the rest of the schema with X. The lhs of
+    `fds` inside the schema are tried first. The projection of `fds` can
+    have violations that are not in `fds` though, and projecting it
+    takes exponential time, so the schema is then tested for pairs as
+    by Tsou and Fischer: the schema is in normal form if no attribute a
+    is in the closure of the schema without a and another attribute b.
+    Such a pair is only a violation if the schema without a and b is
+    not a superkey of it, so a schema whose pairs all have a superkey
+    there, like ABC with C -> AB, is kept. Otherwise the schema without a
+    and b is shrunk to a minimal set that still determines a, so that
+    the split takes off more than one attribute. Deciding the normal
+    form of a projection is coNP-complete, so a violation that no lhs
+    and no pair witnesses is not searched for.
+    """
+
+    for lhs, rhs in fds:
+        if lhs & ~schema or not schema & rhs & ~lhs:
+            continue
+        reached = closure(lhs) & schema
+        if reached != schema:
+            return (reached, lhs | (schema & ~reached))
+
+    pair = violatingPair(schema, closure)
+    if pair is None:
+        return None
+    attr, other = pair
+    lhs = schema & ~(attr | other)
+    # a subset of the lhs is not a superkey either
+    for pos in bitPositions(lhs):
+        candidate = lhs & ~(1 << pos)
+        if closure(candidate) & attr:
+            lhs = candidate
+    reached = closure(lhs) & schema
+    return (reached, lhs | (schema & ~reached))
+
+
+def violatingPair(schema: int, closure):
+    """Returns attributes a and b of `schema` such that a is in the
+    closure of the schema without a and b, which is not a superkey of
+    the schema, or None if there are none.
+
+    The schema without a and b then violates the normal form. Closures
+    only shrink as attributes are taken out, so an attribute that is not
+    in the closure of the schema without itself is in no pair. The
+    attributes are returned as single bits.
+    """
+
+    for pos in bitPositions(schema):
+        attr = 1 << pos
+        rest = schema & ~attr
+        if not closure(rest) & attr:
+            continue
+        for other in bitPositions(rest):
+            reached = closure(rest & ~(1 << other))
+            if reached & attr and schema & ~reached:
+                return (attr, 1 << other)
+    return None
+
+
+def thirdNormalForm(full: int, cover: list[tuple[int, int]], closure, trace=None):
+    """Returns a lossless and dependency preserving decomposition of a
+    relation with the attributes in the bitmask `full` into subschemas
+    in third normal form, as bitmasks, synthesized from `cover`, a
+    canonical cover of its functional dependencies.
+
+    Every dependency of the cover gives a subschema of its attributes,
+    a key is added if no subschema holds one, and the subschemas inside
+    another are dropped. `closure` and `trace` are those of
+    `candidateKeys`, and `trace` is called with the subschemas after
+    every change.
+    """
+
+    schemas = []
+    for lhs, rhs in cover:
+        schemas.append(lhs | rhs)
+        if trace is not None:
+            trace(schemas)
+    if not any(full & ~closure(schema) == 0 for schema in schemas):
+        core, exterior = coreAndExterior(full, cover)
+        schemas.append(minimalKey(full, full & ~exterior, core, closure))
+        if trace is not None:
+            trace(schemas)
+    reduced = removeSubsumed(schemas)
+    if len(reduced) != len(schemas) and trace is not None:
+        trace(reduced)
+    return reduced
+
+
+def removeSubsumed(schemas: list[int]):
+    """Returns `schemas` without the ones that are the same as or inside
+    another, in order of first appearance."""
+
+    kept = []
+    for i, schema in enumerate(schemas):
+        if any(schema & ~other == 0 and (schema != other or j < i) for j, other in enumerate(schemas)):
+            continue
+        kept.append(schema)
+    return kept
@@ -0,0 +1,120 @@
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+
+from chaseMvd import groupRows, joinDelta
+from classes.RowStore import RowStore
+
+# the fewest rows a table has for a multivalued dependency to be joined in parallel
+PARALLEL_ROWS = 20000
+
+
+class ParallelJoin():
+    """
+    Joins the rows of a multivalued dependency in a pool of worker
+    processes, with the rows hash-partitioned by their lhs projection.
+
+    The rows a multivalued dependency requires from a pair of rows have
+    the lhs projection of the pair, so every lhs group is joined on its
+    own, and a row generated for a group can only already be in the
+    table as a row of the same group. A round of the join sends every
+    worker the groups of its partition that have new rows, which it
+    groups and joins like `joinDelta`, deduplicating against the rows
+    of the partition only. The rows of the groups are then merged in
+    the order of the first new row of each group, the order `joinDelta`
+    generates them in, so a step adds the same rows as the sequential
+    one, in the same order as long as the workers hash strings like the
+    main process, as forked workers do.
+
+    Partitioning and sending the rows takes time linear in the table,
+    so the speedup comes from joins that generate many rows for a table
+    of at least `PARALLEL_ROWS` rows.
+
+    Attributes
+    ----------
+    workers : int
+        The number of worker processes and partitions.
+    pool : ProcessPoolExecutor | None
+        The worker processes, started by the first join.
+
+    Methods
+    -------
+    join(table, seen, mvd, rest_col, width)
+        Returns the rows a multivalued dependency requires from the new
+        rows of the table.
+    close()
+        Stops the worker processes.
+    """
+
+    def __init__(self, workers):
+        """
+        Parameters
+        ----------
+        workers : int
+            The number of worker processes.
+        """
+
+        self.workers = workers
+        self.pool = None
+
+    def join(self, table, seen, mvd, rest_col, width):
+        """Returns the rows the multivalued dependency `mvd`, as column
+        indexes, requires from the pairs of rows of `table` in which at
+        least one row is at index `seen` or later, in the order of
+        `joinDelta`."""
+
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers)
+        lhs_col = mvd[0]
+        parts = self.workers
+        old = [[] for _ in range(parts)]
+        new = [[] for _ in range(parts)]
+        indexes = [[] for _ in range(parts)]
+        # only the groups with a new row are joined
+        partOf = {}
+        for index in range(seen, len(table)):
+            row = table[index]
+            lhs = tuple(row[i] for i in lhs_col)
+            part = partOf.get(lhs)
+            if part is None:
+                part = partOf[lhs] = hash(lhs) % parts
+            new[part].append(row)
+            indexes[part].append(index)
+        for index in range(seen):
+            row = table[index]
+            part = partOf.get(tuple(row[i] for i in lhs_col))
+            if part is not None:
+                old[part].append(row)
+        tasks = [(mvd, rest_col, width, old[part], new[part], indexes[part]) for part in range(parts) if new[part]]
+        joined = self.pool.map(joinPartition, tasks)
+        return [row for _, rows in heapq.merge(*joined, key=itemgetter(0)) for row in rows]
+
+    def close(self):
+        """Stops the worker processes if they were started."""
+
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+def joinPartition(task):
+    """Returns, in a worker process, the rows a multivalued dependency
+    requires from the old and new rows of a partition, as the index in
+    the table of the first new row of every group that requires rows,
+    with the rows, in order of the index."""
+
+    mvd, rest_col, width, oldRows, newRows, newIndexes = task
+    lhs_col, rhs_col = mvd
+    groups = groupRows({}, oldRows, lhs_col, rhs_col, rest_col)
+    groupRows(groups, newRows, lhs_col, rhs_col, rest_col)
+    delta = groupRows({}, newRows, lhs_col, rhs_col, rest_col)
+    first = {}
+    for row, index in zip(newRows, newIndexes):
+        first.setdefault(tuple(row[i] for i in lhs_col), index)
+    rows = RowStore(oldRows + newRows)
+    joined = []
+    for lhs, group in delta.items():
+        generated = joinDelta(groups, {lhs: group}, mvd, rest_col, width, rows)
+        if generated:
+            joined.append((first[lhs], generated))
+    return joined
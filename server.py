@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import traceback
+import xml.etree.ElementTree as ET
+from argparse import ArgumentParser
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from urllib.parse import parse_qs, urlsplit
+
+from classes.ResultCache import ResultCache
+from classes.json_io import read_problems
+from classes.memory_io import MemoryIO
+from classes.xml_io import XMLIO
+from main import add_budget_arguments, create_budget, solve
+from utils.common import (DISTINGUISHED, SIMPLE, PYTHON_BACKEND, NUMPY_BACKEND, FACTORIZED_BACKEND, TRACE_NONE,
+                          TRACE_FINAL, TRACE_EVERY, TRACE_FULL)
+
+DEFAULT_PORT = 8421
+MAX_BODY_BYTES = 64 * 1024 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+# the answer cache of a worker process of the pool
+workerCache = None
+# the limits of every chase of a worker process of the pool
+workerBudget = None
+
+
+def serveMain(argv):
+    """Runs the chase server until it is interrupted and returns the
+    exit status."""
+
+    args = parse_serve_arguments(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def parse_serve_arguments(argv):
+    """Set up the command line arguments of the server mode and parse it."""
+
+    parser = ArgumentParser(
+        prog="main.py serve",
+        description="Serve chase requests over localhost http or a unix socket, with the\
+            engine kept loaded in a pool of worker processes."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None,
+                        help="the path of a unix socket to listen on instead of a tcp port")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="the number of worker processes (default is the number of cpus)")
+    parser.add_argument("--backend", default=PYTHON_BACKEND,
+                        choices=[PYTHON_BACKEND, NUMPY_BACKEND, FACTORIZED_BACKEND],
+                        help="the default table representation")
+    add_budget_arguments(parser)
+    parser.add_argument("--memory-cache", type=int, default=1024,
+                        help="the number of responses kept in memory for repeated requests")
+    parser.add_argument("--cache-dir", default=None,
+                        help="a directory to cache answers in, shared by all workers")
+    parser.add_argument("--cache-size", type=int, default=1000)
+
+    return parser.parse_args(argv)
+
+
+def initWorker(cacheDir, cacheSize, budget=None):
+    """Sets up the answer cache and the budget of a worker process."""
+
+    global workerCache, workerBudget
+    if cacheDir is not None:
+        workerCache = ResultCache(cacheDir, cacheSize)
+    workerBudget = budget
+
+
+def warmUp():
+    """Does nothing, so submitting it starts a worker process."""
+
+    return os.getpid()
+
+
+def chaseDocument(document, contentType, chase_type, backend, trace_level, trace_every):
+    """Chases one problem statement, given as xml or json bytes, in a
+    worker process and returns the response as a dict."""
+
+    start = time.perf_counter()
+    if "json" in contentType or document.lstrip().startswith(b"{"):
+        relation, queries = read_problems(document)
+    else:
+        relation, queries = XMLIO(None, None).read_stream_problems(BytesIO(document))
+    memory_io = MemoryIO(relation, queries[0], trace_level, trace_every, queries)
+    answer = solve(chase_type, memory_io, backend, cache=workerCache, budget=workerBudget)
+    response = memory_io.to_json(answer)
+    response["seconds"] = time.perf_counter() - start
+    return response
+
+
+class ChaseServer():
+    """
+    An asyncio server that answers chase requests over http/1.1 with
+    keep-alive, sending every chase to a pool of worker processes.
+
+    Requests
+    --------
+    GET /health
+        Returns the status of the server.
+    POST /chase?type=distinguished&trace=none&every=1&backend=python&cache=1
+        Chases the problem statement in the body, in the xml format or
+        the json format of `read_problems`, and returns the answer, the
+        final table and, unless `trace` is `none` or `final`, the
+        trace, or the `results` of every query if there are several.
+        A chase that hits a limit of the server's `Budget` answers null
+        with the `limit` and its partial table.
+        Identical requests are answered from memory unless `cache` is 0.
+
+    Attributes
+    ----------
+    pool : ProcessPoolExecutor
+        The worker processes that run the chases.
+    responses : OrderedDict[str, dict]
+        The most recent responses, keyed by a hash of their request.
+    """
+
+    def __init__(self, workers=None, backend=PYTHON_BACKEND, memoryCache=1024, cache=None, budget=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.backend = backend
+        self.budget = budget
+        self.memoryCache = memoryCache
+        self.cache = cache
+        self.responses = OrderedDict()
+        self.requests = 0
+        self.pool = None
+
+    def start_pool(self):
+        """Starts the worker processes, so the first requests do not
+        pay for their start up."""
+
+        cacheDir, cacheSize = self.cache or (None, None)
+        self.pool = ProcessPoolExecutor(self.workers, initializer=initWorker,
+                                        initargs=(cacheDir, cacheSize, self.budget))
+        for _ in range(self.workers):
+            self.pool.submit(warmUp)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        """Answers the requests of one connection until it is closed."""
+
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except ValueError as error:
+                    # the rest of a malformed request cannot be told from the next one
+                    await self.write_response(writer, 400, {"error": f"malformed request: {error}"}, False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                if body is None:
+                    status, response = 413, {"error": "the request body is too large"}
+                else:
+                    status, response = await self.respond(method, target, headers, body)
+                keepAlive = headers.get("connection", "").lower() != "close"
+                await self.write_response(writer, status, response, keepAlive)
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        """Returns the method, target, headers and body of the next
+        request, or None at the end of the connection. The body is None
+        if it is too large. A malformed request line or content length
+        raises a ValueError."""
+
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_BYTES:
+            return (method, target, {"connection": "close"}, None)
+        body = await reader.readexactly(length) if length else b""
+        return (method, target, headers, body)
+
+    async def write_response(self, writer, status, response, keepAlive):
+        payload = json.dumps(response).encode()
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keepAlive else 'close'}\r\n\r\n")
+        writer.write(head.encode() + payload)
+        await writer.drain()
+
+    async def respond(self, method, target, headers, body):
+        """Returns the status and response of a request."""
+
+        url = urlsplit(target)
+        if url.path == "/health":
+            return 200, {"status": "ok", "workers": self.workers, "requests": self.requests}
+        if url.path != "/chase":
+            return 404, {"error": f"no such path: {url.path}"}
+        if method != "POST":
+            return 405, {"error": "problems are sent with POST"}
+        self.requests += 1
+
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        chase_type = params.get("type", DISTINGUISHED)
+        backend = params.get("backend", self.backend)
+        trace_level = params.get("trace", TRACE_NONE)
+        if chase_type not in (SIMPLE, DISTINGUISHED):
+            return 400, {"error": f"unknown chase type: {chase_type}"}
+        if backend not in (PYTHON_BACKEND, NUMPY_BACKEND, FACTORIZED_BACKEND):
+            return 400, {"error": f"unknown backend: {backend}"}
+        if trace_level not in (TRACE_NONE, TRACE_FINAL, TRACE_EVERY, TRACE_FULL):
+            return 400, {"error": f"unknown trace level: {trace_level}"}
+        try:
+            trace_every = int(params.get("every", 1))
+        except ValueError:
+            return 400, {"error": "every must be an integer"}
+        if trace_every < 1:
+            return 400, {"error": "every must be at least 1"}
+        contentType = headers.get("content-type", "")
+
+        key = None
+        if params.get("cache", "1") != "0" and self.memoryCache > 0:
+            request = f"{chase_type}|{backend}|{trace_level}|{trace_every}|{'json' in contentType}|"
+            key = hashlib.sha256(request.encode() + body).hexdigest()
+            if key in self.responses:
+                self.responses.move_to_end(key)
+                return 200, dict(self.responses[key], cached=True)
+
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        try:
+            response = await loop.run_in_executor(pool, chaseDocument, body, contentType, chase_type,
+                                                  backend, trace_level, trace_every)
+        except BrokenProcessPool:
+            # every request in flight sees the pool break, so only the
+            # first one to get here replaces it
+            if self.pool is pool:
+                pool.shutdown(wait=False)
+                self.start_pool()
+            return 500, {"error": "worker process died"}
+        except (ET.ParseError, json.JSONDecodeError, KeyError, TypeError, ValueError) as error:
+            return 400, {"error": "".join(traceback.format_exception_only(error)).strip()}
+        except Exception as error:
+            return 500, {"error": "".join(traceback.format_exception_only(error)).strip()}
+
+        # a chase stopped at a time or memory limit may finish next time
+        limited = "limit" in response or any("limit" in result for result in response.get("results", ()))
+        if key is not None and not limited:
+            self.responses[key] = response
+            if len(self.responses) > self.memoryCache:
+                self.responses.popitem(last=False)
+        return 200, response
+
+
+async def serve(args):
+    """Starts a `ChaseServer` on the address in `args` and serves until
+    it is cancelled."""
+
+    cache = None if args.cache_dir is None else (args.cache_dir, args.cache_size)
+    chaseServer = ChaseServer(args.workers, args.backend, args.memory_cache, cache, create_budget(args))
+    chaseServer.start_pool()
+    if args.unix is not None:
+        server = await asyncio.start_unix_server(chaseServer.handle, path=args.unix)
+        address = args.unix
+    else:
+        server = await asyncio.start_server(chaseServer.handle, args.host, args.port)
+        address = f"http://{args.host}:{args.port}"
+    print(f"serving on {address} with {chaseServer.workers} workers", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        chaseServer.close()
@@ -0,0 +1,23 @@
+from classes.ResultCache import ResultCache
+
+
+def test_put_of_the_same_key_counts_its_size_once(tmp_path):
+    schema = {"A": 0, "B": 1}
+    table = [["a", "b"]]
+    cache = ResultCache(tmp_path, max_entries=10, max_bytes=None)
+    cache.put("other", schema, table, True)
+    cache.put("key", schema, table, True)
+    size = cache.get_path("key").stat().st_size
+    # room for both entries and a little more, but not for a third one
+    cache.max_bytes = cache.total_bytes + size // 2
+    scans = []
+    cache.evict = lambda: scans.append(1)
+
+    for _ in range(20):
+        cache.put("key", schema, table, True)
+
+    assert scans == []
+    assert cache.entries == 2
+    assert cache.total_bytes == sum(path.stat().st_size for path in tmp_path.glob("*.json"))
+    assert cache.get("other") is not None
+    assert cache.get("key") is not None
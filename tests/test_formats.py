@@ -0,0 +1,58 @@
+import pytest
+
+from classes.formats import read_document, write_document
+from classes.json_io import problem_to_json
+from classes.Query import Query
+from classes.Relation import Relation
+from utils.common import FUNCTIONAL_DEPENDENCY
+
+EXTENSIONS = [".xml", ".json", ".jsonl", ".chase"]
+
+
+def problem():
+    relation = Relation("R", ["A", "B", "C"])
+    relation.add_functional_dependency(["A"], ["B"])
+    query = Query(FUNCTIONAL_DEPENDENCY)
+    query.add_functional_dependency(["A"], ["C"])
+    return {"kind": "problem", "relation": relation, "query": query, "queries": [query]}
+
+
+DOCUMENTS = {
+    "problem": problem(),
+    "result": {"kind": "result", "header": ["A", "B"], "table": [["a", "b1"], ["a", "b2"]], "answer": True},
+    "results": {"kind": "results", "results": [{"task": FUNCTIONAL_DEPENDENCY, "answer": False,
+                                                "header": ["A", "B"], "table": [["a", "b"]]}]},
+    "table": {"kind": "table", "header": ["A", "B"], "table": [["a", "b"]], "step_number": 2},
+    "cover": {"kind": "cover", "fds": [[["A"], ["B", "C"]]]},
+    "schemas": {"kind": "schemas", "task": "bcnf_decomposition", "schemas": [["A", "B"], ["A", "C"]]},
+    "trace": {"kind": "trace", "header": ["A", "B"],
+              "steps": [{"step": 1, "table": [["a", "b1"], ["a", "b2"]]},
+                        {"step": 2, "table": [["a", "b1"], ["a", "b1"]]}]},
+}
+
+
+def comparable(document):
+    if document["kind"] == "problem":
+        return problem_to_json(document["relation"], *document["queries"])
+    return document
+
+
+def mismatched(kind, extension):
+    # json lines hold a trace stream and nothing else
+    return extension in (".json", ".jsonl") and (kind == "trace") != (extension == ".jsonl")
+
+
+@pytest.mark.parametrize("extension", EXTENSIONS)
+@pytest.mark.parametrize("kind", DOCUMENTS)
+def test_round_trip(tmp_path, kind, extension):
+    filename = tmp_path / f"document{extension}"
+    document = DOCUMENTS[kind]
+
+    if mismatched(kind, extension):
+        with pytest.raises(ValueError):
+            write_document(document, filename)
+        assert not filename.exists()
+        return
+    write_document(document, filename)
+
+    assert comparable(read_document(filename)) == comparable(document)
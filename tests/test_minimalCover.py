@@ -0,0 +1,20 @@
+from classes.Query import Query
+from classes.Relation import Relation
+from main import checkMinimalCover
+from utils.common import MINIMAL_COVER
+
+
+def test_minimal_cover_leaves_the_query_as_read():
+    relation = Relation("R", ["A", "B", "C"])
+    query = Query(MINIMAL_COVER)
+    query.add_functional_dependency(["A"], ["B"])
+    query.add_functional_dependency(["B"], ["C"])
+    query.add_functional_dependency(["A"], ["C"])
+    fingerprint = query.fingerprint()
+
+    cover = checkMinimalCover(relation, query, None)
+
+    assert sorted(map(sorted, (lhs + rhs for lhs, rhs in cover))) == [["A", "B"], ["B", "C"]]
+    assert len(query.functional_dependencies) == 3
+    assert query.fingerprint() == fingerprint
+    assert {(tuple(lhs), tuple(rhs)) for lhs, rhs in query.functional_dependencies} == query.fd_keys
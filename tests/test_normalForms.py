@@ -0,0 +1,25 @@
+import time
+
+from benchmarks.generate import generateProblem
+from classes.Query import Query
+from classes.Relation import Relation
+from main import designSchema
+from utils.common import BCNF_DECOMPOSITION
+
+
+def test_bcnf_keeps_a_relation_in_bcnf():
+    relation = Relation("R", ["A", "B", "C"])
+    relation.add_functional_dependency(["C"], ["A", "B"])
+    query = Query(BCNF_DECOMPOSITION)
+
+    assert designSchema(relation, query, None) == [["A", "B", "C"]]
+
+
+def test_bcnf_decomposes_a_generated_relation_in_time():
+    relation, query = generateProblem(BCNF_DECOMPOSITION, 0, 60, 90)
+
+    start = time.perf_counter()
+    schemas = designSchema(relation, query, None)
+
+    assert time.perf_counter() - start < 5
+    assert {attr for schema in schemas for attr in schema} == set(relation.attributes)
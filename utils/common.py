@@ -3,5 +3,28 @@ FUNCTIONAL_DEPENDENCY = "functional_dependency"
 MULTIVALUED_DEPENDENCY = "multivalued_dependency"
 LOSSLESS_JOIN = "lossless_join"
 MINIMAL_COVER = "minimal_cover"
+DEPENDENCY_PRESERVATION = "dependency_preservation"
+CANDIDATE_KEYS = "candidate_keys"
+BCNF_DECOMPOSITION = "bcnf_decomposition"
+THIRD_NF_SYNTHESIS = "3nf_synthesis"
 DISTINGUISHED = "distinguished"
-SIMPLE = "simple"
\ No newline at end of file
+SIMPLE = "simple"
+PYTHON_BACKEND = "python"
+NUMPY_BACKEND = "numpy"
+FACTORIZED_BACKEND = "factorized"
+BATCH = "batch"
+TRACE_NONE = "none"
+TRACE_FINAL = "final"
+TRACE_EVERY = "every"
+TRACE_FULL = "full"
+TRACE_FILES = "files"
+TRACE_STREAM = "stream"
+SERVE = "serve"
+CONVERT = "convert"
+XML_FORMAT = "xml"
+JSON_FORMAT = "json"
+BINARY_FORMAT = "binary"
+LIMIT_STEPS = "steps"
+LIMIT_ROWS = "rows"
+LIMIT_TIME = "time"
+LIMIT_MEMORY = "memory"
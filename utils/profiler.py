@@ -0,0 +1,213 @@
+import json
+import time
+import tracemalloc
+from functools import wraps
+
+SETUP = "setup"
+CHASE = "chase"
+GOAL_CHECK = "goal_check"
+IO = "io"
+PHASES = (SETUP, CHASE, GOAL_CHECK, IO)
+
+
+class Profiler():
+    """
+    An opt-in recorder of where a chase spends its time.
+
+    It is disabled by default, and the instrumented code only checks
+    `enabled` before doing any work for it, so it costs close to nothing
+    until it is enabled.
+
+    Phases may nest, e.g. a write to the trace during a minimal cover.
+    The time of a phase excludes the time of the phases nested in it,
+    so the phase times add up to the total time.
+
+    Attributes
+    ----------
+    enabled : bool
+        Whether anything is recorded.
+    phases : dict[str, float]
+        The seconds spent in each of setup, chase, goal check and io.
+    rules : dict[tuple[str, int], dict]
+        The counters of each dependency, keyed by its kind (`fd` or
+        `mvd`) and its index in the relation.
+    steps : list[dict]
+        The time and counters of every step of the chase.
+    counters : dict[str, int]
+        Counters that belong to no dependency or step.
+    peak_memory : int | None
+        The peak memory traced by `tracemalloc`, in bytes.
+
+    Methods
+    -------
+    enable(memory=True)
+        Clears the profile and starts recording.
+    disable()
+        Stops recording.
+    phase(name)
+        Returns a context manager that times a phase.
+    count(kind, index, **counts)
+        Adds to the counters of a dependency and of the current step.
+    to_dict()
+        Returns the profile as a json serialisable dict.
+    write(filename)
+        Writes the profile to a json file.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.tracing = False
+        self.reset()
+
+    def reset(self):
+        """Clears everything recorded so far."""
+
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.rules = {}
+        self.names = {}
+        self.steps = []
+        self.current = None
+        self.counters = {}
+        self.stack = []
+        self.started = None
+        self.elapsed = 0.0
+        self.peak_memory = None
+
+    def enable(self, memory=True):
+        """Clears the profile and starts recording, tracing memory with
+        `tracemalloc` if `memory` is True."""
+
+        self.reset()
+        self.enabled = True
+        self.started = time.perf_counter()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.tracing = True
+
+    def disable(self):
+        """Stops recording and keeps the peak memory traced."""
+
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.elapsed = time.perf_counter() - self.started
+        if self.tracing:
+            _, self.peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.tracing = False
+
+    def describe(self, relation):
+        """Names the dependencies of `relation`, so the profile shows
+        them next to their counters."""
+
+        for kind, dependencies in (("fd", relation.functional_dependencies),
+                                   ("mvd", relation.multivalued_dependencies)):
+            for index, (lhs, rhs) in enumerate(dependencies):
+                self.names[(kind, index)] = (list(lhs), list(rhs))
+
+    def phase(self, name):
+        """Returns a context manager that adds the time spent in it to
+        the phase `name`."""
+
+        return _Phase(self, name)
+
+    def count(self, kind, index, **counts):
+        """Adds `counts` to the counters of dependency `index` of `kind`
+        and to those of the current step."""
+
+        rule = self.rules.get((kind, index))
+        if rule is None:
+            rule = self.rules[(kind, index)] = {"fired": 0}
+        rule["fired"] += counts.pop("fired", 0)
+        for name, value in counts.items():
+            rule[name] = rule.get(name, 0) + value
+            if self.current is not None:
+                self.current[name] = self.current.get(name, 0) + value
+
+    def add(self, name, value=1):
+        """Adds `value` to the counter `name`."""
+
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def run_step(self, function, table, *args):
+        """Runs one step of the chase, `function(table, *args)`, and
+        records its time, counters and table size."""
+
+        number = len(self.steps) + 1
+        self.current = {"step": number, "rows_before": len(table), "cells_changed": 0}
+        with self.phase(CHASE):
+            start = time.perf_counter()
+            table, changed = function(table, *args)
+            self.current["seconds"] = time.perf_counter() - start
+        self.current["rows_after"] = len(table)
+        self.current["changed"] = changed
+        self.steps.append(self.current)
+        self.current = None
+        return table, changed
+
+    def to_dict(self):
+        """Returns the profile as a json serialisable dict."""
+
+        rules = []
+        for (kind, index), counters in sorted(self.rules.items()):
+            rule = {"kind": kind, "index": index}
+            if (kind, index) in self.names:
+                rule["lhs"], rule["rhs"] = self.names[(kind, index)]
+            rule.update(counters)
+            rules.append(rule)
+        return {
+            "seconds": self.elapsed if not self.enabled else time.perf_counter() - self.started,
+            "phases": self.phases,
+            "peak_memory_bytes": self.peak_memory,
+            "counters": self.counters,
+            "rules": rules,
+            "steps": self.steps,
+        }
+
+    def write(self, filename):
+        """Writes the profile to the json file `filename`."""
+
+        with open(filename, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+
+class _Phase():
+    """Times a phase of `profiler`, excluding the phases nested in it."""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        if self.profiler.enabled:
+            self.profiler.stack.append([self.name, time.perf_counter(), 0.0])
+        return self
+
+    def __exit__(self, *exc):
+        profiler = self.profiler
+        if profiler.enabled and profiler.stack:
+            name, start, nested = profiler.stack.pop()
+            elapsed = time.perf_counter() - start
+            profiler.phases[name] += elapsed - nested
+            if profiler.stack:
+                profiler.stack[-1][2] += elapsed
+        return False
+
+
+# the profiler of this process, disabled unless `--profile` is given
+PROFILER = Profiler()
+
+
+def profiled(name):
+    """Returns a decorator that times every call of a function as the
+    phase `name` while the profiler is enabled."""
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+            with PROFILER.phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator